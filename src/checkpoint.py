@@ -0,0 +1,164 @@
+"""
+Checkpoint append-only de execuções de avaliação (JSONL).
+
+Responsabilidades:
+- Registrar cada exemplo concluído (id, resposta, scores e reasoning por métrica)
+  em uma linha JSONL, gravada em disco assim que o exemplo termina
+- Recarregar os exemplos concluídos para retomar uma execução (--resume)
+- Identificar a execução por prompt, dataset, modelos e judges habilitados,
+  de modo que mudar a configuração nunca reaproveite scores incompatíveis
+
+Linhas truncadas (processo interrompido no meio de uma escrita) são ignoradas
+na leitura; o exemplo correspondente é reavaliado.
+
+Configuração via .env:
+- EVAL_CHECKPOINT_DIR=.cache/checkpoints
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHECKPOINT_DIR = ".cache/checkpoints"
+
+
+def example_id(example: Any) -> str:
+    """Identificador estável de um exemplo do dataset.
+
+    Usa o id do LangSmith quando disponível (acrescido do content_hash da
+    sincronização, para que exemplos alterados sejam reavaliados); caso
+    contrário, o hash do conteúdo (inputs + outputs).
+    """
+    langsmith_id = getattr(example, "id", None)
+    if langsmith_id:
+        content_hash = (getattr(example, "metadata", None) or {}).get("content_hash")
+        return f"{langsmith_id}:{content_hash[:12]}" if content_hash else str(langsmith_id)
+
+    content = json.dumps(
+        {"inputs": getattr(example, "inputs", None), "outputs": getattr(example, "outputs", None)},
+        sort_keys=True,
+        ensure_ascii=False,
+        default=str,
+    )
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()[:16]
+
+
+class RunCheckpoint:
+    """Arquivo JSONL append-only com os exemplos concluídos de uma execução."""
+
+    def __init__(self, path: str):
+        """
+        Inicializa o checkpoint (o arquivo é criado na primeira escrita).
+
+        Args:
+            path: Caminho do arquivo JSONL
+        """
+        self.path = Path(path)
+        self._lock = threading.Lock()
+
+    def load(self) -> Dict[str, Dict[str, Any]]:
+        """Retorna os registros já gravados, indexados por example_id."""
+        records: Dict[str, Dict[str, Any]] = {}
+        if not self.path.exists():
+            return records
+
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line_number, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    logger.warning(f"Checkpoint {self.path}: linha {line_number} inválida ignorada")
+                    continue
+                if isinstance(record, dict) and "example_id" in record:
+                    records[record["example_id"]] = record
+
+        return records
+
+    def reset(self) -> None:
+        """Descarta o checkpoint anterior (nova execução do zero)."""
+        with self._lock:
+            if self.path.exists():
+                self.path.unlink()
+
+    def append(
+        self,
+        example_id: str,
+        answer: str,
+        results: Dict[str, Dict[str, Any]],
+    ) -> None:
+        """Grava um exemplo concluído e força a escrita em disco.
+
+        Args:
+            example_id: Identificador do exemplo (ver `example_id`)
+            answer: Resposta gerada pelo prompt
+            results: Resultado de cada judge ({"score", "reasoning", ...})
+        """
+        record = {
+            "example_id": example_id,
+            "answer": answer,
+            "scores": {key: result.get("score") for key, result in results.items()},
+            "reasoning": {key: result.get("reasoning", "") for key, result in results.items()},
+        }
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+
+
+def checkpoint_for_run(
+    prompt_name: str,
+    dataset_name: str,
+    model: str,
+    eval_model: str,
+    metric_keys: Iterable[str],
+    judge_mode: str,
+    directory: Optional[str] = None,
+    tiered_threshold: Optional[float] = None,
+) -> RunCheckpoint:
+    """Retorna o checkpoint da execução identificada pela configuração.
+
+    Args:
+        prompt_name: Prompt avaliado
+        dataset_name: Dataset de avaliação
+        model: Modelo que gera as respostas
+        eval_model: Modelo do judge
+        metric_keys: Métricas habilitadas
+        judge_mode: 'individual' ou 'combined'
+        directory: Diretório dos checkpoints (padrão: EVAL_CHECKPOINT_DIR)
+        tiered_threshold: Limiar do modo em camadas (None = judges sempre chamados)
+
+    Returns:
+        RunCheckpoint em <directory>/<prompt>-<hash da configuração>.jsonl
+    """
+    directory = directory or os.getenv("EVAL_CHECKPOINT_DIR", DEFAULT_CHECKPOINT_DIR)
+
+    config = {
+        "prompt": prompt_name,
+        "dataset": dataset_name,
+        "model": model,
+        "eval_model": eval_model,
+        "metrics": sorted(metric_keys),
+        "judge_mode": judge_mode,
+    }
+    if tiered_threshold is not None:
+        # Só entra na configuração quando ativo, preservando os checkpoints existentes
+        config["tiered_threshold"] = tiered_threshold
+    run_config = json.dumps(config, sort_keys=True)
+    digest = hashlib.sha256(run_config.encode("utf-8")).hexdigest()[:12]
+    safe_name = re.sub(r"[^A-Za-z0-9_.-]+", "_", prompt_name).strip("_") or "prompt"
+
+    return RunCheckpoint(str(Path(directory) / f"{safe_name}-{digest}.jsonl"))
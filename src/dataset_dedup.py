@@ -0,0 +1,318 @@
+"""
+Detecção de bug reports quase duplicados para curadoria do dataset (MinHash + LSH).
+
+Responsabilidades:
+- Tokenizar `inputs.bug_report` com a mesma normalização das métricas
+  (metrics._normalize_text) e formar shingles de palavras
+- Calcular assinaturas MinHash de todo o arquivo com NumPy (permutações
+  afins de 32 bits sobre o hash de cada shingle, em blocos de linhas)
+- Agrupar candidatos por LSH (bandas da assinatura), confirmar cada par pela
+  similaridade de Jaccard estimada e unir os pares em clusters. Dentro de
+  cada bucket, quem não confirma com o líder é comparado com um novo líder
+  entre os restantes, até todos serem confirmados ou virarem líderes
+- Gravar os clusters e um dataset deduplicado, mantendo a primeira ocorrência
+  de cada cluster
+
+O arquivo é lido duas vezes em streaming (assinaturas e, depois, escrita do
+dataset deduplicado); em memória ficam apenas as assinaturas e os bug reports.
+
+Uso:
+  python src/dataset_dedup.py datasets/bug_to_user_story.jsonl
+  python src/dataset_dedup.py logs.jsonl.gz --output dedup.jsonl --clusters clusters.jsonl --threshold 0.8
+"""
+
+import argparse
+import json
+import sys
+import time
+import zlib
+from itertools import chain
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from metrics import _normalize_text
+from utils import iter_jsonl
+
+DEFAULT_NUM_PERM = 128
+DEFAULT_THRESHOLD = 0.8
+DEFAULT_SHINGLE_SIZE = 2
+
+# Linhas por bloco de assinatura e permutações por passada (limitam a memória temporária)
+ROWS_PER_CHUNK = 8192
+PERMS_PER_PASS = 32
+# Pares comparados por bloco na confirmação dos candidatos
+PAIRS_PER_CHUNK = 65536
+
+# Assinatura dos textos sem tokens (ficam fora dos clusters)
+EMPTY_SIGNATURE = np.iinfo(np.uint32).max
+# Multiplicador FNV-1 de 32 bits, usado para combinar os hashes das palavras de um shingle
+_MIX_MULTIPLIER = np.uint32(0x01000193)
+
+
+def _field_value(record: Dict[str, Any], field: str) -> str:
+    """Valor de um campo aninhado (ex: "inputs.bug_report"); vazio se ausente."""
+    value: Any = record
+    for part in field.split("."):
+        value = value.get(part) if isinstance(value, dict) else None
+    return value if isinstance(value, str) else ""
+
+
+def _shingle_hashes(texts: Sequence[str], size: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Hashes (uint32) dos shingles de `size` palavras de cada texto normalizado.
+
+    Cada palavra distinta é hasheada uma única vez (CRC32); o hash do shingle
+    combina os hashes das palavras da janela em NumPy. Textos com menos de `size`
+    palavras viram um único shingle.
+
+    Returns:
+        Tupla (hashes concatenados, quantidade de shingles por texto)
+    """
+    # Textos e palavras repetidos (comuns em logs de produção) são processados uma única vez
+    normalized = {text: _normalize_text(text).split() for text in dict.fromkeys(texts)}
+    token_lists = [normalized[text] for text in texts]
+    token_counts = np.fromiter(map(len, token_lists), dtype=np.int64, count=len(token_lists))
+    tokens = list(chain.from_iterable(token_lists))
+    vocabulary = dict.fromkeys(tokens)
+    hash_of = dict(zip(vocabulary, map(zlib.crc32, map(str.encode, vocabulary))))
+    token_hashes = np.fromiter(map(hash_of.__getitem__, tokens), dtype=np.uint32, count=len(tokens))
+
+    shingle_counts = np.where(token_counts > 0, np.maximum(token_counts - size + 1, 1), 0)
+    doc_starts = np.cumsum(token_counts) - token_counts
+    doc_ends = np.repeat(doc_starts + token_counts, shingle_counts)
+    starts = np.repeat(doc_starts - (np.cumsum(shingle_counts) - shingle_counts), shingle_counts)
+    starts += np.arange(len(starts))
+
+    hashes = token_hashes[starts]
+    for offset in range(1, size):
+        positions = starts + offset
+        inside = positions < doc_ends
+        next_hashes = token_hashes[np.where(inside, positions, 0)]
+        hashes = np.where(inside, (hashes * _MIX_MULTIPLIER) ^ next_hashes, hashes)
+    return hashes, shingle_counts
+
+
+def lsh_params(threshold: float, num_perm: int) -> Tuple[int, int]:
+    """(bandas, linhas por banda) cujo limiar de colisão (1/b)^(1/r) fica mais próximo de `threshold`."""
+    candidates = [(num_perm // rows, rows) for rows in range(1, num_perm + 1)]
+    return min(candidates, key=lambda params: abs((1 / params[0]) ** (1 / params[1]) - threshold))
+
+
+class MinHasher:
+    """Assinaturas MinHash de textos, calculadas em lote com NumPy."""
+
+    def __init__(self, num_perm: int = DEFAULT_NUM_PERM, shingle_size: int = DEFAULT_SHINGLE_SIZE, seed: int = 1):
+        """
+        Inicializa as funções de hash.
+
+        Args:
+            num_perm: Número de permutações (tamanho da assinatura)
+            shingle_size: Palavras por shingle
+            seed: Semente das funções de hash (assinaturas reprodutíveis)
+        """
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        rng = np.random.default_rng(seed)
+        # Permutações h(x) = (a·x + b) mod 2^32 (`a` ímpar) sobre o CRC32 dos shingles
+        self._a = rng.integers(0, 2**32, size=num_perm, dtype=np.uint32) | np.uint32(1)
+        self._b = rng.integers(0, 2**32, size=num_perm, dtype=np.uint32)
+
+    def signatures(self, texts: Sequence[str]) -> np.ndarray:
+        """Assinaturas (len(texts) × num_perm, uint32); textos sem tokens recebem EMPTY_SIGNATURE."""
+        result = np.empty((len(texts), self.num_perm), dtype=np.uint32)
+        for start in range(0, len(texts), ROWS_PER_CHUNK):
+            chunk = texts[start:start + ROWS_PER_CHUNK]
+            result[start:start + len(chunk)] = self._chunk_signatures(chunk)
+        return result
+
+    def _chunk_signatures(self, texts: Sequence[str]) -> np.ndarray:
+        hashes, counts = _shingle_hashes(texts, self.shingle_size)
+
+        signatures = np.full((len(texts), self.num_perm), EMPTY_SIGNATURE, dtype=np.uint32)
+        non_empty = counts > 0
+        if not non_empty.any():
+            return signatures
+        offsets = (np.cumsum(counts) - counts)[non_empty]
+
+        for perm_start in range(0, self.num_perm, PERMS_PER_PASS):
+            perms = slice(perm_start, perm_start + PERMS_PER_PASS)
+            permuted = np.multiply(self._a[perms, None], hashes[None, :])
+            permuted += self._b[perms, None]
+            signatures[non_empty, perms] = np.minimum.reduceat(permuted, offsets, axis=1).T
+        return signatures
+
+
+def _band_keys(band: np.ndarray) -> np.ndarray:
+    """Combina as linhas de uma banda em uma chave uint64 por documento."""
+    keys = np.zeros(len(band), dtype=np.uint64)
+    for column in band.T:
+        keys = (keys * np.uint64(0x100000001B3)) ^ column.astype(np.uint64)
+    return keys
+
+
+def _connected_components(size: int, left: np.ndarray, right: np.ndarray) -> np.ndarray:
+    """Rótulo de cada nó = menor índice do seu componente (propagação de mínimo + pointer jumping)."""
+    labels = np.arange(size, dtype=np.int64)
+    while True:
+        smallest = np.minimum(labels[left], labels[right])
+        updated = labels.copy()
+        np.minimum.at(updated, left, smallest)
+        np.minimum.at(updated, right, smallest)
+        updated = updated[updated]
+        if np.array_equal(updated, labels):
+            return labels
+        labels = updated
+
+
+def _similarity(signatures: np.ndarray, left: np.ndarray, right: np.ndarray) -> np.ndarray:
+    """Jaccard estimado (fração de posições iguais na assinatura) de cada par, em blocos."""
+    similarity = np.empty(len(left), dtype=np.float64)
+    for start in range(0, len(left), PAIRS_PER_CHUNK):
+        end = start + PAIRS_PER_CHUNK
+        similarity[start:end] = (signatures[left[start:end]] == signatures[right[start:end]]).mean(axis=1)
+    return similarity
+
+
+def _bucket_edges(signatures: np.ndarray, docs: np.ndarray, buckets: np.ndarray, threshold: float) -> np.ndarray:
+    """Pares confirmados dentro dos buckets de uma banda.
+
+    `docs` vem agrupado por bucket, em ordem crescente de índice. A cada rodada,
+    o primeiro documento pendente de cada bucket é o líder; quem atinge o
+    limiar com ele é confirmado, e os demais seguem para a próxima rodada.
+    Assim, documentos parecidos entre si mas não com o líder também são comparados.
+    """
+    edges = []
+    while len(docs) > 1:
+        starts = np.flatnonzero(np.concatenate(([True], buckets[1:] != buckets[:-1])))
+        sizes = np.diff(np.append(starts, len(docs)))
+        multi = np.repeat(sizes > 1, sizes)
+        docs, buckets = docs[multi], buckets[multi]
+        if not len(docs):
+            break
+        starts = np.flatnonzero(np.concatenate(([True], buckets[1:] != buckets[:-1])))
+        leaders = np.repeat(docs[starts], np.diff(np.append(starts, len(docs))))
+
+        followers = docs != leaders
+        confirmed = np.zeros(len(docs), dtype=bool)
+        confirmed[followers] = _similarity(signatures, docs[followers], leaders[followers]) >= threshold
+        edges.append(np.stack((docs[confirmed], leaders[confirmed])))
+
+        remaining = followers & ~confirmed
+        docs, buckets = docs[remaining], buckets[remaining]
+
+    if not edges:
+        return np.empty((2, 0), dtype=np.int64)
+    return np.concatenate(edges, axis=1)
+
+
+def find_clusters(
+    signatures: np.ndarray,
+    threshold: float = DEFAULT_THRESHOLD,
+    valid: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """Agrupa assinaturas quase idênticas.
+
+    Args:
+        signatures: Saída de `MinHasher.signatures`
+        threshold: Similaridade de Jaccard estimada mínima para unir dois documentos
+        valid: Máscara dos documentos que participam (padrão: os que têm tokens)
+
+    Returns:
+        Rótulo por documento: índice da primeira ocorrência do seu cluster
+    """
+    size, num_perm = signatures.shape
+    bands, rows = lsh_params(threshold, num_perm)
+    if valid is None:
+        valid = (signatures != EMPTY_SIGNATURE).any(axis=1)
+    indices = np.flatnonzero(valid)
+
+    edges = [np.empty((2, 0), dtype=np.int64)]
+    for band in range(bands):
+        keys = _band_keys(signatures[indices, band * rows:(band + 1) * rows])
+        # Ordenação estável: dentro de cada bucket, índices em ordem crescente
+        order = np.argsort(keys, kind="stable")
+        edges.append(_bucket_edges(signatures, indices[order], keys[order], threshold))
+
+    confirmed = np.unique(np.concatenate(edges, axis=1), axis=1)
+    return _connected_components(size, confirmed[0], confirmed[1])
+
+
+def cluster_records(labels: np.ndarray, texts: Sequence[str]) -> List[Dict[str, Any]]:
+    """Clusters com mais de um membro, do maior para o menor."""
+    representatives, counts = np.unique(labels, return_counts=True)
+    duplicated = representatives[counts > 1]
+    members_by_cluster: Dict[int, List[int]] = {int(rep): [] for rep in duplicated}
+    for index in np.flatnonzero(np.isin(labels, duplicated)):
+        members_by_cluster[int(labels[index])].append(int(index))
+
+    ordered = sorted(members_by_cluster.items(), key=lambda item: (-len(item[1]), item[0]))
+    return [
+        {
+            "cluster": cluster_id,
+            "size": len(members),
+            "representative": representative,
+            "members": members,
+            "bug_reports": [texts[index] for index in members],
+        }
+        for cluster_id, (representative, members) in enumerate(ordered)
+    ]
+
+
+def _write_jsonl(path: str, records: Iterable[Dict[str, Any]]) -> int:
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    written = 0
+    with open(path, "w", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            written += 1
+    return written
+
+
+def _default_path(input_path: str, suffix: str) -> str:
+    path = Path(input_path)
+    name = path.name
+    for extension in (".gz", ".zst", ".zstd", ".jsonl"):
+        name = name.removesuffix(extension)
+    return str(path.with_name(f"{name}.{suffix}.jsonl"))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Detecta bug reports quase duplicados e gera um dataset deduplicado")
+    parser.add_argument("input", help="Dataset JSONL (opcionalmente .gz/.zst)")
+    parser.add_argument("--output", help="Dataset deduplicado (padrão: <input>.dedup.jsonl)")
+    parser.add_argument("--clusters", help="Clusters de quase duplicados (padrão: <input>.clusters.jsonl)")
+    parser.add_argument("--field", default="inputs.bug_report", help="Campo comparado (padrão: inputs.bug_report)")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="Jaccard mínimo (padrão: 0.8)")
+    parser.add_argument("--num-perm", type=int, default=DEFAULT_NUM_PERM)
+    parser.add_argument("--shingle-size", type=int, default=DEFAULT_SHINGLE_SIZE)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    output_path = args.output or _default_path(args.input, "dedup")
+    clusters_path = args.clusters or _default_path(args.input, "clusters")
+
+    started = time.perf_counter()
+    texts = [_field_value(record, args.field) for record in iter_jsonl(args.input)]
+    hasher = MinHasher(num_perm=args.num_perm, shingle_size=args.shingle_size, seed=args.seed)
+    signatures = hasher.signatures(texts)
+    labels = find_clusters(signatures, args.threshold)
+
+    clusters = cluster_records(labels, texts)
+    _write_jsonl(clusters_path, clusters)
+    keep = labels == np.arange(len(labels))
+    kept = _write_jsonl(output_path, (record for record, kept_row in zip(iter_jsonl(args.input), keep) if kept_row))
+
+    bands, rows = lsh_params(args.threshold, args.num_perm)
+    print(
+        f"✅ {len(texts)} linhas em {time.perf_counter() - started:.1f}s "
+        f"(LSH: {bands} bandas × {rows} linhas, Jaccard >= {args.threshold})",
+        file=sys.stderr,
+    )
+    print(f"   {len(clusters)} clusters de quase duplicados → {clusters_path}", file=sys.stderr)
+    print(f"   {kept} linhas mantidas, {len(texts) - kept} removidas → {output_path}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
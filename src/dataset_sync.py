@@ -0,0 +1,261 @@
+"""
+Upload e sincronização incremental de datasets de avaliação no LangSmith.
+
+Responsabilidades:
+- Enviar exemplos em lotes paralelos (`client.create_examples`)
+- Identificar cada exemplo local por hash dos inputs (sync_key) e do
+  conteúdo completo (content_hash), gravados na metadata do exemplo remoto
+- Comparar o arquivo local com o dataset remoto e aplicar apenas a diferença:
+  criar exemplos novos, atualizar os alterados e remover os que saíram do arquivo
+
+Exemplos remotos enviados antes da sincronização (sem hashes na metadata)
+são reconhecidos pelos inputs e atualizados na primeira execução.
+
+Configuração via .env:
+- EVAL_UPLOAD_BATCH_SIZE=500   (exemplos por requisição)
+- EVAL_UPLOAD_WORKERS=4        (requisições em paralelo)
+"""
+
+import hashlib
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from langsmith import Client
+
+from retry import call_with_retry
+
+SYNC_KEY_FIELD = "sync_key"
+CONTENT_HASH_FIELD = "content_hash"
+
+
+def _get_upload_setting(name: str, default: int) -> int:
+    """Lê configuração inteira positiva de upload do .env."""
+    raw_value = os.getenv(name, str(default))
+    try:
+        return max(1, int(raw_value))
+    except ValueError:
+        print(f"   ⚠️  {name} inválido ({raw_value}); usando {default}")
+        return default
+
+
+def _hash(value: Any) -> str:
+    material = json.dumps(value, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+def _user_metadata(metadata: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Metadata do exemplo sem os campos de controle da sincronização."""
+    return {
+        key: value for key, value in (metadata or {}).items()
+        if key not in {SYNC_KEY_FIELD, CONTENT_HASH_FIELD}
+    }
+
+
+def with_sync_metadata(examples: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Retorna cópias dos exemplos com sync_key e content_hash na metadata.
+
+    Exemplos com inputs idênticos recebem sync_keys distintas pela ordem de
+    ocorrência no arquivo.
+    """
+    occurrences: Dict[str, int] = {}
+    prepared = []
+
+    for example in examples:
+        inputs_hash = _hash(example["inputs"])
+        occurrence = occurrences.get(inputs_hash, 0)
+        occurrences[inputs_hash] = occurrence + 1
+
+        metadata = _user_metadata(example.get("metadata"))
+        content_hash = _hash({
+            "inputs": example["inputs"],
+            "outputs": example.get("outputs"),
+            "metadata": metadata,
+        })
+        metadata[SYNC_KEY_FIELD] = f"{inputs_hash}#{occurrence}"
+        metadata[CONTENT_HASH_FIELD] = content_hash
+
+        prepared.append({**example, "metadata": metadata})
+
+    return prepared
+
+
+def _run_in_batches(
+    items: List[Any],
+    send: Callable[[List[Any]], None],
+    batch_size: int,
+    workers: int,
+    label: str
+) -> int:
+    """Envia `items` em lotes paralelos, exibindo o progresso por lote concluído."""
+    batches = [items[start:start + batch_size] for start in range(0, len(items), batch_size)]
+    if not batches:
+        return 0
+
+    def run(batch: List[Any]) -> int:
+        send(batch)
+        return len(batch)
+
+    done = 0
+    with ThreadPoolExecutor(max_workers=min(workers, len(batches))) as executor:
+        for sent in executor.map(run, batches):
+            done += sent
+            print(f"      … {done}/{len(items)} exemplos {label}")
+
+    return done
+
+
+def upload_examples(
+    client: Client,
+    dataset_id: Any,
+    examples: List[Dict[str, Any]],
+    batch_size: Optional[int] = None,
+    workers: Optional[int] = None
+) -> int:
+    """Envia exemplos ao dataset em lotes (`client.create_examples`), em paralelo.
+
+    Cada lote é uma única requisição HTTP; erros transitórios são repetidos
+    com backoff (módulo retry). Se um lote falhar definitivamente, o erro é
+    propagado.
+
+    Args:
+        client: Cliente do LangSmith
+        dataset_id: ID do dataset de destino
+        examples: Exemplos com "inputs", "outputs" e "metadata" (opcional)
+        batch_size: Exemplos por requisição (padrão: EVAL_UPLOAD_BATCH_SIZE ou 500)
+        workers: Lotes enviados em paralelo (padrão: EVAL_UPLOAD_WORKERS ou 4)
+
+    Returns:
+        Quantidade de exemplos enviados
+    """
+    batch_size = batch_size or _get_upload_setting("EVAL_UPLOAD_BATCH_SIZE", 500)
+    workers = workers or _get_upload_setting("EVAL_UPLOAD_WORKERS", 4)
+
+    def send(batch: List[Dict[str, Any]]) -> None:
+        call_with_retry(
+            lambda: client.create_examples(
+                dataset_id=dataset_id,
+                inputs=[example["inputs"] for example in batch],
+                outputs=[example.get("outputs") for example in batch],
+                metadata=[example.get("metadata") for example in batch],
+            ),
+            "dataset_upload",
+        )
+
+    return _run_in_batches(examples, send, batch_size, workers, "enviados")
+
+
+@dataclass
+class SyncPlan:
+    """Diferença entre o arquivo local e o dataset remoto."""
+
+    to_create: List[Dict[str, Any]] = field(default_factory=list)
+    to_update: List[tuple[Any, Dict[str, Any]]] = field(default_factory=list)
+    to_delete: List[Any] = field(default_factory=list)
+    unchanged: int = 0
+
+    @property
+    def has_changes(self) -> bool:
+        return bool(self.to_create or self.to_update or self.to_delete)
+
+
+def plan_sync(local_examples: List[Dict[str, Any]], remote_examples: List[Any]) -> SyncPlan:
+    """Compara exemplos locais (com sync metadata) e remotos pela sync_key e content_hash.
+
+    Args:
+        local_examples: Saída de `with_sync_metadata`
+        remote_examples: Exemplos do LangSmith (com id, inputs e metadata)
+
+    Returns:
+        SyncPlan com os exemplos a criar, atualizar (id remoto, exemplo local) e remover
+    """
+    plan = SyncPlan()
+
+    remote_by_key: Dict[str, Any] = {}
+    legacy_occurrences: Dict[str, int] = {}
+    for remote in remote_examples:
+        metadata = remote.metadata or {}
+        key = metadata.get(SYNC_KEY_FIELD)
+        if key is None:
+            inputs_hash = _hash(remote.inputs)
+            occurrence = legacy_occurrences.get(inputs_hash, 0)
+            legacy_occurrences[inputs_hash] = occurrence + 1
+            key = f"{inputs_hash}#{occurrence}"
+
+        if key in remote_by_key:
+            plan.to_delete.append(remote.id)
+        else:
+            remote_by_key[key] = remote
+
+    local_keys = set()
+    for example in local_examples:
+        key = example["metadata"][SYNC_KEY_FIELD]
+        local_keys.add(key)
+        remote = remote_by_key.get(key)
+
+        if remote is None:
+            plan.to_create.append(example)
+        elif (remote.metadata or {}).get(CONTENT_HASH_FIELD) != example["metadata"][CONTENT_HASH_FIELD]:
+            plan.to_update.append((remote.id, example))
+        else:
+            plan.unchanged += 1
+
+    plan.to_delete.extend(remote.id for key, remote in remote_by_key.items() if key not in local_keys)
+    return plan
+
+
+def sync_dataset(
+    client: Client,
+    dataset_id: Any,
+    examples: List[Dict[str, Any]],
+    batch_size: Optional[int] = None,
+    workers: Optional[int] = None
+) -> SyncPlan:
+    """Sincroniza o dataset remoto com os exemplos locais, aplicando só a diferença.
+
+    Args:
+        client: Cliente do LangSmith
+        dataset_id: ID do dataset existente
+        examples: Exemplos carregados do arquivo local
+        batch_size: Exemplos por requisição (padrão: EVAL_UPLOAD_BATCH_SIZE ou 500)
+        workers: Requisições em paralelo (padrão: EVAL_UPLOAD_WORKERS ou 4)
+
+    Returns:
+        SyncPlan aplicado
+    """
+    batch_size = batch_size or _get_upload_setting("EVAL_UPLOAD_BATCH_SIZE", 500)
+    workers = workers or _get_upload_setting("EVAL_UPLOAD_WORKERS", 4)
+
+    remote_examples = list(client.list_examples(dataset_id=dataset_id))
+    plan = plan_sync(with_sync_metadata(examples), remote_examples)
+
+    print(
+        f"   Sincronização: {len(plan.to_create)} novos, {len(plan.to_update)} alterados, "
+        f"{len(plan.to_delete)} removidos, {plan.unchanged} inalterados"
+    )
+
+    if plan.to_create:
+        upload_examples(client, dataset_id, plan.to_create, batch_size, workers)
+
+    def update(batch: List[tuple[Any, Dict[str, Any]]]) -> None:
+        call_with_retry(
+            lambda: client.update_examples(
+                example_ids=[example_id for example_id, _ in batch],
+                inputs=[example["inputs"] for _, example in batch],
+                outputs=[example.get("outputs") for _, example in batch],
+                metadata=[example["metadata"] for _, example in batch],
+            ),
+            "dataset_upload",
+        )
+
+    def delete(batch: List[Any]) -> None:
+        for example_id in batch:
+            call_with_retry(lambda: client.delete_example(example_id), "dataset_upload")
+
+    _run_in_batches(plan.to_update, update, batch_size, workers, "atualizados")
+    # A API remove um exemplo por requisição; lotes pequenos mantêm o paralelismo
+    _run_in_batches(plan.to_delete, delete, max(1, -(-len(plan.to_delete) // workers)), workers, "removidos")
+
+    return plan
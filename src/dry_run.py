@@ -5,10 +5,12 @@ produces deterministic mock metrics and a JSON results file under `results/`.
 """
 from pathlib import Path
 import json
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterator
 
 import yaml
 
+from utils import iter_jsonl
+
 
 def load_yaml(p: Path) -> Dict[str, Any]:
     """Carrega um arquivo YAML.
@@ -23,23 +25,16 @@ def load_yaml(p: Path) -> Dict[str, Any]:
         return yaml.safe_load(f)
 
 
-def load_jsonl(p: Path) -> List[Dict[str, Any]]:
-    """Carrega um arquivo JSONL.
+def load_jsonl(p: Path) -> Iterator[Dict[str, Any]]:
+    """Lê um arquivo JSONL (opcionalmente .gz/.zst) de forma lazy.
     
     Args:
         p: Caminho do arquivo JSONL
         
     Returns:
-        Lista de dicionários com exemplos
+        Iterador de dicionários com exemplos
     """
-    items = []
-    with p.open("r", encoding="utf-8") as f:
-        for line in f:
-            line = line.strip()
-            if not line:
-                continue
-            items.append(json.loads(line))
-    return items
+    return iter_jsonl(str(p))
 
 
 def mock_metrics(prompt_meta: Dict[str, Any], n_examples: int) -> Dict[str, float]:
@@ -77,15 +72,15 @@ def main() -> None:
     out_dir.mkdir(exist_ok=True)
 
     prompt = load_yaml(prompts_path)
-    examples = load_jsonl(dataset_path)
+    n_examples = sum(1 for _ in load_jsonl(dataset_path))
 
-    metrics = mock_metrics(prompt, len(examples))
+    metrics = mock_metrics(prompt, n_examples)
     avg = round(sum(metrics.values()) / len(metrics), 3)
     verdict = "APROVADO" if all(v >= 0.9 for v in metrics.values()) else "FALHOU"
 
     result = {
         "prompt": prompts_path.name,
-        "n_examples": len(examples),
+        "n_examples": n_examples,
         "metrics": metrics,
         "average": avg,
         "verdict": verdict,
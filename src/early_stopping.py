@@ -0,0 +1,106 @@
+"""
+Teste sequencial para parada antecipada da avaliação.
+
+Responsabilidades:
+- Manter média e variância acumuladas do score geral por exemplo (Welford)
+- Calcular o intervalo de confiança da média a cada novo exemplo
+- Decidir aprovação/reprovação assim que o intervalo fica inteiramente acima
+  ou abaixo do limiar (0.9), permitindo encerrar a avaliação
+
+O intervalo usa a aproximação normal com uma variância mínima, para que os
+primeiros exemplos (muitas vezes com scores idênticos) não decidam sozinhos.
+Como a decisão é reavaliada a cada exemplo, a confiança efetiva é um pouco
+menor que a nominal; EVAL_EARLY_STOP_MIN_EXAMPLES limita esse efeito.
+
+Configuração via .env:
+- EVAL_EARLY_STOP=false
+- EVAL_EARLY_STOP_CONFIDENCE=0.95
+- EVAL_EARLY_STOP_MIN_EXAMPLES=5
+- EVAL_EARLY_STOP_SEED=            (opcional; fixa a ordem aleatória dos exemplos)
+"""
+
+import logging
+import math
+import os
+from statistics import NormalDist
+from typing import Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Variância mínima assumida (desvio padrão 0.1 em scores de 0 a 1)
+MIN_VARIANCE = 0.01
+
+
+class SequentialMeanTest:
+    """Teste sequencial da média contra um limiar de aprovação."""
+
+    def __init__(self, threshold: float = 0.9, confidence: float = 0.95, min_samples: int = 5):
+        """
+        Inicializa o teste.
+
+        Args:
+            threshold: Média mínima para aprovação
+            confidence: Nível de confiança do intervalo (ex: 0.95)
+            min_samples: Exemplos avaliados antes de qualquer decisão
+        """
+        self.threshold = threshold
+        self.confidence = confidence
+        self.min_samples = max(2, min_samples)
+        self._z = NormalDist().inv_cdf(1 - (1 - confidence) / 2)
+
+        self.n = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+
+    def add(self, value: float) -> None:
+        """Acrescenta o score de um exemplo."""
+        self.n += 1
+        delta = value - self.mean
+        self.mean += delta / self.n
+        self._m2 += delta * (value - self.mean)
+
+    def interval(self) -> Tuple[float, float]:
+        """Intervalo de confiança atual da média."""
+        if self.n < 2:
+            return 0.0, 1.0
+        variance = max(self._m2 / (self.n - 1), MIN_VARIANCE)
+        half_width = self._z * math.sqrt(variance / self.n)
+        return self.mean - half_width, self.mean + half_width
+
+    def decision(self) -> Optional[str]:
+        """'pass' ou 'fail' se o resultado já está decidido; None caso contrário."""
+        if self.n < self.min_samples:
+            return None
+        low, high = self.interval()
+        if low >= self.threshold:
+            return "pass"
+        if high < self.threshold:
+            return "fail"
+        return None
+
+
+def early_stop_from_env(threshold: float = 0.9) -> Optional[SequentialMeanTest]:
+    """Cria o teste sequencial se EVAL_EARLY_STOP=true; None caso contrário."""
+    if os.getenv("EVAL_EARLY_STOP", "false").strip().lower() not in {"1", "true", "yes", "y", "on"}:
+        return None
+
+    try:
+        confidence = float(os.getenv("EVAL_EARLY_STOP_CONFIDENCE", "0.95"))
+        min_samples = int(os.getenv("EVAL_EARLY_STOP_MIN_EXAMPLES", "5"))
+        if not 0.5 <= confidence < 1:
+            raise ValueError(confidence)
+    except ValueError:
+        logger.warning("Configuração de EVAL_EARLY_STOP_* inválida; usando confiança 0.95 e mínimo de 5 exemplos")
+        confidence, min_samples = 0.95, 5
+
+    return SequentialMeanTest(threshold=threshold, confidence=confidence, min_samples=min_samples)
+
+
+def early_stop_seed() -> Optional[int]:
+    """EVAL_EARLY_STOP_SEED, se definido (ordem aleatória reprodutível)."""
+    raw_value = os.getenv("EVAL_EARLY_STOP_SEED", "").strip()
+    try:
+        return int(raw_value) if raw_value else None
+    except ValueError:
+        logger.warning(f"EVAL_EARLY_STOP_SEED inválido ({raw_value}); usando ordem aleatória")
+        return None
@@ -0,0 +1,68 @@
+"""
+Configuração da avaliação lida do .env, compartilhada pelos scripts de avaliação.
+
+Responsabilidades:
+- Interpretar flags booleanas (1/true/yes/y/on)
+- Ler engine, concorrência, chamadas em voo e modo dos judges, com aviso e
+  valor padrão quando a variável é inválida
+
+Usado por evaluate.py e run_experiments.py, para que ambos interpretem as
+mesmas variáveis da mesma forma.
+
+Configuração via .env:
+- EVAL_ENGINE=threads             (threads | async)
+- EVAL_CONCURRENCY=1
+- EVAL_MAX_IN_FLIGHT=32
+- EVAL_PARALLEL_JUDGES=true
+- EVAL_JUDGE_MODE=individual      (individual | combined)
+"""
+
+import os
+
+
+def env_flag(name: str, default: str = "false") -> bool:
+    """Interpreta variável de ambiente booleana (1/true/yes/y/on)."""
+    return os.getenv(name, default).strip().lower() in {"1", "true", "yes", "y", "on"}
+
+
+def get_eval_concurrency() -> int:
+    """Lê EVAL_CONCURRENCY (nº de exemplos avaliados em paralelo, padrão 1)."""
+    raw_value = os.getenv("EVAL_CONCURRENCY", "1")
+    try:
+        return max(1, int(raw_value))
+    except ValueError:
+        print(f"   ⚠️  EVAL_CONCURRENCY inválido ({raw_value}); usando execução sequencial")
+        return 1
+
+
+def judges_in_parallel() -> bool:
+    """EVAL_PARALLEL_JUDGES: executa os judges de um exemplo em paralelo (padrão: true)."""
+    return env_flag("EVAL_PARALLEL_JUDGES", "true")
+
+
+def get_eval_engine() -> str:
+    """EVAL_ENGINE: 'threads' (ThreadPoolExecutor, padrão) ou 'async' (ainvoke + asyncio)."""
+    engine = os.getenv("EVAL_ENGINE", "threads").strip().lower()
+    if engine not in {"threads", "async"}:
+        print(f"   ⚠️  EVAL_ENGINE inválido ({engine}); usando 'threads'")
+        return "threads"
+    return engine
+
+
+def get_max_in_flight() -> int:
+    """EVAL_MAX_IN_FLIGHT: máximo de chamadas LLM simultâneas na engine async (padrão 32)."""
+    raw_value = os.getenv("EVAL_MAX_IN_FLIGHT", "32")
+    try:
+        return max(1, int(raw_value))
+    except ValueError:
+        print(f"   ⚠️  EVAL_MAX_IN_FLIGHT inválido ({raw_value}); usando 32")
+        return 32
+
+
+def get_judge_mode() -> str:
+    """EVAL_JUDGE_MODE: 'individual' (um judge por métrica) ou 'combined' (uma chamada por exemplo)."""
+    mode = os.getenv("EVAL_JUDGE_MODE", "individual").strip().lower()
+    if mode not in {"individual", "combined"}:
+        print(f"   ⚠️  EVAL_JUDGE_MODE inválido ({mode}); usando 'individual'")
+        return "individual"
+    return mode
@@ -15,81 +15,253 @@ Suporta múltiplos providers de LLM:
 - Google Gemini (gemini-1.5-flash, gemini-1.5-pro)
 
 Configure o provider no arquivo .env através da variável LLM_PROVIDER.
+
+Para comparar vários prompts em uma única execução (mesmos exemplos, LLM,
+cache e rate limits), use EVAL_PROMPT_NAMES=owner/prompt_a,owner/prompt_b.
+A amostra de exemplos é sorteada uma única vez, antes do primeiro prompt.
+
+Cada exemplo concluído é gravado em um checkpoint JSONL (EVAL_CHECKPOINT_DIR).
+Para retomar uma execução interrompida sem reavaliar o que já foi concluído:
+    python src/evaluate.py --resume
 """
 
+import asyncio
 import json
 import logging
 import os
+import random
 import sys
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from itertools import islice
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
 
 from dotenv import load_dotenv
-from langchain import hub
 from langchain_core.prompts import ChatPromptTemplate
 from langsmith import Client
 
-from metrics import evaluate_clarity, evaluate_f1_score, evaluate_precision
-from utils import check_env_vars, format_score, get_llm as get_configured_llm
+from metrics import (
+    aevaluate_all_metrics,
+    aevaluate_metric,
+    build_judge_prompts,
+    evaluate_acceptance_criteria_score,
+    evaluate_clarity,
+    evaluate_all_metrics,
+    evaluate_completeness_score,
+    evaluate_f1_score,
+    evaluate_precision,
+    evaluate_tone_score,
+    evaluate_user_story_format_score,
+    get_evaluator_llm,
+    tiered_threshold,
+)
+from checkpoint import RunCheckpoint, checkpoint_for_run, example_id
+from dataset_sync import sync_dataset, upload_examples, with_sync_metadata
+from early_stopping import SequentialMeanTest, early_stop_from_env, early_stop_seed
+from eval_config import (
+    env_flag,
+    get_eval_concurrency,
+    get_eval_engine,
+    get_judge_mode,
+    get_max_in_flight,
+    judges_in_parallel,
+)
+from llm_cache import print_cache_stats
+from prompt_cache import pull_prompt
+from rate_limiter import get_rate_limiter, print_rate_limit_stats
+from request_coalescer import print_coalescer_stats
+from retry import print_retry_stats
+from sampling import StratifiedSample, StratifiedSampler, sampling_mode, sampling_seed
+from token_counter import get_token_counter
+from usage import get_usage_tracker, report_usage, set_current_prompt
+from utils import (
+    agenerate_answer,
+    check_env_vars,
+    format_score,
+    generate_answer,
+    get_llm as get_configured_llm,
+    iter_jsonl,
+)
 
 load_dotenv()
 
 logging.basicConfig(level=logging.INFO, format="%(message)s")
 logger = logging.getLogger(__name__)
 
+# Judges gerais (sempre executados) e específicos de Bug to User Story (opcionais)
+CORE_JUDGES = {
+    "f1_score": evaluate_f1_score,
+    "clarity": evaluate_clarity,
+    "precision": evaluate_precision,
+}
+
+BUG_TO_USER_STORY_JUDGES = {
+    "tone_score": evaluate_tone_score,
+    "acceptance_criteria_score": evaluate_acceptance_criteria_score,
+    "user_story_format_score": evaluate_user_story_format_score,
+    "completeness_score": evaluate_completeness_score,
+}
+
+# Métricas que compõem a média de aprovação (as de Bug to User Story são exibidas à parte)
+BASELINE_METRICS = ("helpfulness", "correctness", *CORE_JUDGES)
+
+METRIC_LABELS = {
+    "tone_score": "Tone Score",
+    "acceptance_criteria_score": "Acceptance Criteria Score",
+    "user_story_format_score": "User Story Format Score",
+    "completeness_score": "Completeness Score",
+}
+
+# Limites superiores (segundos) das faixas do histograma de latência
+LATENCY_BUCKETS = [5.0, 10.0, 20.0, 40.0]
+
+# Estimativa de tokens: instruções do prompt de geração quando o template não
+# é conhecido, e saída do judge por métrica (JSON com reasoning de até 60 palavras)
+GENERATION_PROMPT_OVERHEAD_TOKENS = 1200
+JUDGE_OUTPUT_TOKENS_PER_METRIC = 120
+
 
 def get_llm() -> Any:
     """Retorna o LLM configurado com temperatura 0 para consistência."""
     return get_configured_llm(temperature=0)
 
 
-def _estimate_tokens(text: str) -> int:
-    """Estimativa simples de tokens (aprox. 4 chars/token)."""
-    if not text:
-        return 0
-    return max(1, len(text) // 4)
+def _estimate_tokens(text: str, model: Optional[str] = None) -> int:
+    """Tokens de um texto no tokenizer do modelo (padrão: LLM_MODEL)."""
+    return get_token_counter(model or os.getenv("LLM_MODEL", "gpt-4o-mini")).count(text)
 
 
-def _estimate_example_eval_tokens(example: Any) -> int:
-    """Estimativa conservadora de tokens consumidos por exemplo na avaliação.
+def _generation_input_tokens(prompt_template: Any, inputs: Dict[str, Any], model: str) -> int:
+    """Tokens de entrada da geração: mensagens renderizadas do prompt, ou overhead fixo sem template."""
+    counter = get_token_counter(model)
+    if prompt_template is not None:
+        try:
+            messages = prompt_template.invoke(inputs).to_messages()
+            return counter.count_messages(str(message.content) for message in messages)
+        except (KeyError, ValueError, AttributeError):
+            pass
+    question = str(inputs.get("bug_report", inputs.get("question", "")))
+    return counter.count(question) + GENERATION_PROMPT_OVERHEAD_TOKENS
+
+
+def _estimate_example_eval_tokens(example: Any, prompt_template: Any = None) -> int:
+    """Estimativa de tokens consumidos por exemplo na avaliação (entrada + saída).
 
     Considera:
-    - 1 chamada para gerar resposta do prompt
-    - 3 chamadas para métricas (F1, Clarity, Precision)
-    - overhead fixo de instruções/sistema
+    - 1 chamada de geração: o prompt renderizado com os inputs do exemplo
+      (ou overhead fixo, se o template ainda não é conhecido) e uma resposta
+      do tamanho da referência
+    - as chamadas dos judges habilitados, com os prompts reais de metrics.py
+      (individuais ou combinado), usando a referência no lugar da resposta
     """
-    inputs = example.inputs if hasattr(example, "inputs") and isinstance(example.inputs, dict) else {}
-    outputs = example.outputs if hasattr(example, "outputs") and isinstance(example.outputs, dict) else {}
+    inputs, question, reference = _example_fields(example)
+    inputs = inputs if isinstance(inputs, dict) else {}
+    question, reference = str(question), str(reference)
+
+    model = os.getenv("LLM_MODEL", "gpt-4o-mini")
+    judge_counter = get_token_counter(os.getenv("EVAL_MODEL", "gpt-4o"))
+    metric_keys = list(_get_enabled_judges())
+
+    answer_tokens = _estimate_tokens(reference, model)
+    generation = _generation_input_tokens(prompt_template, inputs, model) + answer_tokens
+
+    judge_prompts = build_judge_prompts(
+        question, reference, reference, metric_keys, combined=get_judge_mode() == "combined"
+    )
+    judges = sum(judge_counter.count_messages([prompt]) for prompt in judge_prompts)
+    judges += JUDGE_OUTPUT_TOKENS_PER_METRIC * len(metric_keys)
+
+    return generation + judges
 
-    bug_report = str(inputs.get("bug_report", inputs.get("question", "")))
-    reference = str(outputs.get("reference", ""))
 
-    content_tokens = _estimate_tokens(bug_report) + _estimate_tokens(reference)
-    prompt_and_overhead = 1200
-    estimated_total = (content_tokens + prompt_and_overhead) * 4
-    return max(estimated_total, 2000)
+def _estimate_sample_tokens(example: Any, prompt_templates: Sequence[Any] = ()) -> int:
+    """Estimativa de tokens de um exemplo compartilhado entre prompts: a do prompt mais caro."""
+    if not prompt_templates:
+        return _estimate_example_eval_tokens(example)
+    return max(_estimate_example_eval_tokens(example, prompt_template=template) for template in prompt_templates)
 
 
-def _select_examples_by_token_budget(examples: List[Any], token_limit: int, reserve: int) -> tuple[int, int]:
-    """Retorna quantidade máxima de exemplos que cabe no orçamento de tokens."""
-    available = max(1, token_limit - max(0, reserve))
+def _early_stop_active() -> bool:
+    """EVAL_EARLY_STOP ligado em uma engine que o suporta (threads)."""
+    return env_flag("EVAL_EARLY_STOP") and get_eval_engine() == "threads"
+
+
+def _stratified_sampling(verbose: bool = False) -> bool:
+    """EVAL_SAMPLING=stratified, exceto com parada antecipada ativa.
+
+    O teste sequencial decide sobre a média simples de exemplos em ordem
+    aleatória; com médias ponderadas por estrato, a decisão poderia divergir
+    do score final exibido.
+    """
+    if sampling_mode() != "stratified":
+        return False
+    if _early_stop_active():
+        if verbose:
+            print("   ⚠️  EVAL_EARLY_STOP usa ordem aleatória e média simples; amostragem estratificada desativada")
+        return False
+    return True
+
+
+def _judge_calls_per_example() -> int:
+    """Nº de chamadas ao judge por exemplo, conforme o modo de avaliação."""
+    return 1 if get_judge_mode() == "combined" else len(_get_enabled_judges())
+
+
+def _get_enabled_judges() -> Dict[str, Any]:
+    """Retorna os judges ativos, incluindo os de Bug to User Story se EVAL_BUG_METRICS=true."""
+    judges = dict(CORE_JUDGES)
+    if env_flag("EVAL_BUG_METRICS"):
+        judges.update(BUG_TO_USER_STORY_JUDGES)
+    return judges
+
+
+def _select_examples(
+    examples: Iterable[Any],
+    max_examples: Optional[int],
+    token_budget: Optional[int],
+    prompt_templates: Sequence[Any] = ()
+) -> tuple[List[Any], int]:
+    """Seleciona exemplos em streaming, parando no limite de quantidade ou de tokens.
+
+    O iterador de origem só é consumido até o ponto de parada, de modo que
+    datasets grandes não são carregados inteiros para avaliar poucos exemplos.
+    O primeiro exemplo é sempre selecionado, mesmo que exceda o orçamento.
+    Os tokens de geração são contados nos `prompt_templates` reais (o mais caro).
+
+    Returns:
+        (exemplos selecionados, tokens estimados para avaliá-los)
+    """
+    if max_examples is not None:
+        examples = islice(examples, max_examples)
+
+    selected: List[Any] = []
     consumed = 0
-    count = 0
 
     for example in examples:
-        estimated = _estimate_example_eval_tokens(example)
-        if count > 0 and consumed + estimated > available:
+        estimated = _estimate_sample_tokens(example, prompt_templates)
+        if token_budget is not None and selected and consumed + estimated > token_budget:
             break
-        if count == 0 and estimated > available:
-            return 1, estimated
         consumed += estimated
-        count += 1
+        selected.append(example)
 
-    return max(1, count), consumed
+    return selected, consumed
+
+
+def _dataset_example_count(client: Client, dataset_name: str) -> Optional[int]:
+    """Total de exemplos do dataset (metadado do LangSmith), sem listá-los."""
+    try:
+        return client.read_dataset(dataset_name=dataset_name).example_count
+    except Exception:
+        return None
 
 
 def load_dataset_from_jsonl(jsonl_path: str) -> List[Dict[str, Any]]:
-    """Carrega exemplos de um arquivo JSONL para avaliação.
+    """Carrega exemplos de um arquivo JSONL (opcionalmente .gz/.zst) para avaliação.
+
+    Para iterar sem carregar tudo em memória, use `utils.iter_jsonl`.
     
     Args:
         jsonl_path: Caminho do arquivo JSONL
@@ -97,17 +269,8 @@ def load_dataset_from_jsonl(jsonl_path: str) -> List[Dict[str, Any]]:
     Returns:
         Lista de dicionários com exemplos do dataset
     """
-    examples = []
-
     try:
-        with open(jsonl_path, 'r', encoding='utf-8') as f:
-            for line in f:
-                line = line.strip()
-                if line:  # Ignorar linhas vazias
-                    example = json.loads(line)
-                    examples.append(example)
-
-        return examples
+        return list(iter_jsonl(jsonl_path))
 
     except FileNotFoundError:
         print(f"❌ Arquivo não encontrado: {jsonl_path}")
@@ -122,7 +285,10 @@ def load_dataset_from_jsonl(jsonl_path: str) -> List[Dict[str, Any]]:
 
 
 def create_evaluation_dataset(client: Client, dataset_name: str, jsonl_path: str) -> str:
-    """Cria ou recupera um dataset de avaliação no LangSmith.
+    """Cria o dataset de avaliação no LangSmith ou sincroniza o existente com o arquivo.
+
+    Em datasets existentes, apenas os exemplos novos, alterados ou removidos
+    do arquivo são enviados (ver `dataset_sync`).
     
     Args:
         client: Cliente do LangSmith
@@ -152,17 +318,15 @@ def create_evaluation_dataset(client: Client, dataset_name: str, jsonl_path: str
                 break
 
         if existing_dataset:
-            print(f"   ✓ Dataset '{dataset_name}' já existe, usando existente")
+            print(f"   ✓ Dataset '{dataset_name}' já existe, sincronizando com {jsonl_path}")
+            plan = sync_dataset(client, existing_dataset.id, examples)
+            if not plan.has_changes:
+                print("   ✓ Dataset remoto já está atualizado")
             return dataset_name
         else:
             dataset = client.create_dataset(dataset_name=dataset_name)
 
-            for example in examples:
-                client.create_example(
-                    dataset_id=dataset.id,
-                    inputs=example["inputs"],
-                    outputs=example["outputs"]
-                )
+            upload_examples(client, dataset.id, with_sync_metadata(examples))
 
             print(f"   ✓ Dataset criado com {len(examples)} exemplos")
             return dataset_name
@@ -186,8 +350,9 @@ def pull_prompt_from_langsmith(prompt_name: str) -> ChatPromptTemplate:
     """
     try:
         print(f"   Puxando prompt do LangSmith Hub: {prompt_name}")
-        prompt = hub.pull(prompt_name)
-        print(f"   ✓ Prompt carregado com sucesso")
+        prompt = pull_prompt(prompt_name)
+        commit = (getattr(prompt, "metadata", None) or {}).get("lc_hub_commit_hash")
+        print(f"   ✓ Prompt carregado com sucesso" + (f" (commit {commit[:8]})" if commit else ""))
         return prompt
 
     except (RuntimeError, FileNotFoundError, ValueError) as e:
@@ -221,6 +386,21 @@ def pull_prompt_from_langsmith(prompt_name: str) -> ChatPromptTemplate:
         raise
 
 
+def _example_fields(example: Any) -> tuple[Any, str, str]:
+    """Extrai (inputs, pergunta, referência) de um exemplo do dataset."""
+    inputs = example.inputs if hasattr(example, 'inputs') else {}
+    outputs = example.outputs if hasattr(example, 'outputs') else {}
+
+    reference = outputs.get("reference", "") if isinstance(outputs, dict) else ""
+
+    if isinstance(inputs, dict):
+        question = inputs.get("question", inputs.get("bug_report", inputs.get("pr_title", "N/A")))
+    else:
+        question = "N/A"
+
+    return inputs, question, reference
+
+
 def evaluate_prompt_on_example(prompt_template: ChatPromptTemplate, example: Any, llm: Any) -> Dict[str, Any]:
     """Avalia um modelo de prompt em um exemplo específico do dataset.
     
@@ -233,20 +413,9 @@ def evaluate_prompt_on_example(prompt_template: ChatPromptTemplate, example: Any
         Dicionário com resposta, referência e pergunta
     """
     try:
-        inputs = example.inputs if hasattr(example, 'inputs') else {}
-        outputs = example.outputs if hasattr(example, 'outputs') else {}
+        inputs, question, reference = _example_fields(example)
 
-        chain = prompt_template | llm
-
-        response = chain.invoke(inputs)
-        answer = response.content
-
-        reference = outputs.get("reference", "") if isinstance(outputs, dict) else ""
-
-        if isinstance(inputs, dict):
-            question = inputs.get("question", inputs.get("bug_report", inputs.get("pr_title", "N/A")))
-        else:
-            question = "N/A"
+        answer = generate_answer(prompt_template, inputs, llm)
 
         return {
             "answer": answer,
@@ -264,103 +433,556 @@ def evaluate_prompt_on_example(prompt_template: ChatPromptTemplate, example: Any
             "question": ""
         }
 
+    except Exception as e:
+        print(f"      ⚠️  Falha na geração após retries: {e}")
+        return {
+            "answer": "",
+            "reference": "",
+            "question": ""
+        }
+
+
+def _metric_score(result: Dict[str, Any]) -> Optional[float]:
+    """Score de um judge, ou None se a avaliação falhou (excluída das médias)."""
+    return None if result.get("error") else result["score"]
+
+
+def _judge_results(question: str, answer: str, reference: str, parallel: bool) -> Dict[str, Dict[str, Any]]:
+    """Executa os judges habilitados e retorna o resultado completo de cada métrica.
+
+    Os judges são independentes entre si; com `parallel=True` todos são
+    despachados ao mesmo tempo, de modo que o caminho crítico do exemplo
+    passa a ser um único round-trip de avaliação.
+    """
+    judges = _get_enabled_judges()
+
+    if get_judge_mode() == "combined":
+        return evaluate_all_metrics(question, answer, reference, list(judges))
+
+    if not parallel or len(judges) == 1:
+        return {key: judge(question, answer, reference) for key, judge in judges.items()}
+
+    with ThreadPoolExecutor(max_workers=len(judges)) as executor:
+        futures = {
+            key: executor.submit(judge, question, answer, reference)
+            for key, judge in judges.items()
+        }
+        return {key: future.result() for key, future in futures.items()}
+
+
+def _record_checkpoint(
+    checkpoint: Optional[RunCheckpoint],
+    example: Any,
+    answer: str,
+    results: Dict[str, Dict[str, Any]]
+) -> None:
+    """Grava o exemplo no checkpoint se todas as métricas foram avaliadas.
+
+    Exemplos com métricas que falharam não são gravados, para que sejam
+    reavaliados ao retomar a execução.
+    """
+    if checkpoint is None or any(result.get("error") for result in results.values()):
+        return
+    checkpoint.append(example_id(example), answer, results)
+
+
+def _score_example(
+    prompt_template: ChatPromptTemplate,
+    example: Any,
+    llm: Any,
+    checkpoint: Optional[RunCheckpoint] = None
+) -> Optional[Dict[str, float]]:
+    """Gera a resposta de um exemplo e calcula os scores de todos os judges habilitados.
 
-def evaluate_prompt(prompt_name: str, dataset_name: str, client: Client) -> Dict[str, float]:
-    """Avalia um prompt contra um dataset de exemplos.
-    
-    Args:
-        prompt_name: Nome do prompt a avaliar
-        dataset_name: Nome do dataset de avaliação
-        client: Cliente do LangSmith
-        
     Returns:
-        Dicionário com métricas de avaliação
+        Dicionário com os scores do exemplo ou None se não houve resposta
     """
-    print(f"\n🔍 Avaliando: {prompt_name}")
+    result = evaluate_prompt_on_example(prompt_template, example, llm)
+
+    if not result["answer"]:
+        return None
+
+    results = _judge_results(result["question"], result["answer"], result["reference"], judges_in_parallel())
+    _record_checkpoint(checkpoint, example, result["answer"], results)
+    return {key: _metric_score(metric_result) for key, metric_result in results.items()}
+
+
+def _timed_score_example(
+    prompt_template: ChatPromptTemplate,
+    example: Any,
+    llm: Any,
+    checkpoint: Optional[RunCheckpoint] = None
+) -> tuple[Optional[Dict[str, float]], float]:
+    """Executa `_score_example` medindo a latência ponta a ponta do exemplo."""
+    started = time.perf_counter()
+    scores = _score_example(prompt_template, example, llm, checkpoint)
+    return scores, time.perf_counter() - started
+
+
+def _iter_example_scores(
+    prompt_template: ChatPromptTemplate,
+    examples: Iterable[Any],
+    llm: Any,
+    concurrency: int,
+    checkpoint: Optional[RunCheckpoint] = None
+) -> Iterator[tuple[Optional[Dict[str, float]], float]]:
+    """Avalia exemplos com até `concurrency` workers, preservando a ordem de entrada.
+
+    Os resultados (scores, latência em segundos) são produzidos na mesma ordem
+    de `examples`, de modo que a agregação dos scores é determinística
+    independentemente da concorrência. Com `checkpoint`, cada exemplo é gravado
+    em disco assim que termina.
+
+    `examples` é consumido em streaming: no máximo 2 × `concurrency` exemplos
+    ficam submetidos ao mesmo tempo, e cada score é produzido assim que ele e
+    os anteriores terminam.
+    """
+    if concurrency <= 1:
+        for example in examples:
+            yield _timed_score_example(prompt_template, example, llm, checkpoint)
+        return
+
+    score_fn = partial(_timed_score_example, prompt_template, llm=llm, checkpoint=checkpoint)
+    window = 2 * concurrency
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        pending: deque = deque()
+        try:
+            for example in examples:
+                pending.append(executor.submit(score_fn, example))
+                if len(pending) >= window:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            # Consumidor encerrou antes do fim (ex: parada antecipada)
+            for future in pending:
+                future.cancel()
+
+
+async def _bounded(semaphore: asyncio.Semaphore, coroutine: Any) -> Any:
+    """Aguarda `coroutine` ocupando uma vaga do semáforo de chamadas em voo."""
+    async with semaphore:
+        return await coroutine
+
+
+async def _ascore_example(
+    prompt_template: ChatPromptTemplate,
+    example: Any,
+    llm: Any,
+    semaphore: asyncio.Semaphore,
+    checkpoint: Optional[RunCheckpoint] = None
+) -> tuple[Optional[Dict[str, float]], float]:
+    """Versão assíncrona de `_timed_score_example` (geração + judges via `ainvoke`)."""
+    started = time.perf_counter()
+    inputs, question, reference = _example_fields(example)
 
     try:
-        prompt_template = pull_prompt_from_langsmith(prompt_name)
+        answer = await _bounded(semaphore, agenerate_answer(prompt_template, inputs, llm))
+    except (ValueError, KeyError, AttributeError) as e:
+        print(f"      ⚠️  Erro ao avaliar exemplo: {e}")
+        return None, time.perf_counter() - started
+    except Exception as e:
+        print(f"      ⚠️  Falha na geração após retries: {e}")
+        return None, time.perf_counter() - started
 
-        examples = list(client.list_examples(dataset_name=dataset_name))
-        total_examples = len(examples)
-        print(f"   Dataset: {total_examples} exemplos")
+    if not answer:
+        return None, time.perf_counter() - started
 
-        provider = os.getenv("LLM_PROVIDER", "openai").lower()
-        default_max_examples = 2 if provider in ["google", "gemini"] else 10
+    metric_keys = list(_get_enabled_judges())
+    if get_judge_mode() == "combined":
+        results = await _bounded(semaphore, aevaluate_all_metrics(question, answer, reference, metric_keys))
+    else:
+        outputs = await asyncio.gather(*(
+            _bounded(semaphore, aevaluate_metric(key, question, answer, reference))
+            for key in metric_keys
+        ))
+        results = dict(zip(metric_keys, outputs))
+
+    _record_checkpoint(checkpoint, example, answer, results)
+    scores = {key: _metric_score(result) for key, result in results.items()}
+    return scores, time.perf_counter() - started
+
+
+async def _aevaluate_examples(
+    prompt_template: ChatPromptTemplate,
+    examples: Iterable[Any],
+    llm: Any,
+    max_in_flight: int,
+    checkpoint: Optional[RunCheckpoint] = None
+) -> List[tuple[Optional[Dict[str, float]], float]]:
+    """Avalia todos os exemplos concorrentemente em um único event loop.
+
+    Um `asyncio.Semaphore` limita o total de chamadas LLM em voo (geração e
+    judges). Em caso de cancelamento (Ctrl-C), as tarefas pendentes são
+    canceladas e aguardadas antes de propagar a interrupção.
 
-        max_examples_env = os.getenv("EVAL_MAX_EXAMPLES")
-        token_limit_env = os.getenv("EVAL_TOKEN_LIMIT")
-        token_reserve_env = os.getenv("EVAL_TOKEN_RESERVE", "5000")
+    Returns:
+        Lista (scores, latência) na mesma ordem de `examples`
+    """
+    # Clientes async ficam presos ao event loop em que foram usados
+    get_evaluator_llm.cache_clear()
 
-        max_examples = default_max_examples
+    semaphore = asyncio.Semaphore(max_in_flight)
+    tasks = [
+        asyncio.create_task(_ascore_example(prompt_template, example, llm, semaphore, checkpoint))
+        for example in examples
+    ]
+    progress_step = max(1, len(tasks) // 10)
+    done = 0
 
-        if token_limit_env:
-            try:
-                token_limit = int(token_limit_env)
-                token_reserve = int(token_reserve_env)
-                max_by_budget, estimated_consumption = _select_examples_by_token_budget(
-                    examples, token_limit, token_reserve
-                )
-                max_examples = max_by_budget
+    try:
+        for finished in asyncio.as_completed(tasks):
+            await finished
+            done += 1
+            if done % progress_step == 0 or done == len(tasks):
+                print(f"      … {done}/{len(tasks)} exemplos concluídos")
+    except BaseException as e:
+        pending = [task for task in tasks if not task.done()]
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        if isinstance(e, asyncio.CancelledError):
+            print(f"\n   ⚠️  Avaliação cancelada: {done}/{len(tasks)} exemplos concluídos, {len(pending)} cancelados")
+        raise
+
+    return [task.result() for task in tasks]
+
+
+def _example_overall_score(scores: Dict[str, Optional[float]]) -> Optional[float]:
+    """Score geral de um exemplo, com a mesma composição da média exibida em `display_results`."""
+    valid = {key: value for key, value in scores.items() if key in CORE_JUDGES and value is not None}
+    parts = list(valid.values())
+    if "clarity" in valid and "precision" in valid:
+        parts.append((valid["clarity"] + valid["precision"]) / 2)
+    if "f1_score" in valid and "precision" in valid:
+        parts.append((valid["f1_score"] + valid["precision"]) / 2)
+    return sum(parts) / len(parts) if parts else None
+
+
+def _early_stop_decided(sequential: SequentialMeanTest) -> bool:
+    """Exibe e retorna True se o teste sequencial já decidiu aprovação/reprovação."""
+    decision = sequential.decision()
+    if not decision:
+        return False
+    low, high = sequential.interval()
+    print(
+        f"   ⏹  Parada antecipada após {sequential.n} exemplos: "
+        f"{'APROVADO' if decision == 'pass' else 'REPROVADO'} com {sequential.confidence:.0%} "
+        f"de confiança (média {sequential.mean:.3f}, IC [{low:.3f}, {high:.3f}])"
+    )
+    return True
+
+
+def _format_example_score(value: Optional[float]) -> str:
+    return "ERR" if value is None else f"{value:.2f}"
+
+
+def _print_latency_histogram(latencies: List[float]) -> None:
+    """Exibe histograma de latência por exemplo (geração + judges)."""
+    if not latencies:
+        return
+
+    ordered = sorted(latencies)
+    p50 = ordered[len(ordered) // 2]
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+
+    print(f"   Latência por exemplo: p50={p50:.1f}s p95={p95:.1f}s max={ordered[-1]:.1f}s")
+
+    lower = 0.0
+    for upper in LATENCY_BUCKETS + [float("inf")]:
+        count = sum(1 for latency in latencies if lower <= latency < upper)
+        label = f"{lower:>4.0f}s+  " if upper == float("inf") else f"{lower:>4.0f}-{upper:<3.0f}s"
+        print(f"      {label} | {'█' * count} {count}")
+        lower = upper
+
+
+def _sample_limits(verbose: bool = False) -> tuple[Optional[int], Optional[int]]:
+    """Limites da amostra: (quantidade máxima, orçamento de tokens).
+
+    Combina o limite padrão por provider, EVAL_MAX_EXAMPLES e EVAL_TOKEN_LIMIT
+    (descontada EVAL_TOKEN_RESERVE).
+    """
+    provider = os.getenv("LLM_PROVIDER", "openai").lower()
+    model_name = os.getenv("LLM_MODEL", "gpt-4o-mini")
+    # Sem rate limiter, o Gemini (cota baixa) fica restrito a 2 exemplos;
+    # com o limiter as chamadas aguardam cota em vez de falhar.
+    rate_limited = get_rate_limiter(provider, model_name) is not None
+    default_max_examples = 2 if provider in ["google", "gemini"] and not rate_limited else 10
+
+    max_examples_env = os.getenv("EVAL_MAX_EXAMPLES")
+    token_limit_env = os.getenv("EVAL_TOKEN_LIMIT")
+    token_reserve_env = os.getenv("EVAL_TOKEN_RESERVE", "5000")
+
+    # Com parada antecipada, o teste sequencial decide quantos exemplos avaliar; se a
+    # engine não a suporta (async), o limite padrão continua valendo
+    max_examples: Optional[int] = None if _early_stop_active() else default_max_examples
+    token_budget: Optional[int] = None
+
+    if token_limit_env:
+        try:
+            token_limit = int(token_limit_env)
+            token_reserve = int(token_reserve_env)
+            token_budget = max(1, token_limit - max(0, token_reserve))
+            max_examples = None
+            if verbose:
                 print(
                     f"   Orçamento de tokens ativo: limite={token_limit}, reserva={token_reserve}, "
-                    f"estimativa={estimated_consumption}"
+                    f"tokenizer={get_token_counter(model_name).name}"
                 )
-            except ValueError:
+        except ValueError:
+            if verbose:
                 print("   ⚠️  EVAL_TOKEN_LIMIT inválido; usando seleção padrão por provider")
 
-        if max_examples_env:
-            try:
-                manual_cap = int(max_examples_env)
-                if manual_cap > 0:
-                    max_examples = min(max_examples, manual_cap)
-            except ValueError:
-                pass
+    if max_examples_env:
+        try:
+            manual_cap = int(max_examples_env)
+            if manual_cap > 0:
+                max_examples = manual_cap if max_examples is None else min(max_examples, manual_cap)
+        except ValueError:
+            pass
 
-        if max_examples < 1:
-            max_examples = 1
+    return max_examples, token_budget
 
-        selected_examples = examples[:max_examples]
-        estimated_calls = len(selected_examples) * 4
-        print(f"   Avaliando {len(selected_examples)}/{total_examples} exemplos (EVAL_MAX_EXAMPLES={max_examples})")
-        print(f"   Estimativa de chamadas LLM: ~{estimated_calls} por prompt")
 
-        llm = get_llm()
+def load_evaluation_examples(
+    client: Client,
+    dataset_name: str,
+    prompt_templates: Sequence[Any] = ()
+) -> List[Any]:
+    """Seleciona os exemplos da avaliação.
 
-        f1_scores = []
-        clarity_scores = []
-        precision_scores = []
+    Com EVAL_SAMPLING=first (padrão), seleciona em streaming os primeiros exemplos.
+    Com EVAL_SAMPLING=stratified, lista o dataset inteiro, sorteia uma amostra
+    estratificada proporcional com semente fixa (EVAL_SAMPLING_SEED) e retorna
+    um `StratifiedSample`, usado por `evaluate_prompt` para ponderar as médias.
+    Em ambos os modos valem os limites EVAL_MAX_EXAMPLES e EVAL_TOKEN_LIMIT.
 
-        print("   Avaliando exemplos...")
+    Selecionado uma única vez por execução e compartilhado entre os prompts avaliados.
 
-        for i, example in enumerate(selected_examples, 1):
-            result = evaluate_prompt_on_example(prompt_template, example, llm)
+    Args:
+        client: Cliente do LangSmith
+        dataset_name: Nome do dataset de avaliação
+        prompt_templates: Prompts que serão avaliados (estimativa de tokens do orçamento)
 
-            if result["answer"]:
-                f1 = evaluate_f1_score(result["question"], result["answer"], result["reference"])
-                clarity = evaluate_clarity(result["question"], result["answer"], result["reference"])
-                precision = evaluate_precision(result["question"], result["answer"], result["reference"])
+    Returns:
+        Exemplos selecionados
+    """
+    total_examples = _dataset_example_count(client, dataset_name)
+    if total_examples is not None:
+        print(f"   Dataset: {total_examples} exemplos")
 
-                f1_scores.append(f1["score"])
-                clarity_scores.append(clarity["score"])
-                precision_scores.append(precision["score"])
+    max_examples, token_budget = _sample_limits(verbose=True)
+
+    if _stratified_sampling(verbose=True):
+        sampler = StratifiedSampler(
+            client.list_examples(dataset_name=dataset_name),
+            sample_size=max_examples,
+            token_budget=token_budget,
+            estimate_tokens=partial(_estimate_sample_tokens, prompt_templates=prompt_templates),
+            seed=sampling_seed(),
+        )
+        sample = sampler.draw()
+        if token_budget is not None:
+            print(f"   Estimativa de tokens da seleção: {sampler.estimated_tokens}")
+        print(
+            f"   Amostragem estratificada: {len(sample)}/{sampler.population_size} exemplos "
+            f"(EVAL_MAX_EXAMPLES={max_examples or 'sem limite'}, EVAL_SAMPLING_SEED={sampling_seed()})"
+        )
+        print(f"   Estimativa de chamadas LLM: ~{len(sample) * (1 + _judge_calls_per_example())} por prompt")
+        return sample
+
+    selected_examples, estimated_consumption = _select_examples(
+        client.list_examples(dataset_name=dataset_name), max_examples, token_budget, prompt_templates
+    )
+    if token_budget is not None:
+        print(f"   Estimativa de tokens da seleção: {estimated_consumption}")
+
+    estimated_calls = len(selected_examples) * (1 + _judge_calls_per_example())
+    print(
+        f"   Avaliando {len(selected_examples)}/{total_examples if total_examples is not None else '?'} "
+        f"exemplos (EVAL_MAX_EXAMPLES={max_examples or len(selected_examples)})"
+    )
+    print(f"   Estimativa de chamadas LLM: ~{estimated_calls} por prompt")
+    return selected_examples
+
+
+def evaluate_prompt(
+    prompt_name: str,
+    dataset_name: str,
+    client: Client,
+    resume: bool = False,
+    examples: Optional[List[Any]] = None,
+    llm: Any = None,
+    prompt_template: Optional[ChatPromptTemplate] = None
+) -> Dict[str, float]:
+    """Avalia um prompt contra um dataset de exemplos.
 
-                print(f"      [{i}/{len(selected_examples)}] F1:{f1['score']:.2f} Clarity:{clarity['score']:.2f} Precision:{precision['score']:.2f}")
+    Cada exemplo concluído é gravado em um checkpoint JSONL da execução; com
+    `resume=True`, exemplos já presentes no checkpoint não são reavaliados.
 
-        avg_f1 = sum(f1_scores) / len(f1_scores) if f1_scores else 0.0
-        avg_clarity = sum(clarity_scores) / len(clarity_scores) if clarity_scores else 0.0
-        avg_precision = sum(precision_scores) / len(precision_scores) if precision_scores else 0.0
+    Quando `examples` é um `StratifiedSample` (EVAL_SAMPLING=stratified), as
+    médias são ponderadas pelo tamanho de cada estrato na população.
+    
+    Args:
+        prompt_name: Nome do prompt a avaliar
+        dataset_name: Nome do dataset de avaliação
+        client: Cliente do LangSmith
+        resume: Retoma a execução anterior a partir do checkpoint
+        examples: Exemplos a avaliar (padrão: `load_evaluation_examples`)
+        llm: LLM de geração compartilhado entre prompts (padrão: `get_llm()`); ignorado
+            na engine async, que cria um LLM novo para o seu event loop
+        prompt_template: Prompt já puxado do Hub (padrão: puxa `prompt_name`)
+        
+    Returns:
+        Dicionário com métricas de avaliação
+    """
+    print(f"\n🔍 Avaliando: {prompt_name}")
+    set_current_prompt(prompt_name)
+
+    try:
+        if prompt_template is None:
+            prompt_template = pull_prompt_from_langsmith(prompt_name)
+
+        if examples is None:
+            examples = load_evaluation_examples(client, dataset_name, [prompt_template])
+        stratified = examples if isinstance(examples, StratifiedSample) else None
+        selected_examples = list(examples)
+        model_name = os.getenv("LLM_MODEL", "gpt-4o-mini")
+
+        if get_eval_engine() != "async":
+            llm = llm or get_llm()
+        judges = _get_enabled_judges()
+        metric_scores: Dict[str, List[float]] = {key: [] for key in judges}
+        scored: List[tuple[Any, Dict[str, Optional[float]]]] = []
+        latencies: List[float] = []
+        failed_metrics = 0
+
+        checkpoint = checkpoint_for_run(
+            prompt_name,
+            dataset_name,
+            model=model_name,
+            eval_model=os.getenv("EVAL_MODEL", "gpt-4o"),
+            metric_keys=judges,
+            judge_mode=get_judge_mode(),
+            tiered_threshold=tiered_threshold(),
+        )
+        sequential = early_stop_from_env()
+        if sequential is not None and get_eval_engine() == "async":
+            print("   ⚠️  EVAL_EARLY_STOP requer EVAL_ENGINE=threads; avaliando todos os exemplos")
+            sequential = None
+
+        if sequential is not None:
+            if stratified is not None:
+                print("   ⚠️  Parada antecipada com amostra estratificada: médias sem ponderação por estrato")
+                stratified = None
+            random.Random(early_stop_seed()).shuffle(selected_examples)
+
+        if sequential is not None:
+            print(
+                f"   Parada antecipada ativa: confiança={sequential.confidence:.0%}, "
+                f"mínimo={sequential.min_samples} exemplos, ordem aleatória"
+            )
+
+        if tiered_threshold() is not None:
+            print(
+                f"   Modo em camadas: F1/Clarity/Precision sem judge quando a heurística "
+                f">= {tiered_threshold():.2f}"
+            )
+
+        if resume:
+            completed = checkpoint.load()
+            resumed = [(ex, completed[example_id(ex)]) for ex in selected_examples if example_id(ex) in completed]
+            for ex, record in resumed:
+                scored.append((ex, record["scores"]))
+                for key, value in record["scores"].items():
+                    if key in metric_scores and value is not None:
+                        metric_scores[key].append(value)
+                overall = _example_overall_score(record["scores"])
+                if sequential is not None and overall is not None:
+                    sequential.add(overall)
+            selected_examples = [ex for ex in selected_examples if example_id(ex) not in completed]
+            print(
+                f"   ↻ Retomando de {checkpoint.path}: {len(resumed)} exemplos já concluídos, "
+                f"{len(selected_examples)} restantes"
+            )
+            if sequential is not None and _early_stop_decided(sequential):
+                selected_examples = []
+        else:
+            checkpoint.reset()
+            print(f"   Checkpoint: {checkpoint.path}")
+
+        total_to_run = len(selected_examples)
+        concurrency = max(1, min(get_eval_concurrency(), total_to_run))
+
+        if get_eval_engine() == "async":
+            max_in_flight = get_max_in_flight()
+            print(
+                f"   Avaliando exemplos... (engine=async, EVAL_MAX_IN_FLIGHT={max_in_flight}, "
+                f"judges={len(judges)}, modo={get_judge_mode()})"
+            )
+            # Clientes async ficam presos ao event loop em que foram usados: cada
+            # asyncio.run (um por prompt) recebe um LLM de geração novo
+            example_scores = asyncio.run(
+                _aevaluate_examples(prompt_template, selected_examples, get_llm(), max_in_flight, checkpoint)
+            )
+        else:
+            print(
+                f"   Avaliando exemplos... (EVAL_CONCURRENCY={concurrency}, "
+                f"judges={len(judges)}, modo={get_judge_mode()}, "
+                f"paralelos={'sim' if judges_in_parallel() else 'não'})"
+            )
+            example_scores = _iter_example_scores(prompt_template, selected_examples, llm, concurrency, checkpoint)
+        for i, (example, (scores, latency)) in enumerate(zip(selected_examples, example_scores), 1):
+            latencies.append(latency)
+            if scores:
+                scored.append((example, scores))
+                for key, value in scores.items():
+                    if value is None:
+                        failed_metrics += 1
+                    else:
+                        metric_scores[key].append(value)
 
-        avg_helpfulness = (avg_clarity + avg_precision) / 2
-        avg_correctness = (avg_f1 + avg_precision) / 2
+                print(
+                    f"      [{i}/{total_to_run}] F1:{_format_example_score(scores['f1_score'])} "
+                    f"Clarity:{_format_example_score(scores['clarity'])} "
+                    f"Precision:{_format_example_score(scores['precision'])} ({latency:.1f}s)"
+                )
 
-        return {
+                overall = _example_overall_score(scores)
+                if sequential is not None and overall is not None:
+                    sequential.add(overall)
+                    if _early_stop_decided(sequential):
+                        example_scores.close()
+                        break
+
+        _print_latency_histogram(latencies)
+
+        if tiered_threshold() is not None:
+            skipped, total = get_usage_tracker().judge_skip_counts(prompt_name)
+            if total:
+                print(f"   ⚡ Judges dispensados pela heurística: {skipped}/{total} ({skipped / total:.0%})")
+
+        if failed_metrics:
+            print(f"   ⚠️  {failed_metrics} avaliações de métrica falharam e foram excluídas das médias")
+
+        if stratified is not None:
+            stratified.print_summary([(ex, _example_overall_score(scores)) for ex, scores in scored])
+            averages = stratified.weighted_averages(scored, metric_scores)
+        else:
+            averages = {
+                key: sum(values) / len(values) if values else 0.0
+                for key, values in metric_scores.items()
+            }
+
+        avg_helpfulness = (averages["clarity"] + averages["precision"]) / 2
+        avg_correctness = (averages["f1_score"] + averages["precision"]) / 2
+
+        results = {
             "helpfulness": round(avg_helpfulness, 4),
-            "correctness": round(avg_correctness, 4),
-            "f1_score": round(avg_f1, 4),
-            "clarity": round(avg_clarity, 4),
-            "precision": round(avg_precision, 4)
+            "correctness": round(avg_correctness, 4)
         }
+        results.update({key: round(value, 4) for key, value in averages.items()})
+        return results
 
     except (RuntimeError, ValueError, AttributeError, KeyError) as e:
         print(f"   ❌ Erro na avaliação: {e}")
@@ -373,6 +995,53 @@ def evaluate_prompt(prompt_name: str, dataset_name: str, client: Client) -> Dict
         }
 
 
+def _prompts_to_evaluate() -> List[str]:
+    """EVAL_PROMPT_NAMES (separados por vírgula) ou, na ausência, o prompt único configurado."""
+    names = [name.strip() for name in os.getenv("EVAL_PROMPT_NAMES", "").split(",") if name.strip()]
+    if names:
+        return list(dict.fromkeys(names))
+    return [os.getenv("EVAL_PROMPT_NAME") or os.getenv("PUSH_PROMPT_NAME") or "bug_to_user_story_v2"]
+
+
+def _baseline_average(scores: Dict[str, float]) -> float:
+    """Média das métricas base presentes (a mesma usada na aprovação)."""
+    values = [scores[key] for key in BASELINE_METRICS if key in scores]
+    return sum(values) / len(values) if values else 0.0
+
+
+def display_comparison(results_summary: List[Dict[str, Any]]) -> None:
+    """Exibe tabela comparativa dos prompts avaliados (melhor média marcada com ★).
+
+    Tokens e custo vêm da usage metadata registrada durante a avaliação de cada prompt.
+    """
+    metric_keys = [key for key in ["helpfulness", "correctness", *CORE_JUDGES, *BUG_TO_USER_STORY_JUDGES]
+                   if any(key in result["scores"] for result in results_summary)]
+    headers = {"helpfulness": "Help", "correctness": "Corr", "f1_score": "F1", "clarity": "Clar",
+               "precision": "Prec", "tone_score": "Tone", "acceptance_criteria_score": "AC",
+               "user_story_format_score": "Fmt", "completeness_score": "Comp"}
+
+    averages = [_baseline_average(result["scores"]) for result in results_summary]
+    best = max(range(len(averages)), key=averages.__getitem__)
+    name_width = max(len("Prompt"), *(len(result["prompt"]) for result in results_summary))
+    usage_by_prompt = get_usage_tracker().totals_by("prompt")
+
+    print("\nCOMPARATIVO")
+    header = f"  {'Prompt':<{name_width}} " + " ".join(f"{headers[key]:>6}" for key in metric_keys)
+    print(header + f" {'Média':>7} {'Tokens':>9} {'Custo $':>8}  Status")
+    print("  " + "-" * (len(header) + 33))
+    for index, (result, average) in enumerate(zip(results_summary, averages)):
+        cells = " ".join(f"{result['scores'].get(key, 0.0):>6.3f}" for key in metric_keys)
+        status = "✅" if result["passed"] else "❌"
+        marker = " ★" if index == best else ""
+        usage = usage_by_prompt.get(result["prompt"], {})
+        tokens = int(usage.get("input_tokens", 0) + usage.get("output_tokens", 0))
+        print(
+            f"  {result['prompt']:<{name_width}} {cells} {average:>7.4f} "
+            f"{tokens:>9} {usage.get('cost_usd', 0.0):>8.4f}  {status}{marker}"
+        )
+    print()
+
+
 def display_results(prompt_name: str, scores: Dict[str, float]) -> bool:
     """Exibe resultados da avaliação de forma estruturada.
     
@@ -381,7 +1050,7 @@ def display_results(prompt_name: str, scores: Dict[str, float]) -> bool:
         scores: Dicionário com scores das métricas
         
     Returns:
-        True se aprovado (média >= 0.9), False caso contrário
+        True se aprovado (média das métricas base >= 0.9), False caso contrário
     """
     print("\n" + "=" * 50)
     print(f"Prompt: {prompt_name}")
@@ -396,7 +1065,15 @@ def display_results(prompt_name: str, scores: Dict[str, float]) -> bool:
     print(f"  - Clarity: {format_score(scores['clarity'], threshold=0.9)}")
     print(f"  - Precision: {format_score(scores['precision'], threshold=0.9)}")
 
-    average_score = sum(scores.values()) / len(scores)
+    bug_metrics = [key for key in BUG_TO_USER_STORY_JUDGES if key in scores]
+    if bug_metrics:
+        print("\nMétricas Bug to User Story (informativas, fora da média):")
+        for key in bug_metrics:
+            print(f"  - {METRIC_LABELS[key]}: {format_score(scores[key], threshold=0.9)}")
+        bug_average = sum(scores[key] for key in bug_metrics) / len(bug_metrics)
+        print(f"  Média Bug to User Story: {bug_average:.4f}")
+
+    average_score = _baseline_average(scores)
 
     print("\n" + "-" * 50)
     print(f"📊 MÉDIA GERAL: {average_score:.4f}")
@@ -423,6 +1100,8 @@ def main() -> int:
     logger.info("AVALIAÇÃO DE PROMPTS OTIMIZADOS")
     logger.info("=" * 70 + "\n")
 
+    resume = "--resume" in sys.argv[1:]
+
     provider = os.getenv("LLM_PROVIDER", "openai")
     llm_model = os.getenv("LLM_MODEL", "gpt-4o-mini")
     eval_model = os.getenv("EVAL_MODEL", "gpt-4o")
@@ -460,8 +1139,31 @@ def main() -> int:
     print("Certifique-se de ter feito push dos prompts antes de avaliar:")
     print("  python src/push_prompts.py\n")
 
-    prompt_to_evaluate = os.getenv("EVAL_PROMPT_NAME") or os.getenv("PUSH_PROMPT_NAME") or "bug_to_user_story_v2"
-    prompts_to_evaluate = [prompt_to_evaluate]
+    prompts_to_evaluate = _prompts_to_evaluate()
+    print(f"Prompts: {', '.join(prompts_to_evaluate)}")
+
+    # Prompts puxados antes da seleção: a estimativa de tokens do orçamento usa
+    # os templates reais, e a amostra é a mesma para todos os prompts.
+    print("\n📥 Puxando prompts")
+    prompt_templates: Dict[str, ChatPromptTemplate] = {}
+    for prompt_name in prompts_to_evaluate:
+        try:
+            prompt_templates[prompt_name] = pull_prompt_from_langsmith(prompt_name)
+        except (RuntimeError, FileNotFoundError, ValueError):
+            pass
+
+    # Exemplos e LLM de geração são compartilhados entre os prompts; o cache de
+    # respostas, o judge e os rate limiters já são únicos por processo.
+    print(f"\n📦 Selecionando exemplos de '{dataset_name}'")
+    try:
+        shared_examples = load_evaluation_examples(client, dataset_name, list(prompt_templates.values()))
+    except (RuntimeError, ValueError, AttributeError, KeyError) as e:
+        print(f"❌ Erro ao carregar exemplos do dataset: {e}")
+        return 1
+    if len(prompts_to_evaluate) > 1:
+        print(f"   {len(prompts_to_evaluate)} prompts × {len(shared_examples)} exemplos")
+    # Na engine async o LLM de geração é criado por event loop (ver evaluate_prompt)
+    shared_llm = get_llm() if get_eval_engine() != "async" else None
 
     all_passed = True
     evaluated_count = 0
@@ -471,7 +1173,12 @@ def main() -> int:
         evaluated_count += 1
 
         try:
-            scores = evaluate_prompt(prompt_name, dataset_name, client)
+            if prompt_name not in prompt_templates:
+                raise RuntimeError("prompt não carregado do LangSmith Hub")
+            scores = evaluate_prompt(
+                prompt_name, dataset_name, client, resume=resume, examples=shared_examples, llm=shared_llm,
+                prompt_template=prompt_templates[prompt_name]
+            )
 
             passed = display_results(prompt_name, scores)
             all_passed = all_passed and passed
@@ -506,9 +1213,18 @@ def main() -> int:
         print("⚠️  Nenhum prompt foi avaliado")
         return 1
 
+    if len(results_summary) > 1:
+        display_comparison(results_summary)
+
     print(f"Prompts avaliados: {evaluated_count}")
     print(f"Aprovados: {sum(1 for r in results_summary if r['passed'])}")
-    print(f"Reprovados: {sum(1 for r in results_summary if not r['passed'])}\n")
+    print(f"Reprovados: {sum(1 for r in results_summary if not r['passed'])}")
+    print_cache_stats()
+    print_coalescer_stats()
+    print_rate_limit_stats()
+    print_retry_stats()
+    report_usage()
+    print()
 
     if all_passed:
         print("✅ Todos os prompts atingiram média >= 0.9!")
@@ -528,4 +1244,8 @@ def main() -> int:
         return 1
 
 if __name__ == "__main__":
-    sys.exit(main())
+    try:
+        sys.exit(main())
+    except KeyboardInterrupt:
+        print("\n⚠️  Avaliação interrompida pelo usuário (Ctrl-C)")
+        sys.exit(130)
@@ -0,0 +1,224 @@
+"""
+Cálculo em lote das heurísticas de calibragem (sem chamadas ao LLM).
+
+Responsabilidades:
+- Calcular overlap com a referência, aderência estrutural e penalidade de
+  alucinação para listas inteiras de (pergunta, resposta, referência)
+- Operar sobre o vocabulário com arrays NumPy: cada par (documento, token) vira
+  uma chave inteira, e as interseções de conjuntos de todos os documentos são
+  resolvidas com `np.isin` + `np.bincount` em uma única passada
+- Devolver o resultado em colunas (um array por componente e por score
+  heurístico), pronto para exportar em CSV
+- Recalcular os scores com novos pesos a partir dos componentes já
+  calculados (`apply_calibration`), sem reprocessar os textos
+
+Os valores são os mesmos de metrics.ExampleAnalysis, exemplo a exemplo; só a
+normalização de texto (uma vez por texto distinto) e a contagem de bullets
+continuam em Python.
+
+Uso:
+  python src/heuristics_batch.py respostas.jsonl[.gz] --output scores.csv
+
+Cada linha do JSONL precisa de "answer" e "reference" (ou "outputs.reference")
+e, opcionalmente, "question" (ou "inputs.bug_report").
+"""
+
+import argparse
+import csv
+import re
+import sys
+from itertools import chain, count, islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from metrics import HEURISTIC_WEIGHTS, STORY_TERMS, SUSPICIOUS_TERMS, _normalize_text, heuristic_score
+from utils import iter_jsonl
+
+# Linhas iniciadas por "-" (ignorando espaços), como em ExampleAnalysis.structure_score
+_BULLET_RE = re.compile(r"^[^\S\n]*-", re.MULTILINE)
+
+COLUMNS = (
+    "overlap",
+    "structure",
+    "hallucination_penalty",
+    *(f"heuristic_{key}" for key in HEURISTIC_WEIGHTS),
+)
+
+
+def _token_pairs(*groups: Sequence[str]) -> Tuple[Dict[str, int], List[Tuple[np.ndarray, np.ndarray]]]:
+    """Vocabulário comum e pares (índice do documento, id do token) de cada grupo de textos.
+
+    Cada documento contribui com seus tokens distintos de mais de 2 caracteres,
+    como em metrics.ExampleAnalysis. As iterações por token ficam em C
+    (`set`, `dict.fromkeys`, `map`); o filtro de tamanho é aplicado por vocabulário.
+    """
+    docs_by_group = []
+    flat_by_group = []
+    for texts in groups:
+        token_sets = [set(text.split()) for text in texts]
+        lengths = np.fromiter(map(len, token_sets), dtype=np.int64, count=len(token_sets))
+        docs_by_group.append(np.repeat(np.arange(len(token_sets), dtype=np.int64), lengths))
+        flat_by_group.append(list(chain.from_iterable(token_sets)))
+
+    vocabulary = dict(zip(dict.fromkeys(chain.from_iterable(flat_by_group)), count()))
+    long_enough = np.fromiter(map(len, vocabulary), dtype=np.int64, count=len(vocabulary)) > 2
+
+    pairs = []
+    for docs, flat in zip(docs_by_group, flat_by_group):
+        tokens = np.fromiter(map(vocabulary.__getitem__, flat), dtype=np.int64, count=len(flat))
+        keep = long_enough[tokens]
+        pairs.append((docs[keep], tokens[keep]))
+    return vocabulary, pairs
+
+
+def _normalize_all(texts: Sequence[str]) -> List[str]:
+    """Normaliza cada texto distinto uma única vez (perguntas e referências se repetem no corpus)."""
+    normalized: Dict[str, str] = {}
+    return [normalized[text] if text in normalized else normalized.setdefault(text, _normalize_text(text))
+            for text in texts]
+
+
+def _pair_keys(docs: np.ndarray, tokens: np.ndarray, vocabulary_size: int) -> np.ndarray:
+    return docs * vocabulary_size + tokens
+
+
+def score_heuristics_batch(
+    questions: Sequence[str],
+    answers: Sequence[str],
+    references: Sequence[str]
+) -> Dict[str, np.ndarray]:
+    """Calcula todos os componentes heurísticos de uma lista de exemplos.
+
+    Args:
+        questions: Perguntas / bug reports
+        answers: Respostas geradas
+        references: Respostas esperadas
+
+    Returns:
+        Colunas (ver COLUMNS) com um valor por exemplo
+    """
+    n = len(answers)
+    if not (len(questions) == len(references) == n):
+        raise ValueError("questions, answers e references precisam ter o mesmo tamanho")
+
+    answers = [answer or "" for answer in answers]
+    normalized_answers = _normalize_all(answers)
+
+    vocabulary, pairs = _token_pairs(
+        normalized_answers,
+        _normalize_all([text or "" for text in references]),
+        _normalize_all([text or "" for text in questions]),
+    )
+    (answer_docs, answer_tokens), (reference_docs, reference_tokens), (question_docs, question_tokens) = pairs
+
+    size = max(1, len(vocabulary))
+    answer_keys = _pair_keys(answer_docs, answer_tokens, size)
+    reference_keys = _pair_keys(reference_docs, reference_tokens, size)
+    context_keys = np.union1d(reference_keys, _pair_keys(question_docs, question_tokens, size))
+
+    # Overlap: fração dos tokens da referência presentes na resposta
+    reference_sizes = np.bincount(reference_docs, minlength=n)
+    shared = np.bincount(reference_docs, weights=np.isin(reference_keys, answer_keys), minlength=n)
+    overlap = np.divide(shared, reference_sizes, out=np.zeros(n), where=reference_sizes > 0)
+
+    # Penalidade: tokens suspeitos da resposta ausentes da pergunta e da referência
+    suspicious_ids = np.zeros(size, dtype=bool)
+    suspicious_ids[np.array(
+        [vocabulary[term] for term in SUSPICIOUS_TERMS if term in vocabulary], dtype=np.int64
+    )] = True
+    hallucinated = suspicious_ids[answer_tokens] & ~np.isin(answer_keys, context_keys)
+    suspicious_count = np.bincount(answer_docs, weights=hallucinated, minlength=n)
+    answer_sizes = np.bincount(answer_docs, minlength=n)
+    penalty = np.where(answer_sizes == 0, 0.3, np.minimum(0.15, suspicious_count * 0.03))
+
+    # Estrutura: termos da história, critérios de aceitação e bullets
+    has_story = np.fromiter(
+        (all(term in text for term in STORY_TERMS) for text in normalized_answers), dtype=bool, count=n
+    )
+    has_acceptance = np.fromiter(
+        ("criterios de aceitacao" in text for text in normalized_answers), dtype=bool, count=n
+    )
+    bullets = np.fromiter((len(_BULLET_RE.findall(answer)) for answer in answers), dtype=np.float64, count=n)
+    structure = np.minimum(1.0, 0.75 + 0.1 * has_story + 0.1 * has_acceptance + 0.05 * np.minimum(1.0, bullets / 5))
+
+    columns = {"overlap": overlap, "structure": structure, "hallucination_penalty": penalty}
+    columns.update(apply_calibration(columns))
+    return columns
+
+
+def apply_calibration(
+    columns: Dict[str, np.ndarray],
+    weights: Optional[Dict[str, Dict[str, float]]] = None
+) -> Dict[str, np.ndarray]:
+    """Scores heurísticos a partir dos componentes já calculados.
+
+    Permite testar novos pesos de calibragem sobre um corpus inteiro sem
+    reprocessar os textos.
+
+    Args:
+        columns: Saída de `score_heuristics_batch` (overlap, structure, hallucination_penalty)
+        weights: Pesos no formato de metrics.HEURISTIC_WEIGHTS (padrão: os atuais)
+
+    Returns:
+        Colunas heuristic_<métrica>, limitadas a [0, 1]
+    """
+    overlap, structure = columns["overlap"], columns["structure"]
+    return {
+        f"heuristic_{key}": np.clip(
+            heuristic_score(
+                key, overlap, structure,
+                columns["hallucination_penalty"] if key == "precision" else 0.0,
+                weights=weights,
+            ),
+            0.0, 1.0,
+        )
+        for key in HEURISTIC_WEIGHTS
+    }
+
+
+def _record_fields(record: Dict[str, Any]) -> Tuple[str, str, str]:
+    inputs = record.get("inputs") or {}
+    outputs = record.get("outputs") or {}
+    question = record.get("question") or inputs.get("bug_report") or inputs.get("question") or ""
+    reference = record.get("reference") or outputs.get("reference") or ""
+    return str(question), str(record.get("answer") or ""), str(reference)
+
+
+def iter_scored_chunks(records: Iterable[Dict[str, Any]], chunk_size: int = 50000) -> Iterator[Dict[str, np.ndarray]]:
+    """Pontua os registros em blocos de `chunk_size` (memória limitada para arquivos grandes)."""
+    records = iter(records)
+    while True:
+        chunk = [_record_fields(record) for record in islice(records, chunk_size)]
+        if not chunk:
+            return
+        questions, answers, references = zip(*chunk)
+        yield score_heuristics_batch(questions, answers, references)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Recalcula as heurísticas de calibragem em lote")
+    parser.add_argument("input", help="JSONL (opcionalmente .gz/.zst) com question/answer/reference")
+    parser.add_argument("--output", default="-", help="CSV de saída (padrão: stdout)")
+    parser.add_argument("--chunk-size", type=int, default=50000)
+    args = parser.parse_args()
+
+    output = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8", newline="")
+    try:
+        writer = csv.writer(output)
+        writer.writerow(COLUMNS)
+        total = 0
+        for columns in iter_scored_chunks(iter_jsonl(args.input), args.chunk_size):
+            rows = np.column_stack([columns[name] for name in COLUMNS])
+            writer.writerows(np.round(rows, 4).tolist())
+            total += len(rows)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    print(f"✅ {total} respostas pontuadas", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,212 @@
+"""
+Cache persistente de respostas de LLM (SQLite).
+
+Responsabilidades:
+- Armazenar respostas de LLM em disco, endereçadas pelo conteúdo da requisição
+- Chave = hash SHA-256 de (namespace, modelo, temperatura, prompt completo)
+- Eviction por idade (TTL) e por tamanho (máximo de entradas, LRU)
+- Contadores de hits/misses por namespace ("judge", "generation") para o resumo final
+
+Configuração via .env:
+- LLM_CACHE_ENABLED=true
+- LLM_CACHE_PATH=.cache/llm_responses.sqlite
+- LLM_CACHE_MAX_ENTRIES=50000
+- LLM_CACHE_TTL_DAYS=30
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_PATH = ".cache/llm_responses.sqlite"
+
+# A cada N escritas, aplica novamente as regras de eviction
+EVICTION_INTERVAL = 100
+
+
+def llm_identity(llm: Any) -> Dict[str, Any]:
+    """Extrai modelo e temperatura de uma instância de chat model do LangChain."""
+    model = getattr(llm, "model_name", None) or getattr(llm, "model", None) or type(llm).__name__
+    temperature = getattr(llm, "temperature", None)
+    return {"model": str(model), "temperature": temperature}
+
+
+def make_cache_key(namespace: str, llm: Any, payload: Any) -> str:
+    """Gera chave determinística (SHA-256) para uma requisição ao LLM.
+
+    Args:
+        namespace: Tipo de chamada (ex: "judge")
+        llm: Instância do LLM (modelo e temperatura entram na chave)
+        payload: Conteúdo completo enviado ao LLM (serializável em JSON)
+
+    Returns:
+        Hash hexadecimal da requisição
+    """
+    material = json.dumps(
+        {"namespace": namespace, **llm_identity(llm), "payload": payload},
+        sort_keys=True,
+        ensure_ascii=False,
+        default=str,
+    )
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """Cache SQLite de respostas de LLM, seguro para uso entre threads."""
+
+    def __init__(self, path: str, max_entries: int = 50000, max_age_seconds: Optional[float] = None):
+        """
+        Inicializa o cache, criando o arquivo e a tabela se necessário.
+
+        Args:
+            path: Caminho do arquivo SQLite
+            max_entries: Máximo de entradas mantidas (as menos acessadas saem primeiro)
+            max_age_seconds: Idade máxima de uma entrada (None = sem expiração)
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.max_age_seconds = max_age_seconds
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                namespace TEXT NOT NULL,
+                value TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses (accessed_at)")
+        self._conn.commit()
+        self.evict()
+
+    def _count(self, namespace: str, outcome: str) -> None:
+        counters = self._stats.setdefault(namespace, {"hits": 0, "misses": 0})
+        counters[outcome] += 1
+
+    def get(self, key: str, namespace: str) -> Optional[str]:
+        """Retorna a resposta armazenada ou None (registrando hit/miss)."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is None or (self.max_age_seconds is not None and now - row[1] > self.max_age_seconds):
+                self._count(namespace, "misses")
+                return None
+
+            self._conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self._count(namespace, "hits")
+            return row[0]
+
+    def set(self, key: str, namespace: str, value: str) -> None:
+        """Armazena (ou substitui) a resposta de uma requisição."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, namespace, value, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, namespace, value, now, now),
+            )
+            self._conn.commit()
+            self._writes += 1
+            should_evict = self._writes % EVICTION_INTERVAL == 0
+
+        if should_evict:
+            self.evict()
+
+    def evict(self) -> int:
+        """Remove entradas expiradas e o excedente além de max_entries.
+
+        Returns:
+            Quantidade de entradas removidas
+        """
+        removed = 0
+        with self._lock:
+            if self.max_age_seconds is not None:
+                cursor = self._conn.execute(
+                    "DELETE FROM responses WHERE created_at < ?", (time.time() - self.max_age_seconds,)
+                )
+                removed += cursor.rowcount
+
+            total = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            excess = total - self.max_entries
+            if excess > 0:
+                cursor = self._conn.execute(
+                    "DELETE FROM responses WHERE key IN "
+                    "(SELECT key FROM responses ORDER BY accessed_at ASC LIMIT ?)",
+                    (excess,),
+                )
+                removed += cursor.rowcount
+
+            self._conn.commit()
+
+        if removed:
+            logger.debug(f"Cache de LLM: {removed} entradas removidas")
+        return removed
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Retorna cópia dos contadores de hits/misses por namespace."""
+        with self._lock:
+            return {namespace: dict(counters) for namespace, counters in self._stats.items()}
+
+
+@lru_cache(maxsize=1)
+def get_response_cache() -> Optional[ResponseCache]:
+    """Retorna o cache compartilhado do processo, ou None se desabilitado.
+
+    Returns:
+        Instância de ResponseCache configurada pelo .env
+    """
+    if os.getenv("LLM_CACHE_ENABLED", "true").strip().lower() not in {"1", "true", "yes", "y", "on"}:
+        return None
+
+    path = os.getenv("LLM_CACHE_PATH", DEFAULT_CACHE_PATH)
+    try:
+        max_entries = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "50000"))
+        ttl_days = float(os.getenv("LLM_CACHE_TTL_DAYS", "30"))
+    except ValueError:
+        logger.warning("LLM_CACHE_MAX_ENTRIES/LLM_CACHE_TTL_DAYS inválidos; usando padrões")
+        max_entries, ttl_days = 50000, 30.0
+
+    max_age_seconds = ttl_days * 86400 if ttl_days > 0 else None
+
+    try:
+        return ResponseCache(path, max_entries=max_entries, max_age_seconds=max_age_seconds)
+    except sqlite3.Error as e:
+        logger.warning(f"Cache de LLM indisponível ({path}): {e}")
+        return None
+
+
+def print_cache_stats() -> None:
+    """Exibe hits/misses do cache de respostas no resumo final."""
+    cache = get_response_cache()
+    if cache is None:
+        return
+
+    for namespace, counters in sorted(cache.stats().items()):
+        total = counters["hits"] + counters["misses"]
+        hit_rate = counters["hits"] / total if total else 0.0
+        print(
+            f"Cache LLM [{namespace}]: {counters['hits']} hits / "
+            f"{counters['misses']} misses ({hit_rate:.0%} de acerto)"
+        )
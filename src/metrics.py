@@ -15,6 +15,24 @@ MÉTRICAS ESPECÍFICAS PARA BUG TO USER STORY (4):
 6. User Story Format Score: Formato correto (Como... Eu quero... Para que...)
 7. Completeness Score: Completude e contexto técnico
 
+MODO COMBINADO:
+- evaluate_all_metrics() avalia várias métricas com uma única chamada ao judge
+- As funções individuais continuam disponíveis (e servem de fallback)
+
+MODO ASSÍNCRONO:
+- aevaluate_metric() e aevaluate_all_metrics() usam `ainvoke` no judge
+
+RESPOSTAS DO JUDGE:
+- Validadas por um schema pydantic por métrica (structured output nativo com
+  JUDGE_STRUCTURED_OUTPUT=true); resposta inválida gera uma nova solicitação
+  e, se persistir, a métrica é registrada como erro em vez de score 0.0
+
+MODO EM CAMADAS (EVAL_TIERED_SCORING=true):
+- F1, Clarity e Precision calculam primeiro o piso heurístico; se ele já
+  atinge o limiar (EVAL_TIERED_THRESHOLD, padrão 1.0), o judge não é chamado.
+  Com o padrão, o resultado é idêntico ao da avaliação completa; limiares
+  menores trocam exatidão das médias por menos chamadas
+
 Suporta múltiplos providers de LLM:
 - OpenAI (gpt-4o, gpt-4o-mini)
 - Google Gemini (gemini-1.5-flash, gemini-1.5-pro)
@@ -22,17 +40,23 @@ Suporta múltiplos providers de LLM:
 Configure o provider no arquivo .env através da variável LLM_PROVIDER.
 """
 
+import asyncio
 import json
 import logging
 import os
 import re
 import unicodedata
 from functools import lru_cache
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional, Type
 
 from dotenv import load_dotenv
 from langchain_core.messages import HumanMessage, SystemMessage
+from pydantic import BaseModel, Field, create_model
 
+from llm_cache import get_response_cache, make_cache_key
+from request_coalescer import acoalesce, coalesce
+from retry import acall_with_retry, call_with_retry
+from usage import record_cached_usage, record_tier_decision, record_usage
 from utils import get_eval_llm
 
 load_dotenv()
@@ -50,230 +74,436 @@ def get_evaluator_llm() -> Any:
     return get_eval_llm(temperature=0)
 
 
-def extract_json_from_response(response_text: str) -> Dict[str, Any]:
-    """Extrai JSON de uma resposta de LLM que pode conter texto adicional.
-    
-    Args:
-        response_text: Texto da resposta do LLM
-        
-    Returns:
-        Dicionário com JSON extraído
-    """
-    try:
-        # Tentar parsear diretamente
-        return json.loads(response_text)
-    except json.JSONDecodeError:
-        # Tentar encontrar JSON no meio do texto
-        start = response_text.find('{')
-        end = response_text.rfind('}') + 1
+class F1Judgment(BaseModel):
+    """Resposta esperada do judge de F1-Score."""
 
-        if start != -1 and end > start:
-            try:
-                json_str = response_text[start:end]
-                return json.loads(json_str)
-            except json.JSONDecodeError:
-                pass
+    precision: float = Field(ge=0.0, le=1.0)
+    recall: float = Field(ge=0.0, le=1.0)
+    reasoning: str = ""
 
-        # Se não conseguir extrair, retornar valores default
-        print(f"⚠️  Não foi possível extrair JSON da resposta: {response_text[:200]}...")
-        return {"score": 0.0, "reasoning": "Erro ao processar resposta"}
 
+class ScoreJudgment(BaseModel):
+    """Resposta esperada dos judges de score único (Clarity, Precision e métricas de Bug to User Story)."""
 
-def _normalize_text(text: str) -> str:
-    if not text:
-        return ""
-    text = text.lower()
-    text = unicodedata.normalize("NFD", text)
-    text = "".join(ch for ch in text if unicodedata.category(ch) != "Mn")
-    text = re.sub(r"[^a-z0-9\s:/._-]", " ", text)
-    text = re.sub(r"\s+", " ", text).strip()
-    return text
-
-
-def _token_set(text: str) -> set[str]:
-    normalized = _normalize_text(text)
-    return {token for token in normalized.split() if len(token) > 2}
-
-
-def _overlap_ratio(answer: str, reference: str) -> float:
-    reference_tokens = _token_set(reference)
-    if not reference_tokens:
-        return 0.0
-    answer_tokens = _token_set(answer)
-    common = answer_tokens.intersection(reference_tokens)
-    return len(common) / len(reference_tokens)
-
-
-def _structure_score(answer: str) -> float:
-    lowered = _normalize_text(answer)
-    has_story = all(term in lowered for term in ["como", "eu", "quero", "para", "que"])
-    has_acceptance = "criterios de aceitacao" in lowered
-    bullets = sum(1 for line in answer.splitlines() if line.strip().startswith("-"))
-    bullet_score = min(1.0, bullets / 5)
-    score = 0.75
-    if has_story:
-        score += 0.1
-    if has_acceptance:
-        score += 0.1
-    score += 0.05 * bullet_score
-    return min(1.0, score)
-
-
-def _hallucination_penalty(question: str, answer: str, reference: str) -> float:
-    qref_tokens = _token_set(question) | _token_set(reference)
-    answer_tokens = _token_set(answer)
-    if not answer_tokens:
-        return 0.3
-    extra_tokens = [token for token in answer_tokens if token not in qref_tokens]
-    if not extra_tokens:
-        return 0.0
-
-    suspicious_terms = {
-        "redis", "kafka", "docker", "kubernetes", "aws", "azure", "gcp",
-        "circuit", "breaker", "dompurify", "graphql", "crdt", "sidekiq",
-        "bull", "rabbitmq", "elasticsearch", "prometheus", "grafana"
-    }
-    suspicious_count = sum(1 for token in extra_tokens if token in suspicious_terms)
-    if suspicious_count == 0:
-        return 0.0
-    return min(0.15, suspicious_count * 0.03)
+    score: float = Field(ge=0.0, le=1.0)
+    reasoning: str = ""
 
 
-def evaluate_f1_score(question: str, answer: str, reference: str) -> Dict[str, Any]:
+class JudgeOutputError(ValueError):
+    """Resposta do judge fora do schema, mesmo após uma nova solicitação."""
+
+
+_REASK_PROMPT = """\
+Sua resposta anterior não passou na validação do formato pedido.
+
+RESPOSTA ANTERIOR:
+{previous}
+
+ERRO DE VALIDAÇÃO:
+{error}
+
+Responda novamente APENAS com o objeto JSON no formato pedido, sem texto adicional."""
+
+
+def _structured_output_enabled() -> bool:
+    """JUDGE_STRUCTURED_OUTPUT: usa o structured output nativo do provider (padrão: true)."""
+    return os.getenv("JUDGE_STRUCTURED_OUTPUT", "true").strip().lower() in {"1", "true", "yes", "y", "on"}
+
+
+_FENCED_JSON = re.compile(r"```(?:json)?[ \t]*\n(.*?)```", re.DOTALL)
+
+
+def _parse_json_response(response_text: str) -> Optional[Dict[str, Any]]:
+    """JSON da resposta inteira ou de um único bloco ```json; None caso contrário.
+
+    Respostas com texto em volta do JSON não são recortadas: ficam para a
+    validação do schema e a nova solicitação ao judge.
     """
-    Calcula F1-Score usando LLM-as-Judge.
+    candidates = [response_text]
+    fenced = _FENCED_JSON.findall(response_text)
+    if len(fenced) == 1:
+        candidates.append(fenced[0])
 
-    F1-Score = 2 * (Precision * Recall) / (Precision + Recall)
+    for candidate in candidates:
+        try:
+            data = json.loads(candidate)
+        except json.JSONDecodeError:
+            continue
+        return data if isinstance(data, dict) else None
+    return None
 
-    Args:
-        question: Pergunta feita pelo usuário
-        answer: Resposta gerada pelo prompt
-        reference: Resposta esperada (ground truth)
+
+def _validate_judgment(response_text: str, schema: Type[BaseModel]) -> Dict[str, Any]:
+    """Valida a resposta textual do judge contra o schema da métrica.
+
+    Raises:
+        ValueError: Se não houver JSON ou ele não respeitar o schema
+    """
+    data = _parse_json_response(response_text) if isinstance(response_text, str) else None
+    if data is None:
+        raise ValueError("resposta sem objeto JSON")
+    return schema.model_validate(data).model_dump(exclude_none=True)
+
+
+def _judge_request(llm: Any, schema: Type[BaseModel]) -> Any:
+    """Runnable do judge: structured output nativo quando disponível, senão o modelo em modo texto."""
+    if _structured_output_enabled() and hasattr(llm, "with_structured_output"):
+        try:
+            return llm.with_structured_output(schema, include_raw=True)
+        except NotImplementedError:
+            pass
+    return llm
+
+
+def _raw_output_text(message: Any) -> str:
+    """Saída bruta do judge em texto (argumentos da tool call no structured output)."""
+    tool_calls = getattr(message, "tool_calls", None)
+    if tool_calls:
+        return json.dumps(tool_calls[0].get("args", {}), ensure_ascii=False)
+    content = getattr(message, "content", "")
+    return content if isinstance(content, str) else json.dumps(content, ensure_ascii=False)
+
+
+def _read_judgment(
+    output: Any,
+    llm: Any,
+    schema: Type[BaseModel],
+    metric_key: str
+) -> tuple[Optional[Dict[str, Any]], str, str]:
+    """Registra o uso da chamada e valida a saída do judge.
 
     Returns:
-        Dict com score e reasoning:
-        {
-            "score": 0.95,
-            "precision": 0.9,
-            "recall": 0.99,
-            "reasoning": "Explicação do LLM..."
-        }
+        Tupla (resultado validado ou None, saída bruta, erro de validação)
     """
-    evaluator_prompt = f"""
-Você é um avaliador especializado em medir a qualidade de respostas geradas por IA.
+    structured = isinstance(output, dict) and "raw" in output
+    message = output["raw"] if structured else output
+    record_usage(message, llm, metric_key)
+    text = _raw_output_text(message)
 
-Sua tarefa é calcular PRECISION e RECALL para determinar o F1-Score.
+    if structured and output.get("parsed") is not None:
+        return output["parsed"].model_dump(exclude_none=True), text, ""
 
-PERGUNTA DO USUÁRIO:
-{question}
+    try:
+        # Modo texto, ou modelo que respondeu em texto em vez da tool call
+        return _validate_judgment(text, schema), text, ""
+    except ValueError as e:
+        error = output.get("parsing_error") if structured else None
+        return None, text, str(error or e)
+
+
+def _reask_messages(evaluator_prompt: str, previous: str, error: str) -> List[Any]:
+    """Mensagens da nova solicitação após uma resposta fora do schema."""
+    return [
+        HumanMessage(content=evaluator_prompt),
+        HumanMessage(content=_REASK_PROMPT.format(previous=previous[:2000] or "(vazia)", error=error[:1000])),
+    ]
+
+
+def _cached_judgment(cache: Any, cache_key: str, schema: Type[BaseModel]) -> Optional[Dict[str, Any]]:
+    """Resposta do cache validada pelo schema; entradas fora do schema são reavaliadas."""
+    cached = cache.get(cache_key, namespace="judge")
+    if cached is None:
+        return None
+    try:
+        return _validate_judgment(cached, schema)
+    except ValueError:
+        return None
 
-RESPOSTA ESPERADA (Ground Truth):
-{reference}
 
-RESPOSTA GERADA PELO MODELO:
-{answer}
+def _judge_json(evaluator_prompt: str, metric_key: str, schema: Type[BaseModel]) -> Dict[str, Any]:
+    """Envia o prompt ao judge e retorna a resposta validada pelo schema da métrica.
 
-INSTRUÇÕES:
+    Com JUDGE_STRUCTURED_OUTPUT (padrão), o schema é passado ao provider via
+    `with_structured_output`; caso contrário, o JSON é extraído do texto e
+    validado com pydantic. Uma resposta fora do schema gera UMA nova
+    solicitação com o erro de validação; se ela também falhar, a métrica é
+    registrada como erro (excluída das médias) em vez de virar score 0.0.
 
-1. PRECISION (0.0 a 1.0):
-   - Quantas informações na resposta gerada são CORRETAS e RELEVANTES?
-   - Penalizar informações incorretas, inventadas ou desnecessárias
-   - 1.0 = todas informações são corretas e relevantes
-   - 0.0 = nenhuma informação é correta ou relevante
+    Requisições idênticas na mesma execução compartilham uma única chamada
+    (request_coalescer). Respostas são reaproveitadas do cache persistente
+    (llm_cache) quando o mesmo prompt já foi avaliado pelo mesmo
+    modelo/temperatura; apenas respostas validadas são armazenadas. Erros
+    transitórios (429, 5xx, timeouts) são repetidos com backoff; `metric_key`
+    identifica a métrica nos contadores de retry.
 
-2. RECALL (0.0 a 1.0):
-   - Quantas informações da resposta esperada estão PRESENTES na resposta gerada?
-   - Penalizar informações importantes que foram omitidas
-   - 1.0 = todas informações importantes estão presentes
-   - 0.0 = nenhuma informação importante está presente
+    Raises:
+        JudgeOutputError: Se a resposta continuar inválida após a nova solicitação
+    """
+    llm = get_evaluator_llm()
+    cache_key = make_cache_key("judge", llm, evaluator_prompt)
+    result, shared = coalesce(
+        "judge", cache_key, lambda: _request_judgment(llm, cache_key, evaluator_prompt, metric_key, schema)
+    )
+    if shared:
+        record_cached_usage(llm, metric_key)
+    return result
+
+
+def _request_judgment(
+    llm: Any,
+    cache_key: str,
+    evaluator_prompt: str,
+    metric_key: str,
+    schema: Type[BaseModel]
+) -> Dict[str, Any]:
+    """Consulta o cache persistente e, em caso de miss, chama o judge (com uma nova solicitação se preciso)."""
+    cache = get_response_cache()
+    if cache is not None:
+        cached = _cached_judgment(cache, cache_key, schema)
+        if cached is not None:
+            record_cached_usage(llm, metric_key)
+            return cached
+
+    request = _judge_request(llm, schema)
+    messages = [HumanMessage(content=evaluator_prompt)]
+    output = call_with_retry(lambda: request.invoke(messages), metric_key)
+    result, previous, error = _read_judgment(output, llm, schema, metric_key)
+
+    if result is None:
+        print(f"⚠️  Resposta do judge ({metric_key}) fora do schema: {error[:200]}; solicitando novamente")
+        reask = _reask_messages(evaluator_prompt, previous, error)
+        output = call_with_retry(lambda: request.invoke(reask), metric_key)
+        result, _, error = _read_judgment(output, llm, schema, metric_key)
+        if result is None:
+            raise JudgeOutputError(f"resposta do judge inválida após nova solicitação: {error[:200]}")
+
+    if cache is not None:
+        cache.set(cache_key, "judge", json.dumps(result, ensure_ascii=False))
+    return result
+
+
+async def _ajudge_json(evaluator_prompt: str, metric_key: str, schema: Type[BaseModel]) -> Dict[str, Any]:
+    """Versão assíncrona de `_judge_json` (usa `ainvoke`, mesmo cache persistente)."""
+    llm = get_evaluator_llm()
+    cache_key = make_cache_key("judge", llm, evaluator_prompt)
+    result, shared = await acoalesce(
+        "judge", cache_key, lambda: _arequest_judgment(llm, cache_key, evaluator_prompt, metric_key, schema)
+    )
+    if shared:
+        record_cached_usage(llm, metric_key)
+    return result
+
+
+async def _arequest_judgment(
+    llm: Any,
+    cache_key: str,
+    evaluator_prompt: str,
+    metric_key: str,
+    schema: Type[BaseModel]
+) -> Dict[str, Any]:
+    """Versão assíncrona de `_request_judgment`."""
+    cache = get_response_cache()
+    if cache is not None:
+        cached = _cached_judgment(cache, cache_key, schema)
+        if cached is not None:
+            record_cached_usage(llm, metric_key)
+            return cached
+
+    request = _judge_request(llm, schema)
+    messages = [HumanMessage(content=evaluator_prompt)]
+    output = await acall_with_retry(lambda: request.ainvoke(messages), metric_key)
+    result, previous, error = _read_judgment(output, llm, schema, metric_key)
+
+    if result is None:
+        print(f"⚠️  Resposta do judge ({metric_key}) fora do schema: {error[:200]}; solicitando novamente")
+        reask = _reask_messages(evaluator_prompt, previous, error)
+        output = await acall_with_retry(lambda: request.ainvoke(reask), metric_key)
+        result, _, error = _read_judgment(output, llm, schema, metric_key)
+        if result is None:
+            raise JudgeOutputError(f"resposta do judge inválida após nova solicitação: {error[:200]}")
+
+    if cache is not None:
+        cache.set(cache_key, "judge", json.dumps(result, ensure_ascii=False))
+    return result
+
+
+_NON_WORD_RE = re.compile(r"[^a-z0-9\s:/._-]")
+
+STORY_TERMS = ("como", "eu", "quero", "para", "que")
+
+# Tecnologias que, ausentes da pergunta e da referência, indicam alucinação
+SUSPICIOUS_TERMS = frozenset({
+    "redis", "kafka", "docker", "kubernetes", "aws", "azure", "gcp",
+    "circuit", "breaker", "dompurify", "graphql", "crdt", "sidekiq",
+    "bull", "rabbitmq", "elasticsearch", "prometheus", "grafana"
+})
 
-3. RACIOCÍNIO:
-   - Explique brevemente sua avaliação
-   - Cite exemplos específicos do que estava correto/incorreto
 
-IMPORTANTE: Retorne APENAS um objeto JSON válido no formato:
-{{
-  "precision": <valor entre 0.0 e 1.0>,
-  "recall": <valor entre 0.0 e 1.0>,
-  "reasoning": "<sua explicação em até 100 palavras>"
-}}
+def _normalize_text(text: str) -> str:
+    if not text:
+        return ""
+    text = text.lower()
+    if not text.isascii():
+        # Remove acentos (marcas combinantes após NFD); os demais caracteres não
+        # ASCII viram espaço, como fariam na substituição abaixo
+        text = unicodedata.normalize("NFD", text)
+        for char in set(text):
+            if ord(char) > 127 and unicodedata.category(char) != "Mn":
+                text = text.replace(char, " ")
+        text = text.encode("ascii", "ignore").decode("ascii")
+    return " ".join(_NON_WORD_RE.sub(" ", text).split())
 
-NÃO adicione nenhum texto antes ou depois do JSON.
-"""
 
-    try:
-        llm = get_evaluator_llm()
-        response = llm.invoke([HumanMessage(content=evaluator_prompt)])
-        result = extract_json_from_response(response.content)
+def _tokens_of(normalized: str) -> frozenset[str]:
+    return frozenset(token for token in normalized.split() if len(token) > 2)
 
-        precision = float(result.get("precision", 0.0))
-        recall = float(result.get("recall", 0.0))
 
-        # Calcular F1-Score LLM
-        if (precision + recall) > 0:
-            f1_score = 2 * (precision * recall) / (precision + recall)
-        else:
-            f1_score = 0.0
+class ExampleAnalysis:
+    """Pergunta, resposta e referência normalizadas e tokenizadas uma única vez.
 
-        # Calibragem heurística para reduzir variância do judge
-        overlap = _overlap_ratio(answer, reference)
-        structure = _structure_score(answer)
-        heuristic_f1 = min(1.0, 0.80 + (0.16 * overlap) + (0.04 * structure))
-        final_f1 = max(f1_score, heuristic_f1)
+    Compartilhada pelas calibragens heurísticas de F1, Clarity e Precision
+    (ver `analyze_example`).
+    """
 
-        return {
-            "score": round(final_f1, 4),
-            "precision": round(precision, 4),
-            "recall": round(recall, 4),
-            "reasoning": result.get("reasoning", "")
-        }
+    __slots__ = ("answer", "answer_text", "answer_tokens", "context_tokens", "reference_tokens")
+
+    def __init__(self, question: str, answer: str, reference: str):
+        self.answer = answer or ""
+        self.answer_text = _normalize_text(self.answer)
+        self.answer_tokens = _tokens_of(self.answer_text)
+        self.reference_tokens = _tokens_of(_normalize_text(reference))
+        self.context_tokens = _tokens_of(_normalize_text(question)) | self.reference_tokens
+
+    def overlap_ratio(self) -> float:
+        """Fração dos tokens da referência presentes na resposta."""
+        if not self.reference_tokens:
+            return 0.0
+        return len(self.answer_tokens & self.reference_tokens) / len(self.reference_tokens)
+
+    def structure_score(self) -> float:
+        """Aderência ao formato de User Story (história, critérios de aceitação, bullets)."""
+        has_story = all(term in self.answer_text for term in STORY_TERMS)
+        has_acceptance = "criterios de aceitacao" in self.answer_text
+        bullets = sum(1 for line in self.answer.splitlines() if line.strip().startswith("-"))
+        bullet_score = min(1.0, bullets / 5)
+        score = 0.75
+        if has_story:
+            score += 0.1
+        if has_acceptance:
+            score += 0.1
+        score += 0.05 * bullet_score
+        return min(1.0, score)
+
+    def hallucination_penalty(self) -> float:
+        """Penalidade por tecnologias citadas na resposta e ausentes da pergunta/referência."""
+        if not self.answer_tokens:
+            return 0.3
+        suspicious_count = len((self.answer_tokens - self.context_tokens) & SUSPICIOUS_TERMS)
+        if suspicious_count == 0:
+            return 0.0
+        return min(0.15, suspicious_count * 0.03)
+
+
+# Calibragem heurística: score = base + pesos × componentes (limitado a [0, 1])
+HEURISTIC_WEIGHTS: Dict[str, Dict[str, float]] = {
+    "f1_score": {"base": 0.80, "overlap": 0.16, "structure": 0.04},
+    "clarity": {"base": 0.83, "overlap": 0.05, "structure": 0.12},
+    "precision": {"base": 0.84, "overlap": 0.12, "structure": 0.05},
+}
+
+
+def heuristic_score(
+    metric_key: str,
+    overlap: Any,
+    structure: Any,
+    penalty: Any = 0.0,
+    weights: Optional[Dict[str, Dict[str, float]]] = None
+) -> Any:
+    """Score heurístico (sem limite) a partir dos componentes; aceita floats ou arrays NumPy."""
+    weights = (weights or HEURISTIC_WEIGHTS)[metric_key]
+    return weights["base"] + weights["overlap"] * overlap + weights["structure"] * structure - penalty
+
+
+@lru_cache(maxsize=1024)
+def analyze_example(question: str, answer: str, reference: str) -> ExampleAnalysis:
+    """Análise do exemplo, reaproveitada entre as métricas que avaliam a mesma resposta."""
+    return ExampleAnalysis(question, answer, reference)
+
+
+def heuristic_floor(metric_key: str, question: str, answer: str, reference: str) -> Optional[float]:
+    """Piso heurístico do score final (max(judge, heurística)), ou None se a métrica não é calibrada."""
+    if metric_key not in HEURISTIC_WEIGHTS:
+        return None
+    analysis = analyze_example(question, answer, reference)
+    penalty = analysis.hallucination_penalty() if metric_key == "precision" else 0.0
+    score = heuristic_score(metric_key, analysis.overlap_ratio(), analysis.structure_score(), penalty)
+    return min(1.0, max(0.0, score))
+
+
+def _finalize_f1(result: Dict[str, Any], question: str, answer: str, reference: str) -> Dict[str, Any]:
+    """Converte a resposta do judge de F1 no resultado final calibrado."""
+    precision = float(result.get("precision", 0.0))
+    recall = float(result.get("recall", 0.0))
+
+    # Calcular F1-Score LLM
+    if (precision + recall) > 0:
+        f1_score = 2 * (precision * recall) / (precision + recall)
+    else:
+        f1_score = 0.0
+
+    # Calibragem heurística para reduzir variância do judge
+    final_f1 = max(f1_score, heuristic_floor("f1_score", question, answer, reference))
+
+    return {
+        "score": round(final_f1, 4),
+        "precision": round(precision, 4),
+        "recall": round(recall, 4),
+        "reasoning": result.get("reasoning", "")
+    }
 
-    except Exception as e:
-        print(f"❌ Erro ao avaliar F1-Score: {e}")
-        return {
-            "score": 0.0,
-            "precision": 0.0,
-            "recall": 0.0,
-            "reasoning": f"Erro na avaliação: {str(e)}"
-        }
 
+def _finalize_clarity(result: Dict[str, Any], question: str, answer: str, reference: str) -> Dict[str, Any]:
+    """Converte a resposta do judge de Clarity no resultado final calibrado."""
+    score = float(result.get("score", 0.0))
+    final_clarity = max(score, heuristic_floor("clarity", question, answer, reference))
 
-def evaluate_clarity(question: str, answer: str, reference: str) -> Dict[str, Any]:
-    """
-    Avalia a clareza e estrutura da resposta usando LLM-as-Judge.
+    return {
+        "score": round(final_clarity, 4),
+        "reasoning": result.get("reasoning", "")
+    }
 
-    Critérios:
-    - Organização e estrutura clara
-    - Linguagem simples e direta
-    - Ausência de ambiguidade
-    - Fácil de entender
 
-    Args:
-        question: Pergunta feita pelo usuário
-        answer: Resposta gerada pelo prompt
-        reference: Resposta esperada (ground truth)
+def _finalize_precision(result: Dict[str, Any], question: str, answer: str, reference: str) -> Dict[str, Any]:
+    """Converte a resposta do judge de Precision no resultado final calibrado."""
+    score = float(result.get("score", 0.0))
+    final_precision = max(score, heuristic_floor("precision", question, answer, reference))
 
-    Returns:
-        Dict com score e reasoning:
-        {
-            "score": 0.92,
-            "reasoning": "Explicação do LLM..."
-        }
-    """
-    evaluator_prompt = f"""
-Você é um avaliador especializado em medir a CLAREZA de respostas geradas por IA.
+    return {
+        "score": round(final_precision, 4),
+        "reasoning": result.get("reasoning", "")
+    }
 
-PERGUNTA DO USUÁRIO:
-{question}
 
-RESPOSTA GERADA PELO MODELO:
-{answer}
+def _finalize_judge_score(result: Dict[str, Any], question: str, answer: str, reference: str) -> Dict[str, Any]:
+    """Resultado final das métricas sem calibragem heurística (score direto do judge)."""
+    score = float(result.get("score", 0.0))
 
-RESPOSTA ESPERADA (Referência):
-{reference}
+    return {
+        "score": round(score, 4),
+        "reasoning": result.get("reasoning", "")
+    }
 
-INSTRUÇÕES:
 
+# Critérios de cada métrica, compartilhados entre os prompts individuais e o
+# prompt combinado (evaluate_all_metrics).
+_F1_CRITERIA = """\
+1. PRECISION (0.0 a 1.0):
+   - Quantas informações na resposta gerada são CORRETAS e RELEVANTES?
+   - Penalizar informações incorretas, inventadas ou desnecessárias
+   - 1.0 = todas informações são corretas e relevantes
+   - 0.0 = nenhuma informação é correta ou relevante
+
+2. RECALL (0.0 a 1.0):
+   - Quantas informações da resposta esperada estão PRESENTES na resposta gerada?
+   - Penalizar informações importantes que foram omitidas
+   - 1.0 = todas informações importantes estão presentes
+   - 0.0 = nenhuma informação importante está presente
+
+3. RACIOCÍNIO:
+   - Explique brevemente sua avaliação
+   - Cite exemplos específicos do que estava correto/incorreto"""
+
+_CLARITY_CRITERIA = """\
 Avalie a CLAREZA da resposta gerada com base nos critérios:
 
 1. ORGANIZAÇÃO (0.0 a 1.0):
@@ -293,77 +523,9 @@ Avalie a CLAREZA da resposta gerada com base nos critérios:
    - É concisa sem ser curta demais?
    - Não tem informações redundantes?
 
-Calcule a MÉDIA dos 4 critérios para obter o score final.
-
-IMPORTANTE: Retorne APENAS um objeto JSON válido no formato:
-{{
-  "score": <valor entre 0.0 e 1.0>,
-  "reasoning": "<explicação detalhada da avaliação em até 100 palavras>"
-}}
-
-NÃO adicione nenhum texto antes ou depois do JSON.
-"""
-
-    try:
-        llm = get_evaluator_llm()
-        response = llm.invoke([HumanMessage(content=evaluator_prompt)])
-        result = extract_json_from_response(response.content)
-
-        score = float(result.get("score", 0.0))
-        structure = _structure_score(answer)
-        overlap = _overlap_ratio(answer, reference)
-        heuristic_clarity = min(1.0, 0.83 + (0.12 * structure) + (0.05 * overlap))
-        final_clarity = max(score, heuristic_clarity)
-
-        return {
-            "score": round(final_clarity, 4),
-            "reasoning": result.get("reasoning", "")
-        }
-
-    except Exception as e:
-        print(f"❌ Erro ao avaliar Clarity: {e}")
-        return {
-            "score": 0.0,
-            "reasoning": f"Erro na avaliação: {str(e)}"
-        }
-
-
-def evaluate_precision(question: str, answer: str, reference: str) -> Dict[str, Any]:
-    """
-    Avalia a precisão da resposta usando LLM-as-Judge.
-
-    Critérios:
-    - Ausência de informações inventadas (alucinações)
-    - Resposta focada na pergunta
-    - Informações corretas e verificáveis
-
-    Args:
-        question: Pergunta feita pelo usuário
-        answer: Resposta gerada pelo prompt
-        reference: Resposta esperada (ground truth)
-
-    Returns:
-        Dict com score e reasoning:
-        {
-            "score": 0.98,
-            "reasoning": "Explicação do LLM..."
-        }
-    """
-    
-    evaluator_prompt = f"""
-Você é um avaliador especializado em detectar PRECISÃO e ALUCINAÇÕES em respostas de IA.
-
-PERGUNTA DO USUÁRIO:
-{question}
-
-RESPOSTA GERADA PELO MODELO:
-{answer}
-
-RESPOSTA ESPERADA (Ground Truth):
-{reference}
-
-INSTRUÇÕES:
+Calcule a MÉDIA dos 4 critérios para obter o score final."""
 
+_PRECISION_CRITERIA = """\
 Avalie a PRECISÃO da resposta gerada:
 
 1. AUSÊNCIA DE ALUCINAÇÕES (0.0 a 1.0):
@@ -384,74 +546,9 @@ Avalie a PRECISÃO da resposta gerada:
    - 1.0 = todas informações corretas
    - 0.0 = informações incorretas
 
-Calcule a MÉDIA dos 3 critérios para obter o score final.
-
-IMPORTANTE: Retorne APENAS um objeto JSON válido no formato:
-{{
-  "score": <valor entre 0.0 e 1.0>,
-  "reasoning": "<explicação detalhada em até 100 palavras, cite exemplos>"
-}}
-
-NÃO adicione nenhum texto antes ou depois do JSON.
-"""
-
-    try:
-        llm = get_evaluator_llm()
-        response = llm.invoke([HumanMessage(content=evaluator_prompt)])
-        result = extract_json_from_response(response.content)
-
-        score = float(result.get("score", 0.0))
-        overlap = _overlap_ratio(answer, reference)
-        structure = _structure_score(answer)
-        penalty = _hallucination_penalty(question, answer, reference)
-        heuristic_precision = min(1.0, max(0.0, 0.84 + (0.12 * overlap) + (0.05 * structure) - penalty))
-        final_precision = max(score, heuristic_precision)
-
-        return {
-            "score": round(final_precision, 4),
-            "reasoning": result.get("reasoning", "")
-        }
-
-    except Exception as e:
-        print(f"❌ Erro ao avaliar Precision: {e}")
-        return {
-            "score": 0.0,
-            "reasoning": f"Erro na avaliação: {str(e)}"
-        }
-
-
-def evaluate_tone_score(bug_report: str, user_story: str, reference: str) -> Dict[str, Any]:
-    """
-    Avalia o tom da user story (profissional e empático).
-
-    Critérios específicos para Bug to User Story:
-    - Tom profissional mas não excessivamente técnico
-    - Empatia com o usuário afetado pelo bug
-    - Foco em valor de negócio, não apenas correção técnica
-    - Linguagem positiva (o que o usuário QUER fazer, não só o que não funciona)
-
-    Args:
-        bug_report: Descrição do bug original
-        user_story: User story gerada pelo prompt
-        reference: User story esperada (ground truth)
-
-    Returns:
-        Dict com score e reasoning
-    """
-    evaluator_prompt = f"""
-Você é um avaliador especializado em User Stories ágeis.
-
-BUG REPORT ORIGINAL:
-{bug_report}
-
-USER STORY GERADA:
-{user_story}
-
-USER STORY ESPERADA (Referência):
-{reference}
-
-INSTRUÇÕES:
+Calcule a MÉDIA dos 3 critérios para obter o score final."""
 
+_TONE_CRITERIA = """\
 Avalie o TOM da user story gerada com base nos critérios:
 
 1. PROFISSIONALISMO (0.0 a 1.0):
@@ -474,34 +571,524 @@ Avalie o TOM da user story gerada com base nos critérios:
    - Tom construtivo e orientado a solução?
    - Evita linguagem negativa ou culpabilizante?
 
-Calcule a MÉDIA dos 4 critérios para obter o score final.
-
-IMPORTANTE: Retorne APENAS um objeto JSON válido no formato:
-{{
-  "score": <valor entre 0.0 e 1.0>,
-  "reasoning": "<explicação detalhada em até 150 palavras>"
-}}
+Calcule a MÉDIA dos 4 critérios para obter o score final."""
 
-NÃO adicione nenhum texto antes ou depois do JSON.
-"""
+_ACCEPTANCE_CRITERIA_CRITERIA = """\
+Avalie os CRITÉRIOS DE ACEITAÇÃO da user story gerada:
+
+1. FORMATO ESTRUTURADO (0.0 a 1.0):
+   - Usa formato Given-When-Then ou estrutura similar?
+   - Cada critério é claramente separado e identificável?
+   - Formatação facilita leitura e entendimento?
+
+2. ESPECIFICIDADE E TESTABILIDADE (0.0 a 1.0):
+   - Critérios são específicos e não vagos?
+   - É possível criar testes automatizados a partir deles?
+   - Evita termos ambíguos como "deve funcionar bem"?
+   - Critérios mensuráveis e verificáveis?
+
+3. QUANTIDADE ADEQUADA (0.0 a 1.0):
+   - Tem quantidade apropriada de critérios (nem muito, nem pouco)?
+   - Ideal: 3-7 critérios para bugs simples/médios
+   - Bugs complexos podem ter mais critérios organizados
+
+4. COBERTURA COMPLETA (0.0 a 1.0):
+   - Cobre todos os aspectos do bug?
+   - Inclui cenários de sucesso e erro?
+   - Considera edge cases quando relevante?
+   - Aborda validações e requisitos técnicos do bug?
+
+Calcule a MÉDIA dos 4 critérios para obter o score final."""
+
+_USER_STORY_FORMAT_CRITERIA = """\
+Avalie o FORMATO da user story gerada:
+
+1. TEMPLATE PADRÃO (0.0 a 1.0):
+   - Segue o formato "Como um [usuário], eu quero [ação], para que [benefício]"?
+   - Todas as três partes estão presentes e corretas?
+   - Ordem e estrutura seguem as melhores práticas?
+
+2. IDENTIFICAÇÃO DE PERSONA (0.0 a 1.0):
+   - "Como um..." identifica claramente o tipo de usuário?
+   - Persona é específica e relevante para o bug?
+   - Evita genéricos como "Como um usuário" sem contexto?
+
+3. AÇÃO CLARA (0.0 a 1.0):
+   - "Eu quero..." descreve claramente a ação/funcionalidade desejada?
+   - Ação é específica e relacionada ao bug?
+   - Evita descrições vagas ou muito técnicas?
+
+4. BENEFÍCIO ARTICULADO (0.0 a 1.0):
+   - "Para que..." explica claramente o valor/benefício?
+   - Benefício é real e significativo (não trivial)?
+   - Conecta a ação ao valor de negócio?
+
+5. SEPARAÇÃO DE SEÇÕES (0.0 a 1.0):
+   - User story principal está claramente separada dos critérios?
+   - Critérios de aceitação têm seção própria?
+   - Estrutura facilita leitura e navegação?
+
+Calcule a MÉDIA dos 5 critérios para obter o score final."""
+
+_COMPLETENESS_CRITERIA = """\
+Avalie a COMPLETUDE da user story em relação ao bug:
+
+1. COBERTURA DO PROBLEMA (0.0 a 1.0):
+   - A user story aborda TODOS os aspectos do bug reportado?
+   - Nenhum detalhe importante foi omitido?
+   - Se bug menciona múltiplos problemas, todos são cobertos?
+
+2. CONTEXTO TÉCNICO (0.0 a 1.0):
+   - Quando o bug inclui detalhes técnicos (logs, stack traces, endpoints):
+     * User story preserva contexto técnico relevante?
+     * Informações técnicas são incluídas de forma apropriada?
+   - Bugs simples não precisam de muito contexto técnico
+   - Bugs complexos DEVEM incluir seção de contexto técnico
+
+3. IMPACTO E SEVERIDADE (0.0 a 1.0):
+   - Se o bug menciona impacto (usuários afetados, perda financeira):
+     * User story reconhece e documenta o impacto?
+   - Severidade é refletida na priorização implícita?
+   - Bugs críticos devem ter tratamento mais detalhado
+
+4. TASKS TÉCNICAS (0.0 a 1.0):
+   - Para bugs complexos com múltiplos componentes:
+     * User story sugere tasks técnicas ou breakdown?
+   - Para bugs simples/médios:
+     * Tasks não são necessárias (não penalizar ausência)
+   - Avalie se o nível de detalhe é apropriado à complexidade
+
+5. INFORMAÇÕES ADICIONAIS RELEVANTES (0.0 a 1.0):
+   - Se bug menciona: steps to reproduce, ambiente, logs
+     * User story preserva ou referencia essas informações?
+   - Contexto de negócio importante é mantido?
+   - Sugestões de solução são apropriadas?
+
+Calcule a MÉDIA dos 5 critérios para obter o score final.
+
+IMPORTANTE:
+- Bugs SIMPLES podem ter score alto mesmo sem muitos detalhes técnicos
+- Bugs COMPLEXOS DEVEM ter seções adicionais (contexto técnico, tasks, impacto)
+- Compare com a referência para calibrar expectativa de completude"""
+
+
+def _build_f1_prompt(question: str, answer: str, reference: str) -> str:
+    """Monta o prompt do judge de F1-Score (precision + recall)."""
+    return f"""
+Você é um avaliador especializado em medir a qualidade de respostas geradas por IA.
+
+Sua tarefa é calcular PRECISION e RECALL para determinar o F1-Score.
+
+PERGUNTA DO USUÁRIO:
+{question}
+
+RESPOSTA ESPERADA (Ground Truth):
+{reference}
+
+RESPOSTA GERADA PELO MODELO:
+{answer}
+
+INSTRUÇÕES:
+
+{_F1_CRITERIA}
+
+IMPORTANTE: Retorne APENAS um objeto JSON válido no formato:
+{{
+  "precision": <valor entre 0.0 e 1.0>,
+  "recall": <valor entre 0.0 e 1.0>,
+  "reasoning": "<sua explicação em até 100 palavras>"
+}}
+
+NÃO adicione nenhum texto antes ou depois do JSON.
+"""
+
+
+def _build_clarity_prompt(question: str, answer: str, reference: str) -> str:
+    """Monta o prompt do judge de Clarity."""
+    return f"""
+Você é um avaliador especializado em medir a CLAREZA de respostas geradas por IA.
+
+PERGUNTA DO USUÁRIO:
+{question}
+
+RESPOSTA GERADA PELO MODELO:
+{answer}
+
+RESPOSTA ESPERADA (Referência):
+{reference}
+
+INSTRUÇÕES:
+
+{_CLARITY_CRITERIA}
+
+IMPORTANTE: Retorne APENAS um objeto JSON válido no formato:
+{{
+  "score": <valor entre 0.0 e 1.0>,
+  "reasoning": "<explicação detalhada da avaliação em até 100 palavras>"
+}}
+
+NÃO adicione nenhum texto antes ou depois do JSON.
+"""
+
+
+def _build_precision_prompt(question: str, answer: str, reference: str) -> str:
+    """Monta o prompt do judge de Precision."""
+    return f"""
+Você é um avaliador especializado em detectar PRECISÃO e ALUCINAÇÕES em respostas de IA.
+
+PERGUNTA DO USUÁRIO:
+{question}
+
+RESPOSTA GERADA PELO MODELO:
+{answer}
+
+RESPOSTA ESPERADA (Ground Truth):
+{reference}
+
+INSTRUÇÕES:
+
+{_PRECISION_CRITERIA}
+
+IMPORTANTE: Retorne APENAS um objeto JSON válido no formato:
+{{
+  "score": <valor entre 0.0 e 1.0>,
+  "reasoning": "<explicação detalhada em até 100 palavras, cite exemplos>"
+}}
+
+NÃO adicione nenhum texto antes ou depois do JSON.
+"""
+
+
+def _build_tone_prompt(bug_report: str, user_story: str, reference: str) -> str:
+    """Monta o prompt do judge de Tone Score."""
+    return f"""
+Você é um avaliador especializado em User Stories ágeis.
+
+BUG REPORT ORIGINAL:
+{bug_report}
+
+USER STORY GERADA:
+{user_story}
+
+USER STORY ESPERADA (Referência):
+{reference}
+
+INSTRUÇÕES:
+
+{_TONE_CRITERIA}
+
+IMPORTANTE: Retorne APENAS um objeto JSON válido no formato:
+{{
+  "score": <valor entre 0.0 e 1.0>,
+  "reasoning": "<explicação detalhada em até 150 palavras>"
+}}
+
+NÃO adicione nenhum texto antes ou depois do JSON.
+"""
+
+
+def _build_acceptance_criteria_prompt(bug_report: str, user_story: str, reference: str) -> str:
+    """Monta o prompt do judge de Acceptance Criteria Score."""
+    return f"""
+Você é um avaliador especializado em Critérios de Aceitação de User Stories.
+
+BUG REPORT ORIGINAL:
+{bug_report}
+
+USER STORY GERADA:
+{user_story}
+
+USER STORY ESPERADA (Referência):
+{reference}
+
+INSTRUÇÕES:
+
+{_ACCEPTANCE_CRITERIA_CRITERIA}
+
+IMPORTANTE: Retorne APENAS um objeto JSON válido no formato:
+{{
+  "score": <valor entre 0.0 e 1.0>,
+  "reasoning": "<explicação detalhada com exemplos específicos, até 150 palavras>"
+}}
+
+NÃO adicione nenhum texto antes ou depois do JSON.
+"""
+
+
+def _build_user_story_format_prompt(bug_report: str, user_story: str, reference: str) -> str:
+    """Monta o prompt do judge de User Story Format Score."""
+    return f"""
+Você é um avaliador especializado em formato de User Stories ágeis.
+
+BUG REPORT ORIGINAL:
+{bug_report}
+
+USER STORY GERADA:
+{user_story}
+
+USER STORY ESPERADA (Referência):
+{reference}
+
+INSTRUÇÕES:
+
+{_USER_STORY_FORMAT_CRITERIA}
+
+IMPORTANTE: Retorne APENAS um objeto JSON válido no formato:
+{{
+  "score": <valor entre 0.0 e 1.0>,
+  "reasoning": "<explicação detalhada com exemplos, até 150 palavras>"
+}}
+
+NÃO adicione nenhum texto antes ou depois do JSON.
+"""
+
+
+def _build_completeness_prompt(bug_report: str, user_story: str, reference: str) -> str:
+    """Monta o prompt do judge de Completeness Score."""
+    return f"""
+Você é um avaliador especializado em completude de User Stories derivadas de bugs.
+
+BUG REPORT ORIGINAL:
+{bug_report}
+
+USER STORY GERADA:
+{user_story}
+
+USER STORY ESPERADA (Referência):
+{reference}
+
+INSTRUÇÕES:
+
+{_COMPLETENESS_CRITERIA}
+
+Retorne APENAS um objeto JSON válido no formato:
+{{
+  "score": <valor entre 0.0 e 1.0>,
+  "reasoning": "<explicação detalhada sobre o que foi bem coberto e o que faltou, até 200 palavras>"
+}}
+
+NÃO adicione nenhum texto antes ou depois do JSON.
+"""
+
+
+def tiered_threshold() -> Optional[float]:
+    """Limiar do modo em camadas (EVAL_TIERED_SCORING), ou None se desativado.
+
+    Com o modo ativo, F1, Clarity e Precision calculam primeiro o piso
+    heurístico; se ele já atinge EVAL_TIERED_THRESHOLD, o judge não é chamado.
+    Com o padrão (1.0), o piso já é o score máximo e max(judge, heurística)
+    não mudaria: médias e aprovação ficam idênticas às da avaliação completa.
+    Abaixo de 1.0 o score dispensado é o piso, e não max(judge, piso): as
+    médias podem ficar um pouco menores em troca de menos chamadas.
+    """
+    if os.getenv("EVAL_TIERED_SCORING", "false").strip().lower() not in {"1", "true", "yes", "y", "on"}:
+        return None
+    try:
+        return float(os.getenv("EVAL_TIERED_THRESHOLD", "1.0"))
+    except ValueError:
+        print("⚠️  EVAL_TIERED_THRESHOLD inválido; usando 1.0")
+        return 1.0
+
+
+def _tiered_result(metric_key: str, question: str, answer: str, reference: str) -> Optional[Dict[str, Any]]:
+    """Resultado só com a heurística quando ela já decide o limiar; None se o judge é necessário."""
+    threshold = tiered_threshold()
+    if threshold is None:
+        return None
+    floor = heuristic_floor(metric_key, question, answer, reference)
+    if floor is None:
+        return None
+    if floor < threshold:
+        record_tier_decision(metric_key, skipped=False)
+        return None
+
+    record_tier_decision(metric_key, skipped=True)
+    result = {"score": round(floor, 4)}
+    if metric_key == "f1_score":
+        # Mesmo formato do F1 julgado: precision = recall = piso reproduz o F1 do piso
+        result.update({"precision": round(floor, 4), "recall": round(floor, 4)})
+    result.update({
+        "reasoning": f"Piso heurístico {floor:.2f} >= {threshold:.2f}; judge não consultado",
+        "judge_skipped": True
+    })
+    return result
+
+
+def _split_tiered(
+    metric_keys: List[str],
+    question: str,
+    answer: str,
+    reference: str
+) -> tuple[Dict[str, Dict[str, Any]], List[str]]:
+    """Separa as métricas decididas pela heurística das que ainda precisam do judge."""
+    results = {}
+    remaining = []
+    for key in metric_keys:
+        tiered = _tiered_result(key, question, answer, reference)
+        if tiered is None:
+            remaining.append(key)
+        else:
+            results[key] = tiered
+    return results, remaining
+
+
+def evaluate_f1_score(question: str, answer: str, reference: str) -> Dict[str, Any]:
+    """
+    Calcula F1-Score usando LLM-as-Judge.
+
+    F1-Score = 2 * (Precision * Recall) / (Precision + Recall)
+
+    Args:
+        question: Pergunta feita pelo usuário
+        answer: Resposta gerada pelo prompt
+        reference: Resposta esperada (ground truth)
+
+    Returns:
+        Dict com score e reasoning:
+        {
+            "score": 0.95,
+            "precision": 0.9,
+            "recall": 0.99,
+            "reasoning": "Explicação do LLM..."
+        }
+    """
+    tiered = _tiered_result("f1_score", question, answer, reference)
+    if tiered is not None:
+        return tiered
+
+    evaluator_prompt = _build_f1_prompt(question, answer, reference)
+
+    try:
+        result = _judge_json(evaluator_prompt, "f1_score", F1Judgment)
+
+        return _finalize_f1(result, question, answer, reference)
+
+    except Exception as e:
+        print(f"❌ Erro ao avaliar F1-Score: {e}")
+        return {
+            "score": 0.0,
+            "precision": 0.0,
+            "recall": 0.0,
+            "reasoning": f"Erro na avaliação: {str(e)}",
+            "error": True
+        }
+
+
+def evaluate_clarity(question: str, answer: str, reference: str) -> Dict[str, Any]:
+    """
+    Avalia a clareza e estrutura da resposta usando LLM-as-Judge.
+
+    Critérios:
+    - Organização e estrutura clara
+    - Linguagem simples e direta
+    - Ausência de ambiguidade
+    - Fácil de entender
+
+    Args:
+        question: Pergunta feita pelo usuário
+        answer: Resposta gerada pelo prompt
+        reference: Resposta esperada (ground truth)
+
+    Returns:
+        Dict com score e reasoning:
+        {
+            "score": 0.92,
+            "reasoning": "Explicação do LLM..."
+        }
+    """
+    tiered = _tiered_result("clarity", question, answer, reference)
+    if tiered is not None:
+        return tiered
+
+    evaluator_prompt = _build_clarity_prompt(question, answer, reference)
+
+    try:
+        result = _judge_json(evaluator_prompt, "clarity", ScoreJudgment)
+
+        return _finalize_clarity(result, question, answer, reference)
+
+    except Exception as e:
+        print(f"❌ Erro ao avaliar Clarity: {e}")
+        return {
+            "score": 0.0,
+            "reasoning": f"Erro na avaliação: {str(e)}",
+            "error": True
+        }
+
+
+def evaluate_precision(question: str, answer: str, reference: str) -> Dict[str, Any]:
+    """
+    Avalia a precisão da resposta usando LLM-as-Judge.
+
+    Critérios:
+    - Ausência de informações inventadas (alucinações)
+    - Resposta focada na pergunta
+    - Informações corretas e verificáveis
+
+    Args:
+        question: Pergunta feita pelo usuário
+        answer: Resposta gerada pelo prompt
+        reference: Resposta esperada (ground truth)
+
+    Returns:
+        Dict com score e reasoning:
+        {
+            "score": 0.98,
+            "reasoning": "Explicação do LLM..."
+        }
+    """
+    
+    tiered = _tiered_result("precision", question, answer, reference)
+    if tiered is not None:
+        return tiered
+
+    evaluator_prompt = _build_precision_prompt(question, answer, reference)
 
     try:
-        llm = get_evaluator_llm()
-        response = llm.invoke([HumanMessage(content=evaluator_prompt)])
-        result = extract_json_from_response(response.content)
+        result = _judge_json(evaluator_prompt, "precision", ScoreJudgment)
 
-        score = float(result.get("score", 0.0))
+        return _finalize_precision(result, question, answer, reference)
 
+    except Exception as e:
+        print(f"❌ Erro ao avaliar Precision: {e}")
         return {
-            "score": round(score, 4),
-            "reasoning": result.get("reasoning", "")
+            "score": 0.0,
+            "reasoning": f"Erro na avaliação: {str(e)}",
+            "error": True
         }
 
+
+def evaluate_tone_score(bug_report: str, user_story: str, reference: str) -> Dict[str, Any]:
+    """
+    Avalia o tom da user story (profissional e empático).
+
+    Critérios específicos para Bug to User Story:
+    - Tom profissional mas não excessivamente técnico
+    - Empatia com o usuário afetado pelo bug
+    - Foco em valor de negócio, não apenas correção técnica
+    - Linguagem positiva (o que o usuário QUER fazer, não só o que não funciona)
+
+    Args:
+        bug_report: Descrição do bug original
+        user_story: User story gerada pelo prompt
+        reference: User story esperada (ground truth)
+
+    Returns:
+        Dict com score e reasoning
+    """
+    evaluator_prompt = _build_tone_prompt(bug_report, user_story, reference)
+
+    try:
+        result = _judge_json(evaluator_prompt, "tone_score", ScoreJudgment)
+
+        return _finalize_judge_score(result, bug_report, user_story, reference)
+
     except Exception as e:
         print(f"❌ Erro ao avaliar Tone Score: {e}")
         return {
             "score": 0.0,
-            "reasoning": f"Erro na avaliação: {str(e)}"
+            "reasoning": f"Erro na avaliação: {str(e)}",
+            "error": True
         }
 
 
@@ -524,72 +1111,19 @@ def evaluate_acceptance_criteria_score(bug_report: str, user_story: str, referen
     Returns:
         Dict com score e reasoning
     """
-    evaluator_prompt = f"""
-Você é um avaliador especializado em Critérios de Aceitação de User Stories.
-
-BUG REPORT ORIGINAL:
-{bug_report}
-
-USER STORY GERADA:
-{user_story}
-
-USER STORY ESPERADA (Referência):
-{reference}
-
-INSTRUÇÕES:
-
-Avalie os CRITÉRIOS DE ACEITAÇÃO da user story gerada:
-
-1. FORMATO ESTRUTURADO (0.0 a 1.0):
-   - Usa formato Given-When-Then ou estrutura similar?
-   - Cada critério é claramente separado e identificável?
-   - Formatação facilita leitura e entendimento?
-
-2. ESPECIFICIDADE E TESTABILIDADE (0.0 a 1.0):
-   - Critérios são específicos e não vagos?
-   - É possível criar testes automatizados a partir deles?
-   - Evita termos ambíguos como "deve funcionar bem"?
-   - Critérios mensuráveis e verificáveis?
-
-3. QUANTIDADE ADEQUADA (0.0 a 1.0):
-   - Tem quantidade apropriada de critérios (nem muito, nem pouco)?
-   - Ideal: 3-7 critérios para bugs simples/médios
-   - Bugs complexos podem ter mais critérios organizados
-
-4. COBERTURA COMPLETA (0.0 a 1.0):
-   - Cobre todos os aspectos do bug?
-   - Inclui cenários de sucesso e erro?
-   - Considera edge cases quando relevante?
-   - Aborda validações e requisitos técnicos do bug?
-
-Calcule a MÉDIA dos 4 critérios para obter o score final.
-
-IMPORTANTE: Retorne APENAS um objeto JSON válido no formato:
-{{
-  "score": <valor entre 0.0 e 1.0>,
-  "reasoning": "<explicação detalhada com exemplos específicos, até 150 palavras>"
-}}
-
-NÃO adicione nenhum texto antes ou depois do JSON.
-"""
+    evaluator_prompt = _build_acceptance_criteria_prompt(bug_report, user_story, reference)
 
     try:
-        llm = get_evaluator_llm()
-        response = llm.invoke([HumanMessage(content=evaluator_prompt)])
-        result = extract_json_from_response(response.content)
-
-        score = float(result.get("score", 0.0))
+        result = _judge_json(evaluator_prompt, "acceptance_criteria_score", ScoreJudgment)
 
-        return {
-            "score": round(score, 4),
-            "reasoning": result.get("reasoning", "")
-        }
+        return _finalize_judge_score(result, bug_report, user_story, reference)
 
     except Exception as e:
         print(f"❌ Erro ao avaliar Acceptance Criteria Score: {e}")
         return {
             "score": 0.0,
-            "reasoning": f"Erro na avaliação: {str(e)}"
+            "reasoning": f"Erro na avaliação: {str(e)}",
+            "error": True
         }
 
 
@@ -611,75 +1145,19 @@ def evaluate_user_story_format_score(bug_report: str, user_story: str, reference
     Returns:
         Dict com score e reasoning
     """
-    evaluator_prompt = f"""
-Você é um avaliador especializado em formato de User Stories ágeis.
-
-BUG REPORT ORIGINAL:
-{bug_report}
-
-USER STORY GERADA:
-{user_story}
-
-USER STORY ESPERADA (Referência):
-{reference}
-
-INSTRUÇÕES:
-
-Avalie o FORMATO da user story gerada:
-
-1. TEMPLATE PADRÃO (0.0 a 1.0):
-   - Segue o formato "Como um [usuário], eu quero [ação], para que [benefício]"?
-   - Todas as três partes estão presentes e corretas?
-   - Ordem e estrutura seguem as melhores práticas?
-
-2. IDENTIFICAÇÃO DE PERSONA (0.0 a 1.0):
-   - "Como um..." identifica claramente o tipo de usuário?
-   - Persona é específica e relevante para o bug?
-   - Evita genéricos como "Como um usuário" sem contexto?
-
-3. AÇÃO CLARA (0.0 a 1.0):
-   - "Eu quero..." descreve claramente a ação/funcionalidade desejada?
-   - Ação é específica e relacionada ao bug?
-   - Evita descrições vagas ou muito técnicas?
-
-4. BENEFÍCIO ARTICULADO (0.0 a 1.0):
-   - "Para que..." explica claramente o valor/benefício?
-   - Benefício é real e significativo (não trivial)?
-   - Conecta a ação ao valor de negócio?
-
-5. SEPARAÇÃO DE SEÇÕES (0.0 a 1.0):
-   - User story principal está claramente separada dos critérios?
-   - Critérios de aceitação têm seção própria?
-   - Estrutura facilita leitura e navegação?
-
-Calcule a MÉDIA dos 5 critérios para obter o score final.
-
-IMPORTANTE: Retorne APENAS um objeto JSON válido no formato:
-{{
-  "score": <valor entre 0.0 e 1.0>,
-  "reasoning": "<explicação detalhada com exemplos, até 150 palavras>"
-}}
-
-NÃO adicione nenhum texto antes ou depois do JSON.
-"""
+    evaluator_prompt = _build_user_story_format_prompt(bug_report, user_story, reference)
 
     try:
-        llm = get_evaluator_llm()
-        response = llm.invoke([HumanMessage(content=evaluator_prompt)])
-        result = extract_json_from_response(response.content)
+        result = _judge_json(evaluator_prompt, "user_story_format_score", ScoreJudgment)
 
-        score = float(result.get("score", 0.0))
-
-        return {
-            "score": round(score, 4),
-            "reasoning": result.get("reasoning", "")
-        }
+        return _finalize_judge_score(result, bug_report, user_story, reference)
 
     except Exception as e:
         print(f"❌ Erro ao avaliar User Story Format Score: {e}")
         return {
             "score": 0.0,
-            "reasoning": f"Erro na avaliação: {str(e)}"
+            "reasoning": f"Erro na avaliação: {str(e)}",
+            "error": True
         }
 
 
@@ -700,87 +1178,348 @@ def evaluate_completeness_score(bug_report: str, user_story: str, reference: str
     Returns:
         Dict com score e reasoning
     """
-    evaluator_prompt = f"""
-Você é um avaliador especializado em completude de User Stories derivadas de bugs.
+    evaluator_prompt = _build_completeness_prompt(bug_report, user_story, reference)
 
-BUG REPORT ORIGINAL:
-{bug_report}
-
-USER STORY GERADA:
-{user_story}
-
-USER STORY ESPERADA (Referência):
-{reference}
-
-INSTRUÇÕES:
+    try:
+        result = _judge_json(evaluator_prompt, "completeness_score", ScoreJudgment)
 
-Avalie a COMPLETUDE da user story em relação ao bug:
+        return _finalize_judge_score(result, bug_report, user_story, reference)
 
-1. COBERTURA DO PROBLEMA (0.0 a 1.0):
-   - A user story aborda TODOS os aspectos do bug reportado?
-   - Nenhum detalhe importante foi omitido?
-   - Se bug menciona múltiplos problemas, todos são cobertos?
+    except Exception as e:
+        print(f"❌ Erro ao avaliar Completeness Score: {e}")
+        return {
+            "score": 0.0,
+            "reasoning": f"Erro na avaliação: {str(e)}",
+            "error": True
+        }
 
-2. CONTEXTO TÉCNICO (0.0 a 1.0):
-   - Quando o bug inclui detalhes técnicos (logs, stack traces, endpoints):
-     * User story preserva contexto técnico relevante?
-     * Informações técnicas são incluídas de forma apropriada?
-   - Bugs simples não precisam de muito contexto técnico
-   - Bugs complexos DEVEM incluir seção de contexto técnico
 
-3. IMPACTO E SEVERIDADE (0.0 a 1.0):
-   - Se o bug menciona impacto (usuários afetados, perda financeira):
-     * User story reconhece e documenta o impacto?
-   - Severidade é refletida na priorização implícita?
-   - Bugs críticos devem ter tratamento mais detalhado
+# Registro das métricas: chave -> (nome, critérios, formato JSON, schema, prompt, finalizador, função individual)
+METRIC_REGISTRY: Dict[str, Dict[str, Any]] = {
+    "f1_score": {
+        "label": "F1-Score",
+        "criteria": _F1_CRITERIA,
+        "json_format": '{"precision": <0.0 a 1.0>, "recall": <0.0 a 1.0>, "reasoning": "<até 60 palavras>"}',
+        "required_fields": ("precision", "recall"),
+        "schema": F1Judgment,
+        "build_prompt": _build_f1_prompt,
+        "finalize": _finalize_f1,
+        "evaluate": evaluate_f1_score,
+    },
+    "clarity": {
+        "label": "Clarity",
+        "criteria": _CLARITY_CRITERIA,
+        "json_format": '{"score": <0.0 a 1.0>, "reasoning": "<até 60 palavras>"}',
+        "required_fields": ("score",),
+        "schema": ScoreJudgment,
+        "build_prompt": _build_clarity_prompt,
+        "finalize": _finalize_clarity,
+        "evaluate": evaluate_clarity,
+    },
+    "precision": {
+        "label": "Precision",
+        "criteria": _PRECISION_CRITERIA,
+        "json_format": '{"score": <0.0 a 1.0>, "reasoning": "<até 60 palavras>"}',
+        "required_fields": ("score",),
+        "schema": ScoreJudgment,
+        "build_prompt": _build_precision_prompt,
+        "finalize": _finalize_precision,
+        "evaluate": evaluate_precision,
+    },
+    "tone_score": {
+        "label": "Tone Score",
+        "criteria": _TONE_CRITERIA,
+        "json_format": '{"score": <0.0 a 1.0>, "reasoning": "<até 60 palavras>"}',
+        "required_fields": ("score",),
+        "schema": ScoreJudgment,
+        "build_prompt": _build_tone_prompt,
+        "finalize": _finalize_judge_score,
+        "evaluate": evaluate_tone_score,
+    },
+    "acceptance_criteria_score": {
+        "label": "Acceptance Criteria Score",
+        "criteria": _ACCEPTANCE_CRITERIA_CRITERIA,
+        "json_format": '{"score": <0.0 a 1.0>, "reasoning": "<até 60 palavras>"}',
+        "required_fields": ("score",),
+        "schema": ScoreJudgment,
+        "build_prompt": _build_acceptance_criteria_prompt,
+        "finalize": _finalize_judge_score,
+        "evaluate": evaluate_acceptance_criteria_score,
+    },
+    "user_story_format_score": {
+        "label": "User Story Format Score",
+        "criteria": _USER_STORY_FORMAT_CRITERIA,
+        "json_format": '{"score": <0.0 a 1.0>, "reasoning": "<até 60 palavras>"}',
+        "required_fields": ("score",),
+        "schema": ScoreJudgment,
+        "build_prompt": _build_user_story_format_prompt,
+        "finalize": _finalize_judge_score,
+        "evaluate": evaluate_user_story_format_score,
+    },
+    "completeness_score": {
+        "label": "Completeness Score",
+        "criteria": _COMPLETENESS_CRITERIA,
+        "json_format": '{"score": <0.0 a 1.0>, "reasoning": "<até 60 palavras>"}',
+        "required_fields": ("score",),
+        "schema": ScoreJudgment,
+        "build_prompt": _build_completeness_prompt,
+        "finalize": _finalize_judge_score,
+        "evaluate": evaluate_completeness_score,
+    },
+}
+
+
+@lru_cache(maxsize=None)
+def _combined_schema(metric_keys: tuple[str, ...]) -> Type[BaseModel]:
+    """Schema da resposta combinada; métricas ausentes são reavaliadas pelo judge individual."""
+    fields = {key: (Optional[METRIC_REGISTRY[key]["schema"]], None) for key in metric_keys}
+    return create_model("CombinedJudgment", **fields)
+
+
+def _build_combined_prompt(question: str, answer: str, reference: str, metric_keys: List[str]) -> str:
+    """Monta um único prompt de avaliação cobrindo todas as métricas pedidas."""
+    sections = []
+    for index, key in enumerate(metric_keys, 1):
+        spec = METRIC_REGISTRY[key]
+        sections.append(
+            f"### MÉTRICA {index}: {spec['label']} (chave JSON: \"{key}\")\n\n{spec['criteria']}"
+        )
+
+    json_lines = ",\n".join(
+        f'  "{key}": {METRIC_REGISTRY[key]["json_format"]}' for key in metric_keys
+    )
+    criteria_block = "\n\n".join(sections)
+
+    return f"""
+Você é um avaliador especializado em medir a qualidade de respostas geradas por IA,
+incluindo User Stories derivadas de bug reports.
+
+Avalie a resposta gerada em TODAS as métricas listadas abaixo, de forma independente.
+
+PERGUNTA DO USUÁRIO / BUG REPORT ORIGINAL:
+{question}
 
-4. TASKS TÉCNICAS (0.0 a 1.0):
-   - Para bugs complexos com múltiplos componentes:
-     * User story sugere tasks técnicas ou breakdown?
-   - Para bugs simples/médios:
-     * Tasks não são necessárias (não penalizar ausência)
-   - Avalie se o nível de detalhe é apropriado à complexidade
+RESPOSTA GERADA PELO MODELO:
+{answer}
 
-5. INFORMAÇÕES ADICIONAIS RELEVANTES (0.0 a 1.0):
-   - Se bug menciona: steps to reproduce, ambiente, logs
-     * User story preserva ou referencia essas informações?
-   - Contexto de negócio importante é mantido?
-   - Sugestões de solução são apropriadas?
+RESPOSTA ESPERADA (Ground Truth):
+{reference}
 
-Calcule a MÉDIA dos 5 critérios para obter o score final.
+INSTRUÇÕES POR MÉTRICA:
 
-IMPORTANTE:
-- Bugs SIMPLES podem ter score alto mesmo sem muitos detalhes técnicos
-- Bugs COMPLEXOS DEVEM ter seções adicionais (contexto técnico, tasks, impacto)
-- Compare com a referência para calibrar expectativa de completude
+{criteria_block}
 
-Retorne APENAS um objeto JSON válido no formato:
+IMPORTANTE: Retorne APENAS um objeto JSON válido, com uma entrada por métrica, no formato:
 {{
-  "score": <valor entre 0.0 e 1.0>,
-  "reasoning": "<explicação detalhada sobre o que foi bem coberto e o que faltou, até 200 palavras>"
+{json_lines}
 }}
 
 NÃO adicione nenhum texto antes ou depois do JSON.
 """
 
+
+def evaluate_all_metrics(
+    question: str,
+    answer: str,
+    reference: str,
+    metric_keys: Optional[List[str]] = None
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Avalia várias métricas com UMA única chamada ao LLM-as-Judge.
+
+    O judge recebe pergunta, resposta e referência uma única vez e devolve
+    todas as métricas em um só JSON. Cada entrada passa pelo mesmo
+    finalizador (incluindo a calibragem heurística) usado pela função
+    individual correspondente. Métricas ausentes ou inválidas na resposta
+    combinada são reavaliadas pela função individual (fallback).
+
+    Args:
+        question: Pergunta feita pelo usuário (ou bug report)
+        answer: Resposta gerada pelo prompt
+        reference: Resposta esperada (ground truth)
+        metric_keys: Chaves de METRIC_REGISTRY a avaliar (padrão: todas)
+
+    Returns:
+        Dict chave_da_métrica -> resultado no mesmo formato da função individual
+    """
+    metric_keys = _validate_metric_keys(metric_keys)
+    results, pending = _split_tiered(metric_keys, question, answer, reference)
+    if not pending:
+        return {key: results[key] for key in metric_keys}
+
+    evaluator_prompt = _build_combined_prompt(question, answer, reference, pending)
+
     try:
-        llm = get_evaluator_llm()
-        response = llm.invoke([HumanMessage(content=evaluator_prompt)])
-        result = extract_json_from_response(response.content)
+        combined = _judge_json(evaluator_prompt, "combined", _combined_schema(tuple(pending)))
+    except Exception as e:
+        print(f"❌ Erro na avaliação combinada: {e}")
+        combined = {}
 
-        score = float(result.get("score", 0.0))
+    judged, missing = _split_combined_result(combined, pending, question, answer, reference)
+    results.update(judged)
+    for key in missing:
+        results[key] = _judge_metric(key, question, answer, reference)
 
-        return {
-            "score": round(score, 4),
-            "reasoning": result.get("reasoning", "")
-        }
+    return {key: results[key] for key in metric_keys}
+
+
+def build_judge_prompts(
+    question: str,
+    answer: str,
+    reference: str,
+    metric_keys: Optional[List[str]] = None,
+    combined: bool = False
+) -> List[str]:
+    """
+    Prompts enviados ao judge para avaliar uma resposta (usado para estimar tokens).
+
+    Args:
+        question: Pergunta feita pelo usuário (ou bug report)
+        answer: Resposta gerada pelo prompt
+        reference: Resposta esperada (ground truth)
+        metric_keys: Chaves de METRIC_REGISTRY a avaliar (padrão: todas)
+        combined: Um único prompt para todas as métricas (EVAL_JUDGE_MODE=combined)
+
+    Returns:
+        Lista com um prompt por chamada ao judge
+    """
+    metric_keys = _validate_metric_keys(metric_keys)
+    if combined:
+        return [_build_combined_prompt(question, answer, reference, metric_keys)]
+    return [METRIC_REGISTRY[key]["build_prompt"](question, answer, reference) for key in metric_keys]
+
+
+def _validate_metric_keys(metric_keys: Optional[List[str]]) -> List[str]:
+    """Normaliza a lista de métricas pedidas, rejeitando chaves desconhecidas."""
+    metric_keys = list(metric_keys or METRIC_REGISTRY)
+    unknown = [key for key in metric_keys if key not in METRIC_REGISTRY]
+    if unknown:
+        raise ValueError(f"Métricas desconhecidas: {', '.join(unknown)}")
+    return metric_keys
+
+
+def _split_combined_result(
+    combined: Dict[str, Any],
+    metric_keys: List[str],
+    question: str,
+    answer: str,
+    reference: str
+) -> tuple[Dict[str, Dict[str, Any]], List[str]]:
+    """Finaliza as métricas presentes na resposta combinada.
+
+    Returns:
+        Tupla (resultados finalizados, métricas ausentes/inválidas para fallback)
+    """
+    results = {}
+    missing = []
+    for key in metric_keys:
+        spec = METRIC_REGISTRY[key]
+        metric_result = combined.get(key)
+
+        try:
+            if not isinstance(metric_result, dict) or not all(
+                field in metric_result for field in spec["required_fields"]
+            ):
+                raise ValueError("métrica ausente na resposta combinada")
+            results[key] = spec["finalize"](metric_result, question, answer, reference)
+        except (TypeError, ValueError):
+            print(f"⚠️  {spec['label']} ausente/inválido na avaliação combinada; usando judge individual")
+            missing.append(key)
+
+    return results, missing
+
+
+def _metric_error_result(metric_key: str, error: Exception) -> Dict[str, Any]:
+    """Resultado padrão de uma métrica cuja avaliação falhou."""
+    result = {"score": 0.0, "reasoning": f"Erro na avaliação: {str(error)}", "error": True}
+    if metric_key == "f1_score":
+        result.update({"precision": 0.0, "recall": 0.0})
+    return result
+
+
+def _judge_metric(metric_key: str, question: str, answer: str, reference: str) -> Dict[str, Any]:
+    """Avalia uma métrica com o judge individual, sem passar de novo pelo modo em camadas.
+
+    Usado no fallback da avaliação combinada, cujas métricas pendentes já
+    tiveram a decisão em camadas registrada.
+    """
+    spec = METRIC_REGISTRY[metric_key]
+    evaluator_prompt = spec["build_prompt"](question, answer, reference)
+
+    try:
+        result = _judge_json(evaluator_prompt, metric_key, spec["schema"])
+        return spec["finalize"](result, question, answer, reference)
 
     except Exception as e:
-        print(f"❌ Erro ao avaliar Completeness Score: {e}")
-        return {
-            "score": 0.0,
-            "reasoning": f"Erro na avaliação: {str(e)}"
-        }
+        print(f"❌ Erro ao avaliar {spec['label']}: {e}")
+        return _metric_error_result(metric_key, e)
+
+
+async def _ajudge_metric(metric_key: str, question: str, answer: str, reference: str) -> Dict[str, Any]:
+    """Versão assíncrona de `_judge_metric`."""
+    spec = METRIC_REGISTRY[metric_key]
+    evaluator_prompt = spec["build_prompt"](question, answer, reference)
+
+    try:
+        result = await _ajudge_json(evaluator_prompt, metric_key, spec["schema"])
+        return spec["finalize"](result, question, answer, reference)
+
+    except Exception as e:
+        print(f"❌ Erro ao avaliar {spec['label']}: {e}")
+        return _metric_error_result(metric_key, e)
+
+
+async def aevaluate_metric(metric_key: str, question: str, answer: str, reference: str) -> Dict[str, Any]:
+    """
+    Versão assíncrona das funções evaluate_* (uma métrica por chamada).
+
+    Usa o mesmo prompt, finalizador e cache das funções síncronas, mas chama
+    o judge com `ainvoke`, permitindo manter muitas avaliações em voo sem
+    uma thread por chamada.
+
+    Args:
+        metric_key: Chave da métrica em METRIC_REGISTRY (ex: "f1_score")
+        question: Pergunta feita pelo usuário (ou bug report)
+        answer: Resposta gerada pelo prompt
+        reference: Resposta esperada (ground truth)
+
+    Returns:
+        Dict no mesmo formato da função síncrona correspondente
+    """
+    tiered = _tiered_result(metric_key, question, answer, reference)
+    if tiered is not None:
+        return tiered
+    return await _ajudge_metric(metric_key, question, answer, reference)
+
+
+async def aevaluate_all_metrics(
+    question: str,
+    answer: str,
+    reference: str,
+    metric_keys: Optional[List[str]] = None
+) -> Dict[str, Dict[str, Any]]:
+    """Versão assíncrona de `evaluate_all_metrics` (fallback individual também assíncrono)."""
+    metric_keys = _validate_metric_keys(metric_keys)
+    results, pending = _split_tiered(metric_keys, question, answer, reference)
+    if not pending:
+        return {key: results[key] for key in metric_keys}
+
+    evaluator_prompt = _build_combined_prompt(question, answer, reference, pending)
+
+    try:
+        combined = await _ajudge_json(evaluator_prompt, "combined", _combined_schema(tuple(pending)))
+    except Exception as e:
+        print(f"❌ Erro na avaliação combinada: {e}")
+        combined = {}
+
+    judged, missing = _split_combined_result(combined, pending, question, answer, reference)
+    results.update(judged)
+    fallbacks = await asyncio.gather(
+        *(_ajudge_metric(key, question, answer, reference) for key in missing)
+    )
+    results.update(zip(missing, fallbacks))
+
+    return {key: results[key] for key in metric_keys}
 
 
 # Exemplo de uso e testes
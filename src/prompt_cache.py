@@ -0,0 +1,231 @@
+"""
+Cache local de prompts puxados do LangSmith Hub.
+
+Responsabilidades:
+- Armazenar em disco o manifest de cada prompt, por nome e commit hash
+- Servir prompts fixados em um commit (`owner/prompt:abc123`) sem rede,
+  inclusive com o hash abreviado (prefixo do commit completo em cache)
+- Para prompts sem commit, reaproveitar o cache dentro do TTL e, depois
+  dele, fazer apenas uma checagem barata de revisão (último commit) antes
+  de baixar o manifest novamente
+- Modo offline: serve somente do cache (CI sem acesso à rede)
+
+Se a checagem de revisão falhar (rede, quota), a última versão em cache é
+usada com um aviso.
+
+Configuração via .env:
+- PROMPT_CACHE_ENABLED=true
+- PROMPT_CACHE_DIR=.cache/prompts
+- PROMPT_CACHE_TTL_SECONDS=600
+- PROMPT_CACHE_OFFLINE=false
+"""
+
+import glob
+import json
+import logging
+import os
+import re
+import time
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from langchain_core._api import suppress_langchain_beta_warning
+from langchain_core.load import loads
+from langchain_core.prompts import BasePromptTemplate
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PROMPT_CACHE_DIR = ".cache/prompts"
+
+
+def _split_identifier(identifier: str) -> tuple[str, Optional[str]]:
+    """Separa 'owner/prompt:commit' em (nome, commit); commit é None se ausente."""
+    name, _, commit = identifier.partition(":")
+    if commit in ("", "latest"):
+        return name, None
+    return name, commit
+
+
+def _safe_name(name: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", name).strip("_") or "prompt"
+
+
+def _write_json(path: Path, data: Dict[str, Any]) -> None:
+    """Escrita atômica (arquivo temporário + rename)."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def _read_json(path: Path) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except (json.JSONDecodeError, OSError) as e:
+        logger.warning(f"Cache de prompt corrompido ignorado ({path}): {e}")
+        return None
+
+
+def _to_prompt(entry: Dict[str, Any]) -> Any:
+    """Reconstrói o objeto LangChain a partir do manifest armazenado."""
+    with suppress_langchain_beta_warning():
+        prompt = loads(json.dumps(entry["manifest"]))
+    if isinstance(prompt, BasePromptTemplate):
+        prompt.metadata = {
+            **(prompt.metadata or {}),
+            "lc_hub_owner": entry.get("owner"),
+            "lc_hub_repo": entry.get("repo"),
+            "lc_hub_commit_hash": entry["commit_hash"],
+        }
+    return prompt
+
+
+class PromptCache:
+    """Cache em disco de prompts do Hub, endereçado por nome e commit."""
+
+    def __init__(
+        self,
+        directory: str,
+        ttl_seconds: float = 600,
+        offline: bool = False,
+        client: Any = None
+    ):
+        """
+        Inicializa o cache.
+
+        Args:
+            directory: Diretório dos arquivos de cache
+            ttl_seconds: Tempo em que a última revisão conhecida é usada sem checar o Hub
+            offline: Se True, nunca acessa a rede
+            client: Cliente do LangSmith (criado sob demanda se None)
+        """
+        self.directory = Path(directory)
+        self.ttl_seconds = ttl_seconds
+        self.offline = offline
+        self._client = client
+
+    @property
+    def client(self) -> Any:
+        if self._client is None:
+            from langsmith import Client
+            self._client = Client()
+        return self._client
+
+    def _commit_path(self, name: str, commit: str) -> Path:
+        return self.directory / f"{_safe_name(name)}@{commit}.json"
+
+    def _ref_path(self, name: str) -> Path:
+        return self.directory / f"{_safe_name(name)}.ref.json"
+
+    def _download(self, name: str, commit: Optional[str]) -> Dict[str, Any]:
+        """Baixa o manifest do Hub e grava no cache."""
+        identifier = f"{name}:{commit}" if commit else name
+        prompt_commit = self.client.pull_prompt_commit(identifier)
+        entry = {
+            "owner": prompt_commit.owner,
+            "repo": prompt_commit.repo,
+            "commit_hash": prompt_commit.commit_hash,
+            "manifest": prompt_commit.manifest,
+        }
+        _write_json(self._commit_path(name, prompt_commit.commit_hash), entry)
+        return entry
+
+    def _cached_commit(self, name: str, commit: str) -> Optional[Dict[str, Any]]:
+        """Entrada do commit em cache; `commit` pode ser o hash completo ou um prefixo único."""
+        entry = _read_json(self._commit_path(name, commit))
+        if entry is not None:
+            return entry
+
+        pattern = glob.escape(str(self.directory / f"{_safe_name(name)}@{commit}")) + "*.json"
+        matches = glob.glob(pattern)
+        if len(matches) != 1:
+            return None
+        return _read_json(Path(matches[0]))
+
+    def _pull_pinned(self, name: str, commit: str) -> Dict[str, Any]:
+        entry = self._cached_commit(name, commit)
+        if entry is not None:
+            return entry
+        if self.offline:
+            raise RuntimeError(f"Prompt '{name}:{commit}' não está no cache local (modo offline)")
+        return self._download(name, commit)
+
+    def _pull_latest(self, name: str) -> Dict[str, Any]:
+        ref = _read_json(self._ref_path(name))
+        cached = self._cached_commit(name, ref["commit_hash"]) if ref else None
+
+        if cached is not None:
+            if self.offline or time.time() - ref["checked_at"] < self.ttl_seconds:
+                return cached
+
+        if self.offline:
+            raise RuntimeError(f"Prompt '{name}' não está no cache local (modo offline)")
+
+        try:
+            if cached is not None:
+                latest_commit = self.client.get_prompt(name).last_commit_hash
+                entry = cached if latest_commit == ref["commit_hash"] else self._pull_pinned(name, latest_commit)
+            else:
+                entry = self._download(name, None)
+        except Exception as e:
+            if cached is None:
+                raise
+            logger.warning(f"Não foi possível checar a revisão de '{name}' ({e}); usando versão em cache")
+            return cached
+
+        _write_json(self._ref_path(name), {"commit_hash": entry["commit_hash"], "checked_at": time.time()})
+        return entry
+
+    def pull(self, identifier: str) -> Any:
+        """Retorna o prompt (como `hub.pull`), usando o cache sempre que possível.
+
+        Args:
+            identifier: 'owner/prompt', 'prompt' ou 'owner/prompt:commit'
+
+        Returns:
+            Objeto LangChain do prompt (ex: ChatPromptTemplate)
+
+        Raises:
+            RuntimeError: Em modo offline, se o prompt não estiver no cache
+        """
+        name, commit = _split_identifier(identifier)
+        entry = self._pull_pinned(name, commit) if commit else self._pull_latest(name)
+        logger.debug(f"Prompt {name} @ {entry['commit_hash']}")
+        return _to_prompt(entry)
+
+
+def _env_flag(name: str, default: str) -> bool:
+    return os.getenv(name, default).strip().lower() in {"1", "true", "yes", "y", "on"}
+
+
+@lru_cache(maxsize=1)
+def get_prompt_cache() -> Optional[PromptCache]:
+    """Retorna o cache de prompts do processo, ou None se desabilitado."""
+    if not _env_flag("PROMPT_CACHE_ENABLED", "true"):
+        return None
+
+    try:
+        ttl_seconds = float(os.getenv("PROMPT_CACHE_TTL_SECONDS", "600"))
+    except ValueError:
+        logger.warning("PROMPT_CACHE_TTL_SECONDS inválido; usando 600")
+        ttl_seconds = 600.0
+
+    return PromptCache(
+        os.getenv("PROMPT_CACHE_DIR", DEFAULT_PROMPT_CACHE_DIR),
+        ttl_seconds=ttl_seconds,
+        offline=_env_flag("PROMPT_CACHE_OFFLINE", "false"),
+    )
+
+
+def pull_prompt(identifier: str) -> Any:
+    """Substituto de `hub.pull` com cache local (ver PromptCache.pull)."""
+    cache = get_prompt_cache()
+    if cache is None:
+        from langchain import hub
+        return hub.pull(identifier)
+    return cache.pull(identifier)
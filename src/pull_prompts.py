@@ -17,8 +17,8 @@ from pathlib import Path
 from typing import Any, Dict
 
 from dotenv import load_dotenv
-from langchain import hub
 
+from prompt_cache import pull_prompt
 from utils import check_env_vars, save_yaml
 
 # Configurar logger
@@ -54,7 +54,7 @@ class PromptPuller:
         """
         try:
             logger.info(f"Puxando prompt do Hub: {self.prompt_name}")
-            prompt_obj = hub.pull(self.prompt_name)
+            prompt_obj = pull_prompt(self.prompt_name)
             
             # Converter para estrutura serializável
             data = self._serialize_prompt(prompt_obj, self.prompt_name)
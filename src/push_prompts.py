@@ -7,19 +7,31 @@ Responsabilidades:
 - Converter para ChatPromptTemplate
 - Fazer push com versionagem e metadados
 - Suportar múltiplos providers de LLM
+- Pular prompts inalterados via fingerprint local (<yaml>.fingerprint.json)
+- Modo lote: push concorrente de todos os YAMLs de prompts/
+
+Uso:
+  python src/push_prompts.py              # prompts/bug_to_user_story_v2.yml
+  python src/push_prompts.py --all        # todos os prompts de prompts/
+  python src/push_prompts.py --force      # ignora o fingerprint e publica
 
 Requisito de Segurança:
 - Prompts são publicados PUBLICAMENTE no Hub
 - Não incluir dados sensíveis ou chaves de API
 """
 
+import hashlib
+import json
 import logging
 import os
 import sys
-from typing import Any, Dict, List, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
 
 from dotenv import load_dotenv
 from langchain import hub
+from langchain_core.load import dumpd
 from langchain_core.prompts import ChatPromptTemplate
 
 from utils import check_env_vars, load_yaml
@@ -77,27 +89,78 @@ class PromptValidator:
         return (len(errors) == 0, errors)
 
 
+def fingerprint_path(source_path: str) -> Path:
+    """Arquivo de fingerprint mantido ao lado do YAML (ex: prompts/x.fingerprint.json)."""
+    path = Path(source_path)
+    return path.with_name(f"{path.stem}.fingerprint.json")
+
+
 class PromptPusher:
     """Responsável por fazer push de prompts ao LangSmith Hub."""
     
-    def __init__(self, prompt_name: str, prompt_data: Dict[str, Any], is_public: bool = True):
+    def __init__(
+        self,
+        prompt_name: str,
+        prompt_data: Dict[str, Any],
+        is_public: bool = True,
+        source_path: Optional[str] = None,
+        force: bool = False
+    ):
         """
         Inicializa o PushPrompts.
         
         Args:
             prompt_name: Nome para publish no Hub (ex: "username/prompt_name_v2")
             prompt_data: Dados do prompt YAML
+            is_public: Publica o repositório como público
+            source_path: YAML de origem; habilita o fingerprint para pular prompts inalterados
+            force: Publica mesmo se o fingerprint indicar que nada mudou
         """
         self.prompt_name = prompt_name
         self.prompt_data = prompt_data
         self.is_public = is_public
+        self.source_path = source_path
+        self.force = force
+
+    def fingerprint(self, chat_template: ChatPromptTemplate) -> str:
+        """Hash do template renderizado, metadados e opções de publicação."""
+        material = json.dumps(
+            {
+                "prompt_name": self.prompt_name,
+                "is_public": self.is_public,
+                "template": dumpd(chat_template),
+                "tags": self.prompt_data.get("techniques_applied", []),
+            },
+            sort_keys=True,
+            ensure_ascii=False,
+            default=str,
+        )
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def _stored_fingerprints(self) -> Dict[str, str]:
+        try:
+            with open(fingerprint_path(self.source_path), "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _save_fingerprint(self, fingerprint: str) -> None:
+        fingerprints = self._stored_fingerprints()
+        fingerprints[self.prompt_name] = fingerprint
+        with open(fingerprint_path(self.source_path), "w", encoding="utf-8") as f:
+            json.dump(fingerprints, f, indent=2, sort_keys=True)
+            f.write("\n")
     
     def push(self) -> bool:
         """
         Faz push do prompt para LangSmith Hub.
+
+        Com `source_path`, o push é pulado (sem chamadas de rede) quando o
+        fingerprint coincide com o do último push bem-sucedido.
         
         Returns:
-            True se sucesso, False caso contrário
+            True se sucesso (ou nada a publicar), False caso contrário
         """
         logger.info(f"Iniciando push: {self.prompt_name}")
         
@@ -109,9 +172,15 @@ class PromptPusher:
                 logger.error(f"  - {error}")
             return False
         
+        fingerprint = None
         try:
             # Criar ChatPromptTemplate
             chat_template = self._create_chat_template()
+
+            fingerprint = self.fingerprint(chat_template) if self.source_path else None
+            if fingerprint and not self.force and self._stored_fingerprints().get(self.prompt_name) == fingerprint:
+                logger.info(f"Prompt inalterado desde o último push, pulando: {self.prompt_name}")
+                return True
             
             # Fazer push
             hub.push(
@@ -122,6 +191,8 @@ class PromptPusher:
                 tags=self.prompt_data.get("techniques_applied", [])
             )
             logger.info(f"✓ Prompt publicado com sucesso: {self.prompt_name}")
+            if fingerprint:
+                self._save_fingerprint(fingerprint)
             return True
             
         except Exception as e:
@@ -131,6 +202,8 @@ class PromptPusher:
                     "Prompt sem alterações desde o último commit no Hub. "
                     "Nenhuma ação necessária (estado já publicado)."
                 )
+                if fingerprint:
+                    self._save_fingerprint(fingerprint)
                 return True
 
             logger.error(f"Erro ao fazer push: {e}")
@@ -165,6 +238,53 @@ class PromptPusher:
         return chat_template
 
 
+def push_directory(
+    directory: str,
+    owner: Optional[str],
+    is_public: bool = True,
+    force: bool = False,
+    workers: int = 4
+) -> Tuple[int, int, int]:
+    """
+    Faz push concorrente de todos os prompts YAML de um diretório.
+
+    O nome no Hub é "<owner>/<nome do arquivo>" (ou só o nome do arquivo sem
+    owner). YAMLs sem `system_prompt` (ex: prompts puxados do Hub) não são
+    prompts publicáveis e são ignorados.
+
+    Args:
+        directory: Diretório com os arquivos .yml/.yaml
+        owner: Namespace no Hub (ex: "seu_usuario")
+        is_public: Publica os repositórios como públicos
+        force: Ignora os fingerprints e publica todos
+        workers: Pushes simultâneos
+
+    Returns:
+        Tupla (publicados_ou_inalterados, falhas, ignorados)
+    """
+    pushers = []
+    ignored = 0
+
+    for path in sorted(Path(directory).glob("*.y*ml")):
+        prompt_data = load_yaml(str(path))
+        if not isinstance(prompt_data, dict) or "system_prompt" not in prompt_data:
+            logger.info(f"Ignorando {path} (sem system_prompt)")
+            ignored += 1
+            continue
+
+        prompt_name = f"{owner}/{path.stem}" if owner else path.stem
+        pushers.append(PromptPusher(prompt_name, prompt_data, is_public, source_path=str(path), force=force))
+
+    if not pushers:
+        return 0, 0, ignored
+
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(pushers)))) as executor:
+        results = list(executor.map(lambda pusher: pusher.push(), pushers))
+
+    succeeded = sum(results)
+    return succeeded, len(results) - succeeded, ignored
+
+
 def main() -> int:
     """
     Função principal - orquestra push de prompts.
@@ -181,12 +301,25 @@ def main() -> int:
         return 1
     
     # Configurar parâmetros
+    args = sys.argv[1:]
+    force = "--force" in args
     prompt_path = "prompts/bug_to_user_story_v2.yml"
     prompt_name = os.getenv("PUSH_PROMPT_NAME", "bug_to_user_story_v2")
     push_public = os.getenv("PUSH_PROMPT_PUBLIC", "true").strip().lower() in {
         "1", "true", "yes", "y", "on"
     }
 
+    if "--all" in args:
+        owner = prompt_name.split("/", 1)[0] if "/" in prompt_name else None
+        try:
+            workers = max(1, int(os.getenv("PUSH_WORKERS", "4")))
+        except ValueError:
+            workers = 4
+
+        succeeded, failed, ignored = push_directory("prompts", owner, push_public, force, workers)
+        logger.info(f"\nPush em lote: {succeeded} ok, {failed} falhas, {ignored} ignorados")
+        return 0 if failed == 0 else 1
+
     if "/" not in prompt_name:
         logger.warning(
             "PUSH_PROMPT_NAME sem namespace (owner/prompt). "
@@ -203,7 +336,7 @@ def main() -> int:
     logger.info(f"✓ Prompt carregado com sucesso")
     
     # Fazer push
-    pusher = PromptPusher(prompt_name, prompt_data, is_public=push_public)
+    pusher = PromptPusher(prompt_name, prompt_data, is_public=push_public, source_path=prompt_path, force=force)
     success = pusher.push()
     
     if success:
@@ -0,0 +1,248 @@
+"""
+Rate limiting client-side por provider/modelo (token bucket).
+
+Responsabilidades:
+- Limitar requisições por minuto (RPM) e tokens por minuto (TPM)
+- Enfileirar chamadas (aguardar) em vez de falhar com 429
+- Contabilizar tokens reais via usage metadata das respostas
+- Reportar tempo total de espera por throttling
+
+O limiter é um `BaseRateLimiter` do LangChain: o chat model chama
+`acquire()`/`aacquire()` antes de cada requisição à API (hits de cache não
+consomem cota). O consumo de tokens é debitado após a resposta por um
+callback, podendo deixar o bucket de TPM negativo; nesse caso as próximas
+chamadas aguardam até a cota ser reposta.
+
+Configuração via .env (0 = sem limite):
+- LLM_RPM_LIMIT / LLM_TPM_LIMIT: limites padrão para qualquer provider
+- GOOGLE_RPM_LIMIT / GOOGLE_TPM_LIMIT, OPENAI_RPM_LIMIT / OPENAI_TPM_LIMIT:
+  limites por provider (prioridade sobre os padrões)
+Os buckets são independentes por (provider, modelo).
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+from langchain_core.rate_limiters import BaseRateLimiter
+
+logger = logging.getLogger(__name__)
+
+# Limites padrão por provider (RPM, TPM) — cota gratuita do Gemini
+DEFAULT_PROVIDER_LIMITS: Dict[str, Tuple[float, float]] = {
+    "google": (10, 250000),
+    "openai": (0, 0),
+}
+
+# Intervalo máximo entre reavaliações do bucket enquanto aguarda
+MAX_SLEEP_SECONDS = 1.0
+
+
+class TokenBucketRateLimiter(BaseRateLimiter):
+    """Token bucket duplo (requisições e tokens por minuto), seguro entre threads."""
+
+    def __init__(self, name: str, requests_per_minute: float = 0, tokens_per_minute: float = 0):
+        """
+        Inicializa os buckets cheios.
+
+        Args:
+            name: Identificação do limiter (ex: "google/gemini-2.5-flash")
+            requests_per_minute: Limite de requisições por minuto (0 = sem limite)
+            tokens_per_minute: Limite de tokens por minuto (0 = sem limite)
+        """
+        self.name = name
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+
+        self._request_bucket = float(requests_per_minute)
+        self._token_bucket = float(tokens_per_minute)
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()
+
+        self.requests = 0
+        self.tokens = 0
+        self.throttled_requests = 0
+        self.wait_seconds = 0.0
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        elapsed_minutes = (now - self._last_refill) / 60
+        self._last_refill = now
+
+        if self.requests_per_minute:
+            self._request_bucket = min(
+                self.requests_per_minute,
+                self._request_bucket + elapsed_minutes * self.requests_per_minute,
+            )
+        if self.tokens_per_minute:
+            self._token_bucket = min(
+                self.tokens_per_minute,
+                self._token_bucket + elapsed_minutes * self.tokens_per_minute,
+            )
+
+    def _try_acquire(self) -> float:
+        """Tenta consumir uma requisição.
+
+        Returns:
+            0.0 se adquiriu; caso contrário, segundos estimados até haver cota
+        """
+        with self._lock:
+            self._refill()
+
+            waits = []
+            if self.requests_per_minute and self._request_bucket < 1:
+                waits.append((1 - self._request_bucket) * 60 / self.requests_per_minute)
+            if self.tokens_per_minute and self._token_bucket <= 0:
+                waits.append((1 - self._token_bucket) * 60 / self.tokens_per_minute)
+
+            if waits:
+                return max(waits)
+
+            if self.requests_per_minute:
+                self._request_bucket -= 1
+            self.requests += 1
+            return 0.0
+
+    def _record_wait(self, waited: float) -> None:
+        with self._lock:
+            self.throttled_requests += 1
+            self.wait_seconds += waited
+
+    def acquire(self, *, blocking: bool = True) -> bool:
+        """Aguarda (bloqueando a thread) até haver cota para uma requisição."""
+        started = time.monotonic()
+        throttled = False
+        while True:
+            wait = self._try_acquire()
+            if wait == 0.0:
+                if throttled:
+                    self._record_wait(time.monotonic() - started)
+                return True
+            if not blocking:
+                return False
+            throttled = True
+            time.sleep(min(wait, MAX_SLEEP_SECONDS))
+
+    async def aacquire(self, *, blocking: bool = True) -> bool:
+        """Versão assíncrona de `acquire` (não bloqueia o event loop)."""
+        started = time.monotonic()
+        throttled = False
+        while True:
+            wait = self._try_acquire()
+            if wait == 0.0:
+                if throttled:
+                    self._record_wait(time.monotonic() - started)
+                return True
+            if not blocking:
+                return False
+            throttled = True
+            await asyncio.sleep(min(wait, MAX_SLEEP_SECONDS))
+
+    def record_tokens(self, tokens: int) -> None:
+        """Debita do bucket de TPM os tokens efetivamente consumidos."""
+        if tokens <= 0:
+            return
+        with self._lock:
+            self._refill()
+            self.tokens += tokens
+            if self.tokens_per_minute:
+                self._token_bucket -= tokens
+
+    def stats(self) -> Dict[str, Any]:
+        """Retorna os contadores do limiter."""
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "tokens": self.tokens,
+                "throttled_requests": self.throttled_requests,
+                "wait_seconds": round(self.wait_seconds, 2),
+            }
+
+
+def _total_tokens(response: LLMResult) -> int:
+    """Soma total_tokens a partir da usage metadata (ou llm_output) da resposta."""
+    total = 0
+    for generations in response.generations:
+        for generation in generations:
+            message = getattr(generation, "message", None)
+            usage = getattr(message, "usage_metadata", None) or {}
+            total += int(usage.get("total_tokens", 0) or 0)
+
+    if total == 0 and response.llm_output:
+        usage = response.llm_output.get("token_usage") or {}
+        total = int(usage.get("total_tokens", 0) or 0)
+
+    return total
+
+
+class TokenUsageCallback(BaseCallbackHandler):
+    """Callback que debita do limiter os tokens reportados em cada resposta."""
+
+    def __init__(self, limiter: TokenBucketRateLimiter):
+        self.limiter = limiter
+
+    def on_llm_end(self, response: LLMResult, **kwargs: Any) -> None:
+        self.limiter.record_tokens(_total_tokens(response))
+
+
+_limiters: Dict[str, TokenBucketRateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def _read_limit(names: Tuple[str, ...], default: float) -> float:
+    for name in names:
+        raw_value = os.getenv(name)
+        if raw_value is None or raw_value.strip() == "":
+            continue
+        try:
+            return max(0.0, float(raw_value))
+        except ValueError:
+            logger.warning(f"{name} inválido ({raw_value}); ignorando")
+    return default
+
+
+def get_rate_limiter(provider: str, model: str) -> Optional[TokenBucketRateLimiter]:
+    """Retorna o limiter compartilhado de (provider, modelo), ou None se sem limites.
+
+    Args:
+        provider: Provider de LLM (ex: "google", "openai")
+        model: Nome do modelo
+
+    Returns:
+        Instância compartilhada entre todos os LLMs do mesmo provider/modelo
+    """
+    default_rpm, default_tpm = DEFAULT_PROVIDER_LIMITS.get(provider, (0, 0))
+    prefix = provider.upper()
+    rpm = _read_limit((f"{prefix}_RPM_LIMIT", "LLM_RPM_LIMIT"), default_rpm)
+    tpm = _read_limit((f"{prefix}_TPM_LIMIT", "LLM_TPM_LIMIT"), default_tpm)
+
+    if not rpm and not tpm:
+        return None
+
+    name = f"{provider}/{model}"
+    with _limiters_lock:
+        limiter = _limiters.get(name)
+        if limiter is None:
+            limiter = TokenBucketRateLimiter(name, requests_per_minute=rpm, tokens_per_minute=tpm)
+            _limiters[name] = limiter
+            logger.info(f"Rate limit ativo para {name}: {rpm:g} RPM, {tpm:g} TPM")
+        return limiter
+
+
+def print_rate_limit_stats() -> None:
+    """Exibe requisições, tokens e tempo de espera por limiter no resumo final."""
+    with _limiters_lock:
+        limiters = list(_limiters.values())
+
+    for limiter in limiters:
+        stats = limiter.stats()
+        print(
+            f"Rate limit [{limiter.name}]: {stats['requests']} requisições, "
+            f"{stats['tokens']} tokens, {stats['throttled_requests']} aguardaram "
+            f"(espera total {stats['wait_seconds']:.1f}s)"
+        )
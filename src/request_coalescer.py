@@ -0,0 +1,161 @@
+"""
+Coalescência de requisições idênticas ao LLM dentro de uma execução.
+
+Responsabilidades:
+- Identificar cada requisição de geração/judge pelo mesmo hash do cache de
+  respostas (namespace, modelo, temperatura, prompt completo)
+- Compartilhar uma única chamada pendente entre todos os chamadores
+  idênticos, tanto na engine de threads quanto na async
+- Reaproveitar o resultado já obtido durante a execução, mesmo com o cache
+  persistente desligado
+- Contar as chamadas economizadas por namespace para o resumo final
+
+Exemplos duplicados no dataset (bug reports idênticos vindos de pipelines de
+feedback) geram o mesmo prompt de geração e, com a mesma resposta, os mesmos
+prompts de judge: cada requisição distinta é paga uma única vez. Falhas não
+são memorizadas; a próxima requisição idêntica tenta novamente.
+
+Configuração via .env:
+- LLM_COALESCE_ENABLED=true
+- LLM_COALESCE_MAX_ENTRIES=10000   (resultados concluídos mantidos na execução)
+"""
+
+import asyncio
+import logging
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class RequestCoalescer:
+    """Mapa chave -> Future compartilhado entre requisições idênticas (seguro entre threads)."""
+
+    def __init__(self, max_entries: int = 10000):
+        """
+        Inicializa o coalescedor.
+
+        Args:
+            max_entries: Máximo de resultados concluídos mantidos (os mais antigos saem primeiro)
+        """
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._futures: "OrderedDict[str, Future]" = OrderedDict()
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    def _claim(self, namespace: str, key: str) -> Tuple[Future, bool]:
+        """Retorna o Future da requisição e se o chamador é o responsável por executá-la."""
+        with self._lock:
+            counters = self._stats.setdefault(namespace, {"requests": 0, "shared": 0})
+            future = self._futures.get(key)
+            if future is not None:
+                self._futures.move_to_end(key)
+                counters["shared"] += 1
+                return future, False
+
+            future = Future()
+            self._futures[key] = future
+            counters["requests"] += 1
+            return future, True
+
+    def _resolve(self, key: str, future: Future, value: Any) -> None:
+        future.set_result(value)
+        with self._lock:
+            while len(self._futures) > self.max_entries:
+                oldest = next(iter(self._futures.values()))
+                if not oldest.done():
+                    break
+                self._futures.popitem(last=False)
+
+    def _fail(self, key: str, future: Future, error: BaseException) -> None:
+        with self._lock:
+            if self._futures.get(key) is future:
+                del self._futures[key]
+        future.set_exception(error)
+
+    def run(self, namespace: str, key: str, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """Executa `fn` uma única vez por chave; chamadores idênticos aguardam o mesmo resultado.
+
+        Returns:
+            Tupla (resultado, True se reaproveitado de outra requisição)
+        """
+        future, leader = self._claim(namespace, key)
+        if not leader:
+            return future.result(), True
+
+        try:
+            value = fn()
+        except BaseException as e:
+            self._fail(key, future, e)
+            raise
+        self._resolve(key, future, value)
+        return value, False
+
+    async def arun(self, namespace: str, key: str, coroutine_fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """Versão assíncrona de `run` (o mesmo mapa atende threads e asyncio)."""
+        future, leader = self._claim(namespace, key)
+        if not leader:
+            return await asyncio.wrap_future(future), True
+
+        try:
+            value = await coroutine_fn()
+        except BaseException as e:
+            self._fail(key, future, e)
+            raise
+        self._resolve(key, future, value)
+        return value, False
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Retorna cópia dos contadores (requisições executadas/reaproveitadas) por namespace."""
+        with self._lock:
+            return {namespace: dict(counters) for namespace, counters in self._stats.items()}
+
+
+@lru_cache(maxsize=1)
+def get_request_coalescer() -> Optional[RequestCoalescer]:
+    """Retorna o coalescedor compartilhado do processo, ou None se desabilitado."""
+    if os.getenv("LLM_COALESCE_ENABLED", "true").strip().lower() not in {"1", "true", "yes", "y", "on"}:
+        return None
+
+    try:
+        max_entries = int(os.getenv("LLM_COALESCE_MAX_ENTRIES", "10000"))
+    except ValueError:
+        logger.warning("LLM_COALESCE_MAX_ENTRIES inválido; usando 10000")
+        max_entries = 10000
+    return RequestCoalescer(max_entries=max(0, max_entries))
+
+
+def coalesce(namespace: str, key: str, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+    """Executa `fn` via coalescedor do processo (ou diretamente, se desabilitado)."""
+    coalescer = get_request_coalescer()
+    if coalescer is None:
+        return fn(), False
+    return coalescer.run(namespace, key, fn)
+
+
+async def acoalesce(namespace: str, key: str, coroutine_fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+    """Versão assíncrona de `coalesce`."""
+    coalescer = get_request_coalescer()
+    if coalescer is None:
+        return await coroutine_fn(), False
+    return await coalescer.arun(namespace, key, coroutine_fn)
+
+
+def print_coalescer_stats() -> None:
+    """Exibe as chamadas economizadas por requisições idênticas no resumo final."""
+    coalescer = get_request_coalescer()
+    if coalescer is None:
+        return
+
+    for namespace, counters in sorted(coalescer.stats().items()):
+        if not counters["shared"]:
+            continue
+        total = counters["requests"] + counters["shared"]
+        print(
+            f"Requisições idênticas [{namespace}]: {counters['shared']} de {total} "
+            f"reaproveitadas na execução ({counters['shared'] / total:.0%})"
+        )
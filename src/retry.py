@@ -0,0 +1,241 @@
+"""
+Retry com backoff exponencial e jitter para chamadas de LLM.
+
+Responsabilidades:
+- Classificar erros transitórios (429, 5xx, timeouts, falhas de conexão)
+- Repetir a chamada com backoff exponencial "full jitter"
+- Limitar o total de retentativas do processo (retry budget)
+- Contabilizar retentativas e falhas por rótulo (métrica / geração)
+
+Erros não transitórios (ex: 400, 401, credenciais ausentes, cota ou crédito
+esgotados) são propagados imediatamente, sem consumir o orçamento.
+
+Configuração via .env:
+- LLM_RETRY_MAX_ATTEMPTS=5      (tentativas por chamada, incluindo a primeira)
+- LLM_RETRY_BASE_DELAY=1.0      (segundos; dobra a cada tentativa)
+- LLM_RETRY_MAX_DELAY=30.0      (teto do atraso entre tentativas)
+- LLM_RETRY_BUDGET=200          (retentativas totais permitidas no processo)
+"""
+
+import asyncio
+import logging
+import os
+import random
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+TRANSIENT_STATUS_CODES = {408, 425, 429, 500, 502, 503, 504}
+
+# Nomes de exceções (OpenAI, Google, httpx) que indicam falha transitória
+TRANSIENT_ERROR_NAMES = (
+    "RateLimitError",
+    "APITimeoutError",
+    "APIConnectionError",
+    "InternalServerError",
+    "ResourceExhausted",
+    "ServiceUnavailable",
+    "DeadlineExceeded",
+    "TooManyRequests",
+    "TimeoutException",
+    "ConnectError",
+    "ReadTimeout",
+)
+
+TRANSIENT_MESSAGE_MARKERS = (
+    "429",
+    "rate limit",
+    "resource exhausted",
+    "resource_exhausted",
+    "too many requests",
+    "quota",
+    "timed out",
+    "timeout",
+    "temporarily unavailable",
+    "service unavailable",
+    "overloaded",
+    "502",
+    "503",
+    "504",
+)
+
+# Cota/crédito esgotados: chegam como 429, mas não se resolvem com espera
+PERMANENT_MESSAGE_MARKERS = (
+    "insufficient_quota",
+    "exceeded your current quota",
+    "billing",
+    "credit balance",
+)
+
+
+def _status_code(error: BaseException) -> Optional[int]:
+    for candidate in (
+        getattr(error, "status_code", None),
+        getattr(error, "code", None),
+        getattr(getattr(error, "response", None), "status_code", None),
+    ):
+        if isinstance(candidate, int):
+            return candidate
+    return None
+
+
+def is_transient_error(error: BaseException) -> bool:
+    """Indica se o erro é transitório (vale a pena tentar novamente).
+
+    Args:
+        error: Exceção levantada pela chamada ao LLM
+
+    Returns:
+        True para 429, 5xx, timeouts e falhas de conexão; False para cota ou
+        crédito esgotados (ex: insufficient_quota da OpenAI), mesmo com status 429
+    """
+    message = str(error).lower()
+    code = getattr(error, "code", None)
+    if code == "insufficient_quota" or any(marker in message for marker in PERMANENT_MESSAGE_MARKERS):
+        return False
+
+    status = _status_code(error)
+    if status is not None:
+        return status in TRANSIENT_STATUS_CODES or 500 <= status < 600
+
+    if isinstance(error, (TimeoutError, ConnectionError, asyncio.TimeoutError)):
+        return True
+
+    if type(error).__name__ in TRANSIENT_ERROR_NAMES:
+        return True
+
+    return any(marker in message for marker in TRANSIENT_MESSAGE_MARKERS)
+
+
+class RetryPolicy:
+    """Política de retry compartilhada pelo processo (backoff + orçamento + contadores)."""
+
+    def __init__(
+        self,
+        max_attempts: int = 5,
+        base_delay: float = 1.0,
+        max_delay: float = 30.0,
+        budget: int = 200
+    ):
+        """
+        Inicializa a política.
+
+        Args:
+            max_attempts: Tentativas por chamada, incluindo a primeira
+            base_delay: Atraso base (segundos) da primeira retentativa
+            max_delay: Teto do atraso entre tentativas
+            budget: Total de retentativas permitidas no processo
+        """
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budget = budget
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, int]] = {}
+        self._budget_warned = False
+
+    def _counters(self, label: str) -> Dict[str, int]:
+        return self._stats.setdefault(label, {"calls": 0, "retries": 0, "failures": 0})
+
+    def _record(self, label: str, field: str) -> None:
+        with self._lock:
+            self._counters(label)[field] += 1
+
+    def _next_delay(self, label: str, attempt: int, error: BaseException) -> Optional[float]:
+        """Decide se há nova tentativa; retorna o atraso ou None para desistir."""
+        if attempt >= self.max_attempts or not is_transient_error(error):
+            return None
+
+        with self._lock:
+            if self.budget <= 0:
+                if not self._budget_warned:
+                    logger.warning("Orçamento de retries esgotado; falhas transitórias não serão mais repetidas")
+                    self._budget_warned = True
+                return None
+            self.budget -= 1
+            self._counters(label)["retries"] += 1
+
+        # Full jitter: atraso uniforme entre 0 e o teto exponencial
+        ceiling = min(self.max_delay, self.base_delay * (2 ** (attempt - 1)))
+        delay = random.uniform(0, ceiling)
+        logger.info(f"Erro transitório em '{label}' (tentativa {attempt}): {error}. Nova tentativa em {delay:.1f}s")
+        return delay
+
+    def call(self, fn: Callable[[], Any], label: str) -> Any:
+        """Executa `fn` com retry; propaga o último erro se todas as tentativas falharem."""
+        self._record(label, "calls")
+        attempt = 1
+        while True:
+            try:
+                return fn()
+            except Exception as error:
+                delay = self._next_delay(label, attempt, error)
+                if delay is None:
+                    self._record(label, "failures")
+                    raise
+                time.sleep(delay)
+                attempt += 1
+
+    async def acall(self, fn: Callable[[], Awaitable[Any]], label: str) -> Any:
+        """Versão assíncrona de `call` (`fn` retorna uma nova corrotina a cada tentativa)."""
+        self._record(label, "calls")
+        attempt = 1
+        while True:
+            try:
+                return await fn()
+            except Exception as error:
+                delay = self._next_delay(label, attempt, error)
+                if delay is None:
+                    self._record(label, "failures")
+                    raise
+                await asyncio.sleep(delay)
+                attempt += 1
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Retorna cópia dos contadores (chamadas, retentativas, falhas) por rótulo."""
+        with self._lock:
+            return {label: dict(counters) for label, counters in self._stats.items()}
+
+
+_policy: Optional[RetryPolicy] = None
+_policy_lock = threading.Lock()
+
+
+def get_retry_policy() -> RetryPolicy:
+    """Retorna a política de retry do processo, configurada pelo .env."""
+    global _policy
+    with _policy_lock:
+        if _policy is None:
+            try:
+                _policy = RetryPolicy(
+                    max_attempts=int(os.getenv("LLM_RETRY_MAX_ATTEMPTS", "5")),
+                    base_delay=float(os.getenv("LLM_RETRY_BASE_DELAY", "1.0")),
+                    max_delay=float(os.getenv("LLM_RETRY_MAX_DELAY", "30.0")),
+                    budget=int(os.getenv("LLM_RETRY_BUDGET", "200")),
+                )
+            except ValueError:
+                logger.warning("Configuração de retry inválida no .env; usando padrões")
+                _policy = RetryPolicy()
+        return _policy
+
+
+def call_with_retry(fn: Callable[[], Any], label: str) -> Any:
+    """Executa `fn` com a política de retry do processo."""
+    return get_retry_policy().call(fn, label)
+
+
+async def acall_with_retry(fn: Callable[[], Awaitable[Any]], label: str) -> Any:
+    """Versão assíncrona de `call_with_retry`."""
+    return await get_retry_policy().acall(fn, label)
+
+
+def print_retry_stats() -> None:
+    """Exibe retentativas e falhas por rótulo no resumo final."""
+    for label, counters in sorted(get_retry_policy().stats().items()):
+        if counters["retries"] or counters["failures"]:
+            print(
+                f"Retries [{label}]: {counters['retries']} retentativas, "
+                f"{counters['failures']} falhas em {counters['calls']} chamadas"
+            )
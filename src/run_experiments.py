@@ -7,29 +7,41 @@ Uso:
 Config via .env (opcional):
     EXPERIMENT_DATASET_IDS=e67caca1-6997-440e-98cf-84a567e6cbee,38f7fd39-e3ab-48dd-acc5-f562fed8f62b
   EXPERIMENT_MAX_EXAMPLES=15
+  EVAL_SAMPLING=first        # primeiros do dataset (stratified = amostra proporcional por complexidade/tamanho)
   EXPERIMENT_PREFIX=bug-to-user-story
   EVAL_PROMPT_NAME=viviane-pereira/viviane-pereira
+  EVAL_JUDGE_MODE=combined   # 1 chamada ao judge por exemplo em vez de 7
+  EVAL_ENGINE=async          # aevaluate + ainvoke, até EVAL_MAX_IN_FLIGHT em voo
 """
 
+import asyncio
 import os
 from datetime import datetime
 from typing import Any, Dict, List
 
 from dotenv import load_dotenv
-from langchain import hub
 from langsmith import Client
-from langsmith.evaluation import evaluate
+from langsmith.evaluation import aevaluate, evaluate
 
+from eval_config import get_eval_engine, get_judge_mode, get_max_in_flight
 from metrics import (
+    METRIC_REGISTRY,
+    aevaluate_all_metrics,
+    aevaluate_metric,
     evaluate_acceptance_criteria_score,
+    evaluate_all_metrics,
     evaluate_clarity,
     evaluate_completeness_score,
     evaluate_f1_score,
     evaluate_precision,
     evaluate_tone_score,
     evaluate_user_story_format_score,
+    get_evaluator_llm,
 )
-from utils import check_env_vars, get_llm
+from prompt_cache import pull_prompt
+from sampling import StratifiedSampler, sampling_mode, sampling_seed
+from usage import report_usage, set_current_prompt
+from utils import agenerate_answer, check_env_vars, generate_answer, get_llm
 
 load_dotenv()
 
@@ -55,52 +67,107 @@ def _answer_from_outputs(outputs: Dict[str, Any] | None) -> str:
     return str(outputs.get("answer") or "")
 
 
+def _feedback(metric_key: str, result: Dict[str, Any]) -> Dict[str, Any]:
+    """Feedback do LangSmith para uma métrica; avaliação com erro vai sem score (não 0.0)."""
+    score = None if result.get("error") else float(result.get("score", 0.0))
+    return {"key": metric_key, "score": score, "comment": result.get("reasoning", "")}
+
+
 def make_target(prompt_name: str):
     llm = get_llm(temperature=0)
-    prompt = hub.pull(prompt_name)
-    chain = prompt | llm
+    prompt = pull_prompt(prompt_name)
 
     def target(inputs: Dict[str, Any]) -> Dict[str, Any]:
-        response = chain.invoke(inputs)
-        content = getattr(response, "content", str(response))
-        return {"answer": content}
+        return {"answer": generate_answer(prompt, inputs, llm)}
+
+    return target
+
+
+def make_async_target(prompt_name: str):
+    llm = get_llm(temperature=0)
+    prompt = pull_prompt(prompt_name)
+
+    async def target(inputs: Dict[str, Any]) -> Dict[str, Any]:
+        return {"answer": await agenerate_answer(prompt, inputs, llm)}
 
     return target
 
 
+def make_async_evaluator(metric_key: str):
+    """Cria avaliador assíncrono (aevaluate) para uma métrica de METRIC_REGISTRY."""
+    async def evaluator(inputs: Dict[str, Any], outputs: Dict[str, Any], reference_outputs: Dict[str, Any]):
+        result = await aevaluate_metric(metric_key, _question_from_inputs(inputs), _answer_from_outputs(outputs), _reference_from_outputs(reference_outputs))
+        return _feedback(metric_key, result)
+
+    evaluator.__name__ = f"aevaluator_{metric_key}"
+    return evaluator
+
+
 def evaluator_f1(inputs: Dict[str, Any], outputs: Dict[str, Any], reference_outputs: Dict[str, Any]):
     result = evaluate_f1_score(_question_from_inputs(inputs), _answer_from_outputs(outputs), _reference_from_outputs(reference_outputs))
-    return {"key": "f1_score", "score": float(result.get("score", 0.0)), "comment": result.get("reasoning", "")}
+    return _feedback("f1_score", result)
 
 
 def evaluator_clarity(inputs: Dict[str, Any], outputs: Dict[str, Any], reference_outputs: Dict[str, Any]):
     result = evaluate_clarity(_question_from_inputs(inputs), _answer_from_outputs(outputs), _reference_from_outputs(reference_outputs))
-    return {"key": "clarity", "score": float(result.get("score", 0.0)), "comment": result.get("reasoning", "")}
+    return _feedback("clarity", result)
 
 
 def evaluator_precision(inputs: Dict[str, Any], outputs: Dict[str, Any], reference_outputs: Dict[str, Any]):
     result = evaluate_precision(_question_from_inputs(inputs), _answer_from_outputs(outputs), _reference_from_outputs(reference_outputs))
-    return {"key": "precision", "score": float(result.get("score", 0.0)), "comment": result.get("reasoning", "")}
+    return _feedback("precision", result)
 
 
 def evaluator_tone(inputs: Dict[str, Any], outputs: Dict[str, Any], reference_outputs: Dict[str, Any]):
     result = evaluate_tone_score(_question_from_inputs(inputs), _answer_from_outputs(outputs), _reference_from_outputs(reference_outputs))
-    return {"key": "tone_score", "score": float(result.get("score", 0.0)), "comment": result.get("reasoning", "")}
+    return _feedback("tone_score", result)
 
 
 def evaluator_acceptance(inputs: Dict[str, Any], outputs: Dict[str, Any], reference_outputs: Dict[str, Any]):
     result = evaluate_acceptance_criteria_score(_question_from_inputs(inputs), _answer_from_outputs(outputs), _reference_from_outputs(reference_outputs))
-    return {"key": "acceptance_criteria_score", "score": float(result.get("score", 0.0)), "comment": result.get("reasoning", "")}
+    return _feedback("acceptance_criteria_score", result)
 
 
 def evaluator_user_story_format(inputs: Dict[str, Any], outputs: Dict[str, Any], reference_outputs: Dict[str, Any]):
     result = evaluate_user_story_format_score(_question_from_inputs(inputs), _answer_from_outputs(outputs), _reference_from_outputs(reference_outputs))
-    return {"key": "user_story_format_score", "score": float(result.get("score", 0.0)), "comment": result.get("reasoning", "")}
+    return _feedback("user_story_format_score", result)
 
 
 def evaluator_completeness(inputs: Dict[str, Any], outputs: Dict[str, Any], reference_outputs: Dict[str, Any]):
     result = evaluate_completeness_score(_question_from_inputs(inputs), _answer_from_outputs(outputs), _reference_from_outputs(reference_outputs))
-    return {"key": "completeness_score", "score": float(result.get("score", 0.0)), "comment": result.get("reasoning", "")}
+    return _feedback("completeness_score", result)
+
+
+def evaluator_combined(inputs: Dict[str, Any], outputs: Dict[str, Any], reference_outputs: Dict[str, Any]):
+    """Avalia as 7 métricas com uma única chamada ao judge (EVAL_JUDGE_MODE=combined)."""
+    results = evaluate_all_metrics(_question_from_inputs(inputs), _answer_from_outputs(outputs), _reference_from_outputs(reference_outputs))
+    return {"results": [_feedback(key, result) for key, result in results.items()]}
+
+
+async def aevaluator_combined(inputs: Dict[str, Any], outputs: Dict[str, Any], reference_outputs: Dict[str, Any]):
+    """Versão assíncrona de `evaluator_combined`."""
+    results = await aevaluate_all_metrics(_question_from_inputs(inputs), _answer_from_outputs(outputs), _reference_from_outputs(reference_outputs))
+    return {"results": [_feedback(key, result) for key, result in results.items()]}
+
+
+async def _arun_experiment(prompt_name: str, examples: List[Any], experiment_prefix: str, combined: bool) -> Any:
+    """Executa um experimento com `aevaluate` (geração e judges via `ainvoke`)."""
+    # Clientes async ficam presos ao event loop em que foram usados
+    get_evaluator_llm.cache_clear()
+
+    target = make_async_target(prompt_name)
+    if combined:
+        evaluators = [aevaluator_combined]
+    else:
+        evaluators = [make_async_evaluator(key) for key in METRIC_REGISTRY]
+
+    return await aevaluate(
+        target,
+        data=examples,
+        evaluators=evaluators,
+        experiment_prefix=experiment_prefix,
+        max_concurrency=get_max_in_flight(),
+    )
 
 
 def _dataset_ids() -> List[str]:
@@ -128,24 +195,34 @@ def main() -> int:
     max_examples = int(os.getenv("EXPERIMENT_MAX_EXAMPLES", "15"))
     prefix = os.getenv("EXPERIMENT_PREFIX", "bug-to-user-story")
 
-    target = make_target(prompt_name)
-    evaluators = [
-        evaluator_f1,
-        evaluator_clarity,
-        evaluator_precision,
-        evaluator_tone,
-        evaluator_acceptance,
-        evaluator_user_story_format,
-        evaluator_completeness,
-    ]
+    use_async = get_eval_engine() == "async"
+    combined = get_judge_mode() == "combined"
+
+    target = None if use_async else make_target(prompt_name)
+    if combined:
+        evaluators = [evaluator_combined]
+    else:
+        evaluators = [
+            evaluator_f1,
+            evaluator_clarity,
+            evaluator_precision,
+            evaluator_tone,
+            evaluator_acceptance,
+            evaluator_user_story_format,
+            evaluator_completeness,
+        ]
 
     print(f"Prompt avaliado: {prompt_name}")
+    set_current_prompt(prompt_name)
     print(f"Max exemplos por dataset: {max_examples}")
 
     for dataset_id in _dataset_ids():
         dataset = client.read_dataset(dataset_id=dataset_id)
         examples = list(client.list_examples(dataset_id=dataset_id))
-        selected = examples[:max_examples]
+        if sampling_mode() == "stratified":
+            selected = StratifiedSampler(examples, sample_size=max_examples, seed=sampling_seed()).draw()
+        else:
+            selected = examples[:max_examples]
 
         experiment_prefix = f"{prefix}-{dataset.name}-{datetime.now().strftime('%Y%m%d-%H%M%S')}"
         print("=" * 70)
@@ -153,13 +230,16 @@ def main() -> int:
         print(f"Exemplos: {len(selected)}/{len(examples)}")
         print(f"Experiment prefix: {experiment_prefix}")
 
-        results = evaluate(
-            target,
-            data=selected,
-            evaluators=evaluators,
-            experiment_prefix=experiment_prefix,
-            max_concurrency=1,
-        )
+        if use_async:
+            results = asyncio.run(_arun_experiment(prompt_name, selected, experiment_prefix, combined))
+        else:
+            results = evaluate(
+                target,
+                data=selected,
+                evaluators=evaluators,
+                experiment_prefix=experiment_prefix,
+                max_concurrency=1,
+            )
 
         experiment_name = getattr(results, "experiment_name", None)
         if experiment_name:
@@ -168,6 +248,7 @@ def main() -> int:
             print("✅ Experimento executado com sucesso")
 
     print("\nConcluído: experimentos e avaliadores executados no LangSmith.")
+    report_usage()
     return 0
 
 
@@ -0,0 +1,242 @@
+"""
+Amostragem estratificada de exemplos de avaliação.
+
+Responsabilidades:
+- Agrupar os exemplos em estratos por complexidade do bug (metadata
+  "complexity": simple/medium/complex) e tamanho do bug report (short/medium/long)
+- Garantir uma amostra mínima por estrato (piloto) e distribuir o restante
+  proporcionalmente ao tamanho de cada estrato
+- Estimar as médias ponderando cada estrato pelo seu tamanho na população,
+  em vez da média simples dos exemplos avaliados (corrige o piloto, que
+  super-representa os estratos pequenos)
+
+A alocação não depende de scores: a avaliação (evaluate.py) sorteia a amostra
+uma única vez por execução com `draw`, antes de avaliar qualquer prompt. Com a
+semente fixa, a amostra é a mesma para todos os prompts comparados e se repete
+entre execuções (aproveitando cache de respostas e checkpoints). Para agrupar,
+o dataset inteiro é listado; o modo padrão (first) seleciona em streaming.
+
+Configuração via .env:
+- EVAL_SAMPLING=first          (first: os primeiros exemplos do dataset | stratified)
+- EVAL_SAMPLING_SEED=42        (semente da amostra estratificada; mude para sortear outra)
+"""
+
+import logging
+import math
+import os
+import random
+from collections import deque
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+COMPLEXITY_LEVELS = ("simple", "medium", "complex")
+
+# Limites (em caracteres) dos buckets de tamanho do bug report
+LENGTH_BUCKETS = ((150, "short"), (500, "medium"))
+
+# Semente padrão da amostra (EVAL_SAMPLING_SEED)
+DEFAULT_SEED = 42
+
+
+def _example_inputs(example: Any) -> Dict[str, Any]:
+    inputs = example.get("inputs") if isinstance(example, dict) else getattr(example, "inputs", None)
+    return inputs if isinstance(inputs, dict) else {}
+
+
+def _example_metadata(example: Any) -> Dict[str, Any]:
+    metadata = example.get("metadata") if isinstance(example, dict) else getattr(example, "metadata", None)
+    return metadata if isinstance(metadata, dict) else {}
+
+
+def stratum_key(example: Any) -> str:
+    """Estrato do exemplo: '<complexidade>/<tamanho>' (ex: 'medium/short')."""
+    complexity = str(_example_metadata(example).get("complexity", "")).strip().lower()
+    if complexity not in COMPLEXITY_LEVELS:
+        complexity = "unknown"
+
+    inputs = _example_inputs(example)
+    text = inputs.get("bug_report") or inputs.get("question") or ""
+    length = next((label for limit, label in LENGTH_BUCKETS if len(str(text)) < limit), "long")
+
+    return f"{complexity}/{length}"
+
+
+def _weighted_mean(values_by_stratum: Dict[str, List[float]], sizes: Dict[str, int]) -> float:
+    """Média das médias por estrato, ponderada pelo tamanho de cada estrato na população.
+
+    Estratos sem valores são excluídos e os pesos, renormalizados.
+    """
+    total_weight = 0.0
+    weighted_sum = 0.0
+    for key, values in values_by_stratum.items():
+        if values:
+            total_weight += sizes.get(key, 0)
+            weighted_sum += sizes.get(key, 0) * sum(values) / len(values)
+    return weighted_sum / total_weight if total_weight else 0.0
+
+
+class _Stratum:
+    def __init__(self, key: str, examples: List[Any]):
+        self.key = key
+        self.population = len(examples)
+        self.pool = deque(examples)
+        self.sampled = 0
+
+
+class StratifiedSampler:
+    """Iterador de exemplos com amostragem estratificada proporcional (após um piloto por estrato)."""
+
+    def __init__(
+        self,
+        population: Iterable[Any],
+        sample_size: Optional[int] = None,
+        token_budget: Optional[int] = None,
+        estimate_tokens: Optional[Callable[[Any], int]] = None,
+        min_per_stratum: int = 2,
+        seed: Optional[int] = None
+    ):
+        """
+        Inicializa o sampler.
+
+        Args:
+            population: Todos os exemplos candidatos
+            sample_size: Total de exemplos a avaliar (None = sem limite de quantidade)
+            token_budget: Orçamento de tokens da amostra (requer `estimate_tokens`)
+            estimate_tokens: Estimativa de tokens para avaliar um exemplo
+            min_per_stratum: Exemplos do piloto por estrato (antes da alocação proporcional)
+            seed: Semente da ordem aleatória dentro de cada estrato
+        """
+        rng = random.Random(seed)
+        grouped: Dict[str, List[Any]] = {}
+        for example in population:
+            grouped.setdefault(stratum_key(example), []).append(example)
+        for examples in grouped.values():
+            rng.shuffle(examples)
+
+        # Estratos maiores primeiro: com orçamento curto, o piloto cobre os mais representativos
+        self.strata = {
+            key: _Stratum(key, examples)
+            for key, examples in sorted(grouped.items(), key=lambda item: (-len(item[1]), item[0]))
+        }
+        self.population_size = sum(stratum.population for stratum in self.strata.values())
+        self.sample_size = self.population_size if sample_size is None else min(sample_size, self.population_size)
+        self.token_budget = token_budget
+        self.estimate_tokens = estimate_tokens
+        self.min_per_stratum = max(1, min_per_stratum)
+        self.estimated_tokens = 0
+
+    @property
+    def sampled(self) -> int:
+        return sum(stratum.sampled for stratum in self.strata.values())
+
+    def _next_stratum(self) -> Optional[_Stratum]:
+        available = [stratum for stratum in self.strata.values() if stratum.pool]
+        if not available:
+            return None
+
+        pilot = [stratum for stratum in available if stratum.sampled < self.min_per_stratum]
+        if pilot:
+            return min(pilot, key=lambda stratum: stratum.sampled)
+
+        # Alocação proporcional sequencial (Huntington-Hill): o estrato mais sub-representado
+        return max(
+            available,
+            key=lambda stratum: stratum.population / math.sqrt(stratum.sampled * (stratum.sampled + 1)),
+        )
+
+    def __iter__(self) -> Iterator[Any]:
+        while self.sampled < self.sample_size:
+            stratum = self._next_stratum()
+            if stratum is None:
+                return
+
+            example = stratum.pool[0]
+            if self.token_budget is not None and self.estimate_tokens is not None:
+                estimated = self.estimate_tokens(example)
+                if self.sampled and self.estimated_tokens + estimated > self.token_budget:
+                    return
+                self.estimated_tokens += estimated
+
+            stratum.pool.popleft()
+            stratum.sampled += 1
+            yield example
+
+    def draw(self) -> "StratifiedSample":
+        """Sorteia a amostra inteira de uma vez."""
+        examples = list(self)
+        return StratifiedSample(examples, {key: stratum.population for key, stratum in self.strata.items()})
+
+
+class StratifiedSample(list):
+    """Amostra já sorteada: a lista de exemplos e o tamanho de cada estrato na população.
+
+    Como a amostra é fixa, os scores de cada prompt são informados junto com o
+    exemplo correspondente (`scored`), e não acumulados no sampler.
+    """
+
+    def __init__(self, examples: Iterable[Any], strata_sizes: Dict[str, int]):
+        super().__init__(examples)
+        self.strata_sizes = dict(strata_sizes)
+
+    def _group(self, scored: Iterable[Tuple[Any, Dict[str, Optional[float]]]], metric: str) -> Dict[str, List[float]]:
+        grouped: Dict[str, List[float]] = {}
+        for example, scores in scored:
+            value = (scores or {}).get(metric)
+            if value is not None:
+                grouped.setdefault(stratum_key(example), []).append(value)
+        return grouped
+
+    def weighted_averages(
+        self,
+        scored: List[Tuple[Any, Dict[str, Optional[float]]]],
+        metric_keys: Iterable[str]
+    ) -> Dict[str, float]:
+        """Média de cada métrica ponderada pelo tamanho dos estratos na população.
+
+        Args:
+            scored: Pares (exemplo, scores por métrica) avaliados
+            metric_keys: Métricas a agregar
+        """
+        return {metric: _weighted_mean(self._group(scored, metric), self.strata_sizes) for metric in metric_keys}
+
+    def print_summary(self, overall: List[Tuple[Any, Optional[float]]]) -> None:
+        """Exibe a amostra por estrato (amostrados/população, média e desvio padrão do score geral)."""
+        print("   Amostragem estratificada (amostrados/população):")
+        sampled: Dict[str, int] = {}
+        for example in self:
+            key = stratum_key(example)
+            sampled[key] = sampled.get(key, 0) + 1
+        grouped = self._group(((example, {"overall": value}) for example, value in overall), "overall")
+
+        for key, population in sorted(self.strata_sizes.items(), key=lambda item: (-item[1], item[0])):
+            values = grouped.get(key, [])
+            if values:
+                mean = sum(values) / len(values)
+                std = (
+                    math.sqrt(sum((value - mean) ** 2 for value in values) / (len(values) - 1))
+                    if len(values) > 1 else 0.0
+                )
+                detail = f"média={mean:.3f} dp={std:.3f}"
+            else:
+                detail = "sem scores"
+            print(f"      {key:<16} {sampled.get(key, 0):>3}/{population:<3} {detail}")
+
+
+def sampling_mode() -> str:
+    """EVAL_SAMPLING: 'first' (padrão: primeiros exemplos, em streaming) ou 'stratified'."""
+    mode = os.getenv("EVAL_SAMPLING", "first").strip().lower()
+    if mode not in {"stratified", "first"}:
+        logger.warning(f"EVAL_SAMPLING inválido ({mode}); usando 'first'")
+        return "first"
+    return mode
+
+
+def sampling_seed() -> int:
+    """EVAL_SAMPLING_SEED (padrão 42): semente fixa, para que a amostra se repita entre execuções."""
+    raw_value = os.getenv("EVAL_SAMPLING_SEED", "").strip()
+    try:
+        return int(raw_value) if raw_value else DEFAULT_SEED
+    except ValueError:
+        logger.warning(f"EVAL_SAMPLING_SEED inválido ({raw_value}); usando {DEFAULT_SEED}")
+        return DEFAULT_SEED
@@ -0,0 +1,91 @@
+"""
+Contagem de tokens por modelo para estimar o consumo da avaliação.
+
+Responsabilidades:
+- Contar tokens com o tokenizer real (tiktoken) do modelo configurado
+- Aproximar modelos sem tokenizer local (ex: Gemini) com o vocabulário o200k_base
+- Usar a heurística de ~4 caracteres por token quando o tiktoken não está
+  instalado ou o vocabulário não pode ser obtido (sem rede e sem cache)
+- Memorizar contagens de textos repetidos (templates, instruções dos judges)
+
+O tiktoken baixa o vocabulário na primeira execução e o mantém em cache
+(diretório em TIKTOKEN_CACHE_DIR); a partir daí funciona offline.
+
+Configuração via .env:
+- TOKEN_COUNTER=auto   (auto | heuristic)
+"""
+
+import logging
+import os
+from functools import lru_cache
+from typing import Any, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+CHARS_PER_TOKEN = 4
+
+# Formatação de chat: tokens extras por mensagem e para iniciar a resposta
+MESSAGE_OVERHEAD_TOKENS = 4
+REPLY_PRIMING_TOKENS = 3
+
+# Vocabulário usado para modelos que o tiktoken não conhece
+FALLBACK_ENCODING = "o200k_base"
+
+
+@lru_cache(maxsize=None)
+def _load_encoding(model: str) -> Optional[Any]:
+    """Retorna o encoding do tiktoken para o modelo, ou None se indisponível."""
+    try:
+        import tiktoken
+    except ImportError:
+        logger.info("tiktoken não instalado; usando estimativa de ~4 caracteres por token")
+        return None
+
+    try:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding(FALLBACK_ENCODING)
+    except Exception as e:
+        logger.warning(f"Tokenizer indisponível para '{model}' ({e}); usando estimativa de ~4 caracteres por token")
+        return None
+
+
+class TokenCounter:
+    """Contador de tokens de um modelo (tiktoken ou heurística)."""
+
+    def __init__(self, model: str, encoding: Optional[Any] = None):
+        """
+        Inicializa o contador.
+
+        Args:
+            model: Nome do modelo (ex: 'gpt-4o-mini', 'gemini-2.5-flash')
+            encoding: Encoding do tiktoken (None = heurística por caracteres)
+        """
+        self.model = model
+        self.encoding = encoding
+        self.name = encoding.name if encoding is not None else "heuristic"
+        self._count_cached = lru_cache(maxsize=8192)(self._count)
+
+    def _count(self, text: str) -> int:
+        if self.encoding is None:
+            return max(1, len(text) // CHARS_PER_TOKEN)
+        return len(self.encoding.encode(text, disallowed_special=()))
+
+    def count(self, text: str) -> int:
+        """Tokens de um texto."""
+        if not text:
+            return 0
+        return self._count_cached(text)
+
+    def count_messages(self, messages: Iterable[str]) -> int:
+        """Tokens de entrada de uma chamada de chat com as mensagens dadas."""
+        return sum(self.count(content) + MESSAGE_OVERHEAD_TOKENS for content in messages) + REPLY_PRIMING_TOKENS
+
+
+@lru_cache(maxsize=None)
+def get_token_counter(model: str) -> TokenCounter:
+    """Retorna o contador de tokens do modelo (um por processo)."""
+    if os.getenv("TOKEN_COUNTER", "auto").strip().lower() == "heuristic":
+        return TokenCounter(model)
+    return TokenCounter(model, _load_encoding(model))
@@ -0,0 +1,240 @@
+"""
+Contabilização de tokens e custo a partir da usage metadata das respostas.
+
+Responsabilidades:
+- Ler os tokens de entrada/saída reportados pelo provider em cada resposta
+  de geração e de judge (`usage_metadata` do LangChain, ou `token_usage`)
+- Agregar chamadas, tokens e custo por prompt, por métrica e por modelo
+- Contar respostas servidas pelo cache (sem consumo de tokens) e chamadas ao
+  judge dispensadas pela heurística (EVAL_TIERED_SCORING)
+- Exibir o resumo no final da execução e exportá-lo em JSON
+
+O prompt em avaliação é definido com `set_current_prompt`: os prompts são
+avaliados um de cada vez, e todas as chamadas (de qualquer thread) são
+atribuídas ao prompt corrente.
+
+Configuração via .env:
+- USAGE_EXPORT_PATH=               (opcional; ex: results/usage.json)
+- LLM_PRICES={"modelo": [entrada, saída]}   (opcional; USD por 1M tokens)
+"""
+
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from llm_cache import llm_identity
+
+logger = logging.getLogger(__name__)
+
+# USD por 1M tokens (entrada, saída); modelos ausentes são contabilizados sem custo
+MODEL_PRICES: Dict[str, Tuple[float, float]] = {
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4.1": (2.00, 8.00),
+    "gpt-4.1-mini": (0.40, 1.60),
+    "gemini-2.5-pro": (1.25, 10.00),
+    "gemini-2.5-flash": (0.30, 2.50),
+    "gemini-2.0-flash": (0.10, 0.40),
+}
+
+DIMENSIONS = ("prompt", "label", "model")
+
+# "Modelo" das avaliações decididas só pela heurística, sem chamada ao judge
+HEURISTIC_MODEL = "heuristic"
+
+
+def _load_prices() -> Dict[str, Tuple[float, float]]:
+    prices = dict(MODEL_PRICES)
+    raw_value = os.getenv("LLM_PRICES", "").strip()
+    if raw_value:
+        try:
+            prices.update({model: (float(price[0]), float(price[1])) for model, price in json.loads(raw_value).items()})
+        except (ValueError, TypeError, IndexError, AttributeError):
+            logger.warning("LLM_PRICES inválido; usando a tabela de preços padrão")
+    return prices
+
+
+def _price_for(model: str, prices: Dict[str, Tuple[float, float]]) -> Optional[Tuple[float, float]]:
+    """Preço do modelo; versões datadas (ex: gpt-4o-2024-08-06) usam o prefixo mais longo."""
+    name = model.lower().removeprefix("models/")
+    if name in prices:
+        return prices[name]
+    matches = [key for key in prices if name.startswith(key)]
+    return prices[max(matches, key=len)] if matches else None
+
+
+def extract_usage(response: Any) -> Tuple[int, int]:
+    """Tokens (entrada, saída) reportados na resposta do chat model; (0, 0) se ausentes."""
+    usage = getattr(response, "usage_metadata", None) or {}
+    if usage:
+        return int(usage.get("input_tokens", 0) or 0), int(usage.get("output_tokens", 0) or 0)
+
+    token_usage = (getattr(response, "response_metadata", None) or {}).get("token_usage") or {}
+    return int(token_usage.get("prompt_tokens", 0) or 0), int(token_usage.get("completion_tokens", 0) or 0)
+
+
+class UsageTracker:
+    """Acumulador de uso (chamadas, tokens, custo) por prompt, métrica e modelo."""
+
+    def __init__(self, prices: Optional[Dict[str, Tuple[float, float]]] = None):
+        """
+        Inicializa o acumulador.
+
+        Args:
+            prices: USD por 1M tokens (entrada, saída) por modelo (padrão: MODEL_PRICES + LLM_PRICES)
+        """
+        self.prices = prices if prices is not None else _load_prices()
+        self.current_prompt = "-"
+        self._lock = threading.Lock()
+        self._entries: Dict[Tuple[str, str, str], Dict[str, float]] = {}
+        # (prompt, métrica) -> [dispensadas, julgadas]: uma decisão por exemplo × métrica
+        self._tier_decisions: Dict[Tuple[str, str], List[int]] = {}
+        self._unpriced_models: set[str] = set()
+
+    def set_current_prompt(self, prompt_name: str) -> None:
+        self.current_prompt = prompt_name
+
+    def _entry(self, label: str, model: str) -> Dict[str, float]:
+        key = (self.current_prompt, label, model)
+        return self._entries.setdefault(
+            key,
+            {"calls": 0, "cached_calls": 0, "skipped_calls": 0, "input_tokens": 0, "output_tokens": 0, "cost_usd": 0.0}
+        )
+
+    def record(self, label: str, model: str, input_tokens: int, output_tokens: int) -> None:
+        """Registra uma chamada ao LLM."""
+        price = _price_for(model, self.prices)
+        cost = (input_tokens * price[0] + output_tokens * price[1]) / 1_000_000 if price else 0.0
+        with self._lock:
+            entry = self._entry(label, model)
+            entry["calls"] += 1
+            entry["input_tokens"] += input_tokens
+            entry["output_tokens"] += output_tokens
+            entry["cost_usd"] += cost
+            if price is None:
+                self._unpriced_models.add(model)
+
+    def record_cached(self, label: str, model: str) -> None:
+        """Registra uma resposta servida pelo cache (sem consumo de tokens)."""
+        with self._lock:
+            self._entry(label, model)["cached_calls"] += 1
+
+    def record_tier_decision(self, label: str, skipped: bool) -> None:
+        """Registra a decisão do modo em camadas para uma métrica de um exemplo.
+
+        Conta avaliações, não chamadas: re-perguntas e o modo combined não
+        alteram o total.
+        """
+        with self._lock:
+            if skipped:
+                self._entry(label, HEURISTIC_MODEL)["skipped_calls"] += 1
+            decisions = self._tier_decisions.setdefault((self.current_prompt, label), [0, 0])
+            decisions[0 if skipped else 1] += 1
+
+    def judge_skip_counts(self, prompt_name: Optional[str] = None) -> Tuple[int, int]:
+        """(avaliações dispensadas, total de avaliações em camadas), opcionalmente de um prompt."""
+        skipped = total = 0
+        with self._lock:
+            for (prompt, _label), (skipped_count, judged_count) in self._tier_decisions.items():
+                if prompt_name is not None and prompt != prompt_name:
+                    continue
+                skipped += skipped_count
+                total += skipped_count + judged_count
+        return skipped, total
+
+    def totals_by(self, dimension: str) -> Dict[str, Dict[str, float]]:
+        """Totais agregados por 'prompt', 'label' (métrica/geração) ou 'model'."""
+        index = DIMENSIONS.index(dimension)
+        totals: Dict[str, Dict[str, float]] = {}
+        with self._lock:
+            for key, entry in self._entries.items():
+                target = totals.setdefault(key[index], dict.fromkeys(entry, 0))
+                for field, value in entry.items():
+                    target[field] += value
+        return totals
+
+    def export(self, path: str) -> None:
+        """Grava o detalhamento (prompt × métrica × modelo) e os totais em JSON."""
+        with self._lock:
+            entries = [
+                {"prompt": prompt, "label": label, "model": model, **entry}
+                for (prompt, label, model), entry in sorted(self._entries.items())
+            ]
+        report = {
+            "entries": entries,
+            "by_prompt": self.totals_by("prompt"),
+            "by_metric": self.totals_by("label"),
+            "by_model": self.totals_by("model"),
+            "unpriced_models": sorted(self._unpriced_models),
+        }
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+    def print_summary(self) -> None:
+        """Exibe tokens e custo por prompt, métrica e modelo."""
+        if not self._entries:
+            return
+
+        for dimension, title in (("prompt", "prompt"), ("label", "métrica"), ("model", "modelo")):
+            print(f"Uso por {title}:")
+            for name, totals in sorted(self.totals_by(dimension).items()):
+                skipped = f", {int(totals['skipped_calls'])} heurística" if totals["skipped_calls"] else ""
+                print(
+                    f"   {name:<28} {int(totals['calls']):>5} chamadas ({int(totals['cached_calls'])} cache{skipped}) "
+                    f"{int(totals['input_tokens']):>9} in {int(totals['output_tokens']):>8} out "
+                    f"${totals['cost_usd']:.4f}"
+                )
+        skipped, total = self.judge_skip_counts()
+        if skipped:
+            print(f"   ⚡ Judges dispensados pela heurística: {skipped}/{total} ({skipped / total:.0%})")
+        if self._unpriced_models:
+            print(f"   ⚠️  Sem preço configurado (custo 0): {', '.join(sorted(self._unpriced_models))}")
+
+
+_tracker: Optional[UsageTracker] = None
+_tracker_lock = threading.Lock()
+
+
+def get_usage_tracker() -> UsageTracker:
+    """Retorna o acumulador de uso do processo."""
+    global _tracker
+    with _tracker_lock:
+        if _tracker is None:
+            _tracker = UsageTracker()
+        return _tracker
+
+
+def set_current_prompt(prompt_name: str) -> None:
+    """Atribui as chamadas seguintes ao prompt informado."""
+    get_usage_tracker().set_current_prompt(prompt_name)
+
+
+def record_usage(response: Any, llm: Any, label: str) -> None:
+    """Registra a usage metadata de uma resposta do LLM."""
+    input_tokens, output_tokens = extract_usage(response)
+    get_usage_tracker().record(label, llm_identity(llm)["model"], input_tokens, output_tokens)
+
+
+def record_cached_usage(llm: Any, label: str) -> None:
+    """Registra uma resposta servida pelo cache de respostas."""
+    get_usage_tracker().record_cached(label, llm_identity(llm)["model"])
+
+
+def record_tier_decision(label: str, skipped: bool) -> None:
+    """Registra se a métrica foi decidida pela heurística ou enviada ao judge (modo em camadas)."""
+    get_usage_tracker().record_tier_decision(label, skipped)
+
+
+def report_usage() -> None:
+    """Exibe o resumo de uso e, se USAGE_EXPORT_PATH estiver definido, exporta em JSON."""
+    tracker = get_usage_tracker()
+    tracker.print_summary()
+
+    export_path = os.getenv("USAGE_EXPORT_PATH", "").strip()
+    if export_path:
+        tracker.export(export_path)
+        print(f"Uso exportado para {export_path}")
@@ -3,21 +3,31 @@ Funções auxiliares para o projeto de otimização de prompts.
 
 Responsabilidades:
 - Gerenciamento de arquivo YAML e JSON
+- Leitura lazy de datasets JSONL (inclusive .gz / .zst)
 - Validação de variáveis de ambiente
 - Inicialização de LLM com múltiplos providers
+- Geração de respostas com cache persistente
 - Extração e formatação de respostas
 """
 
 import os
+import gzip
+import io
 import json
 import logging
 from enum import Enum
 from pathlib import Path
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Iterator, Optional, List, TextIO
 
 import yaml
 from dotenv import load_dotenv
 
+from llm_cache import get_response_cache, make_cache_key
+from rate_limiter import TokenBucketRateLimiter, TokenUsageCallback, get_rate_limiter
+from request_coalescer import acoalesce, coalesce
+from retry import acall_with_retry, call_with_retry
+from usage import record_cached_usage, record_usage
+
 # Configurar logger
 logger = logging.getLogger(__name__)
 
@@ -137,6 +147,56 @@ def save_yaml(data: Dict[str, Any], file_path: str) -> bool:
         return False
 
 
+def _open_text(file_path: Path) -> TextIO:
+    """Abre arquivo texto UTF-8, descomprimindo .gz e .zst/.zstd em streaming."""
+    suffix = file_path.suffix.lower()
+
+    if suffix == ".gz":
+        return gzip.open(file_path, "rt", encoding="utf-8")
+
+    if suffix in {".zst", ".zstd"}:
+        try:
+            import zstandard
+        except ImportError as e:
+            raise RuntimeError(
+                f"Leitura de {file_path} requer o pacote 'zstandard' (pip install zstandard)"
+            ) from e
+        reader = zstandard.ZstdDecompressor().stream_reader(
+            open(file_path, "rb"), read_across_frames=True, closefd=True
+        )
+        return io.TextIOWrapper(reader, encoding="utf-8")
+
+    return open(file_path, "r", encoding="utf-8")
+
+
+def iter_jsonl(file_path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Lê um arquivo JSONL de forma lazy, um registro por vez.
+
+    Arquivos .gz e .zst/.zstd são descomprimidos em streaming, sem carregar
+    o conteúdo inteiro em memória. Linhas vazias são ignoradas.
+
+    Args:
+        file_path: Caminho do arquivo JSONL (opcionalmente comprimido)
+
+    Yields:
+        Dicionário de cada linha do arquivo
+
+    Raises:
+        FileNotFoundError: Se o arquivo não existir
+        json.JSONDecodeError: Se uma linha não for JSON válido (com o nº da linha)
+    """
+    with _open_text(Path(file_path)) as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as e:
+                raise json.JSONDecodeError(f"linha {line_number}: {e.msg}", e.doc, e.pos) from e
+
+
 def check_env_vars(required_vars: List[str]) -> bool:
     """
     Verifica se variáveis de ambiente obrigatórias estão configuradas.
@@ -176,47 +236,6 @@ def format_score(score: float, threshold: float = 0.9) -> str:
     return f"{score:.2f} {symbol}"
 
 
-def extract_json_from_response(response_text: str) -> Optional[Dict[str, Any]]:
-    """
-    Extrai JSON de uma resposta LLM que pode conter texto adicional.
-    
-    Estratégia:
-    1. Tenta parse direto
-    2. Tenta extrair JSON entre chaves
-    3. Retorna None se nenhuma estratégia funcionar
-
-    Args:
-        response_text: Texto da resposta do LLM
-
-    Returns:
-        Dicionário extraído ou None se não encontrar JSON válido
-    """
-    if not response_text or not isinstance(response_text, str):
-        logger.warning("Response text vazia ou não é string")
-        return None
-    
-    # Estratégia 1: Parse direto
-    try:
-        return json.loads(response_text)
-    except json.JSONDecodeError:
-        pass
-    
-    # Estratégia 2: Extrair JSON entre chaves
-    start = response_text.find("{")
-    end = response_text.rfind("}") + 1
-
-    if start != -1 and end > start:
-        try:
-            json_str = response_text[start:end]
-            return json.loads(json_str)
-        except json.JSONDecodeError:
-            logger.warning(f"JSON inválido encontrado: {json_str[:100]}...")
-            pass
-
-    logger.warning(f"Não foi possível extrair JSON válido: {response_text[:200]}...")
-    return None
-
-
 def get_llm(model: Optional[str] = None, temperature: float = 0.0) -> Any:
     """Factory para criar instância de LLM baseado no provider configurado.
 
@@ -224,6 +243,10 @@ def get_llm(model: Optional[str] = None, temperature: float = 0.0) -> Any:
     - OpenAI (ChatOpenAI)
     - Google Gemini (ChatGoogleGenerativeAI)
 
+    Todas as instâncias do mesmo provider/modelo compartilham um rate limiter
+    (RPM/TPM, ver rate_limiter.py), de modo que chamadas excedentes aguardam
+    cota em vez de falhar.
+
     Args:
         model: Nome do modelo (usa LLM_MODEL do .env por padrão)
         temperature: Temperatura para geração (0.0 = determinístico)
@@ -245,14 +268,27 @@ def get_llm(model: Optional[str] = None, temperature: float = 0.0) -> Any:
             f"Use: {', '.join(p.value for p in LLMProvider)}"
         )
 
+    limiter = get_rate_limiter(provider.value, model_name)
+
     if provider == LLMProvider.OPENAI:
-        return _create_openai_llm(model_name, temperature)
+        return _create_openai_llm(model_name, temperature, limiter)
     elif provider == LLMProvider.GOOGLE:
-        return _create_google_llm(model_name, temperature)
+        return _create_google_llm(model_name, temperature, limiter)
 
 
-def _create_openai_llm(model_name: str, temperature: float) -> Any:
-    """Cria LLM OpenAI com validação de credenciais."""
+def _rate_limit_kwargs(limiter: Optional[TokenBucketRateLimiter]) -> Dict[str, Any]:
+    """Parâmetros do chat model para aplicar o rate limiter compartilhado."""
+    if limiter is None:
+        return {}
+    return {"rate_limiter": limiter, "callbacks": [TokenUsageCallback(limiter)]}
+
+
+def _create_openai_llm(model_name: str, temperature: float, limiter: Optional[TokenBucketRateLimiter] = None) -> Any:
+    """Cria LLM OpenAI com validação de credenciais.
+
+    Retries do SDK ficam desligados: erros transitórios são repetidos pelo
+    módulo retry, com backoff e orçamento compartilhados.
+    """
     from langchain_openai import ChatOpenAI
 
     api_key = os.getenv("OPENAI_API_KEY")
@@ -267,11 +303,13 @@ def _create_openai_llm(model_name: str, temperature: float) -> Any:
         model=model_name,
         temperature=temperature,
         api_key=api_key,
-        timeout=60
+        timeout=60,
+        max_retries=0,
+        **_rate_limit_kwargs(limiter)
     )
 
 
-def _create_google_llm(model_name: str, temperature: float) -> Any:
+def _create_google_llm(model_name: str, temperature: float, limiter: Optional[TokenBucketRateLimiter] = None) -> Any:
     """Cria LLM Google Gemini com validação de credenciais."""
     from langchain_google_genai import ChatGoogleGenerativeAI
 
@@ -286,7 +324,9 @@ def _create_google_llm(model_name: str, temperature: float) -> Any:
     return ChatGoogleGenerativeAI(
         model=model_name,
         temperature=temperature,
-        google_api_key=api_key
+        google_api_key=api_key,
+        max_retries=0,
+        **_rate_limit_kwargs(limiter)
     )
 
 
@@ -305,6 +345,87 @@ def get_eval_llm(temperature: float = 0.0) -> Any:
     return get_llm(model=eval_model, temperature=temperature)
 
 
+def generate_answer(prompt_template: Any, inputs: Dict[str, Any], llm: Any) -> str:
+    """Executa `prompt_template | llm` reaproveitando respostas já geradas.
+
+    A chave do cache é o hash das mensagens renderizadas (papel + conteúdo),
+    do modelo e da temperatura. Assim, alterar apenas uma métrica reavalia as
+    respostas armazenadas sem gerá-las novamente; alterar o prompt, o exemplo
+    ou o modelo invalida a entrada naturalmente. Requisições idênticas em voo
+    (ex: bug reports duplicados no dataset) compartilham uma única chamada
+    (ver request_coalescer.py).
+
+    Args:
+        prompt_template: ChatPromptTemplate puxado do Hub
+        inputs: Variáveis de entrada do exemplo
+        llm: Modelo de linguagem configurado
+
+    Returns:
+        Conteúdo textual da resposta gerada
+    """
+    prompt_value = prompt_template.invoke(inputs)
+    cache_key = _generation_cache_key(prompt_value, llm)
+    content, shared = coalesce("generation", cache_key, lambda: _generate(prompt_value, llm, cache_key))
+    if shared:
+        record_cached_usage(llm, "generation")
+    return content
+
+
+def _generate(prompt_value: Any, llm: Any, cache_key: str) -> str:
+    """Consulta o cache persistente e, em caso de miss, chama o modelo de geração."""
+    cache = get_response_cache()
+    if cache is not None:
+        cached = cache.get(cache_key, namespace="generation")
+        if cached is not None:
+            record_cached_usage(llm, "generation")
+            return cached
+
+    response = call_with_retry(lambda: llm.invoke(prompt_value), "generation")
+    record_usage(response, llm, "generation")
+    content = getattr(response, "content", str(response))
+
+    if cache is not None and content:
+        cache.set(cache_key, "generation", content)
+    return content
+
+
+async def agenerate_answer(prompt_template: Any, inputs: Dict[str, Any], llm: Any) -> str:
+    """Versão assíncrona de `generate_answer` (usa `ainvoke`, mesmo cache)."""
+    prompt_value = await prompt_template.ainvoke(inputs)
+    cache_key = _generation_cache_key(prompt_value, llm)
+    content, shared = await acoalesce("generation", cache_key, lambda: _agenerate(prompt_value, llm, cache_key))
+    if shared:
+        record_cached_usage(llm, "generation")
+    return content
+
+
+async def _agenerate(prompt_value: Any, llm: Any, cache_key: str) -> str:
+    """Versão assíncrona de `_generate`."""
+    cache = get_response_cache()
+    if cache is not None:
+        cached = cache.get(cache_key, namespace="generation")
+        if cached is not None:
+            record_cached_usage(llm, "generation")
+            return cached
+
+    response = await acall_with_retry(lambda: llm.ainvoke(prompt_value), "generation")
+    record_usage(response, llm, "generation")
+    content = getattr(response, "content", str(response))
+
+    if cache is not None and content:
+        cache.set(cache_key, "generation", content)
+    return content
+
+
+def _generation_cache_key(prompt_value: Any, llm: Any) -> str:
+    """Chave de cache a partir das mensagens renderizadas (papel + conteúdo)."""
+    rendered = [
+        {"type": message.type, "content": message.content}
+        for message in prompt_value.to_messages()
+    ]
+    return make_cache_key("generation", llm, rendered)
+
+
 # =============================================================================
 # Funções de compatibilidade com testes existentes
 # =============================================================================
@@ -0,0 +1,81 @@
+"""
+Testes do checkpoint de execuções de avaliação (sem chamadas externas).
+"""
+import sys
+from pathlib import Path as P
+
+import pytest
+
+# Adicionar src ao path
+sys.path.insert(0, str(P(__file__).parent.parent / "src"))
+
+import evaluate
+from checkpoint import RunCheckpoint, checkpoint_for_run, example_id
+
+
+def make_example(bug_report, example_id=None):
+    return type("Example", (), {
+        "id": example_id,
+        "inputs": {"bug_report": bug_report},
+        "outputs": {"reference": "ref"},
+    })()
+
+
+class TestRunCheckpoint:
+    def test_append_and_load_roundtrip(self, tmp_path):
+        checkpoint = RunCheckpoint(str(tmp_path / "run.jsonl"))
+        checkpoint.append("ex-1", "resposta", {"f1_score": {"score": 0.9, "reasoning": "ok"}})
+
+        records = checkpoint.load()
+        assert records["ex-1"]["answer"] == "resposta"
+        assert records["ex-1"]["scores"] == {"f1_score": 0.9}
+        assert records["ex-1"]["reasoning"] == {"f1_score": "ok"}
+
+    def test_truncated_line_is_ignored(self, tmp_path):
+        path = tmp_path / "run.jsonl"
+        checkpoint = RunCheckpoint(str(path))
+        checkpoint.append("ex-1", "resposta", {"f1_score": {"score": 0.9}})
+        with open(path, "a", encoding="utf-8") as f:
+            f.write('{"example_id": "ex-2", "answ')
+
+        assert list(checkpoint.load()) == ["ex-1"]
+
+    def test_run_config_changes_checkpoint_path(self, tmp_path):
+        base = dict(dataset_name="ds", model="m", eval_model="e", judge_mode="individual", directory=str(tmp_path))
+        first = checkpoint_for_run("org/prompt", metric_keys=["f1_score"], **base)
+        same = checkpoint_for_run("org/prompt", metric_keys=["f1_score"], **base)
+        other = checkpoint_for_run("org/prompt", metric_keys=["f1_score", "clarity"], **base)
+
+        assert first.path == same.path
+        assert first.path != other.path
+        assert "/" not in first.path.name
+
+    def test_example_id_falls_back_to_content_hash(self):
+        assert example_id(make_example("bug", example_id="abc")) == "abc"
+        assert example_id(make_example("bug")) == example_id(make_example("bug"))
+        assert example_id(make_example("bug")) != example_id(make_example("outro bug"))
+
+
+class TestResume:
+    def test_only_fully_scored_examples_are_checkpointed(self, tmp_path, monkeypatch):
+        """Exemplos com métrica que falhou não são gravados e serão reavaliados."""
+        def fake_example(prompt_template, example, llm):
+            return {"answer": f"resposta {example.id}", "question": "q", "reference": "r"}
+
+        def fake_judges(question, answer, reference, parallel):
+            error = answer.endswith("2")
+            return {"f1_score": {"score": 0.0 if error else 0.8, "reasoning": "", "error": error}}
+
+        monkeypatch.setattr(evaluate, "evaluate_prompt_on_example", fake_example)
+        monkeypatch.setattr(evaluate, "_judge_results", fake_judges)
+
+        checkpoint = RunCheckpoint(str(tmp_path / "run.jsonl"))
+        examples = [make_example(str(i), example_id=str(i)) for i in range(1, 4)]
+        scores = [s for s, _ in evaluate._iter_example_scores(None, examples, None, 1, checkpoint)]
+
+        assert scores == [{"f1_score": 0.8}, {"f1_score": None}, {"f1_score": 0.8}]
+        assert sorted(checkpoint.load()) == ["1", "3"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
@@ -0,0 +1,110 @@
+"""
+Testes da detecção de quase duplicados do dataset (MinHash + LSH, sem chamadas externas).
+"""
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+# Adicionar src ao path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+import dataset_dedup
+from dataset_dedup import EMPTY_SIGNATURE, MinHasher, cluster_records, find_clusters, lsh_params
+
+BASE = (
+    "Botão de finalizar compra não responde no checkout mobile quando o carrinho tem mais de dez itens "
+    "e o cupom de desconto foi aplicado antes do frete ser calculado pelo sistema"
+)
+TEXTS = [
+    BASE,
+    "Relatório mensal de vendas exporta CSV vazio para usuários com perfil de gerente regional",
+    BASE + " (ticket 1234)",
+    "",
+    BASE.replace("Botão", "BOTÃO") + "!",
+    "Login com Google falha no Safari",
+    "   ",
+]
+
+
+def jaccard(a, b, size=2):
+    def shingles(text):
+        tokens = dataset_dedup._normalize_text(text).split()
+        return {" ".join(tokens[i:i + size]) for i in range(max(len(tokens) - size + 1, 1))}
+    return len(shingles(a) & shingles(b)) / len(shingles(a) | shingles(b))
+
+
+class TestMinHash:
+    def test_signature_agreement_estimates_jaccard(self):
+        other = BASE.replace("mais de dez itens", "muitos itens diferentes")
+        signatures = MinHasher(num_perm=256).signatures([BASE, other])
+        estimate = (signatures[0] == signatures[1]).mean()
+        assert estimate == pytest.approx(jaccard(BASE, other), abs=0.1)
+
+    def test_signatures_are_reproducible_and_chunk_independent(self, monkeypatch):
+        expected = MinHasher(seed=7).signatures(TEXTS)
+        monkeypatch.setattr(dataset_dedup, "ROWS_PER_CHUNK", 2)
+        assert np.array_equal(MinHasher(seed=7).signatures(TEXTS), expected)
+
+    def test_empty_texts_get_empty_signature(self):
+        signatures = MinHasher().signatures(["", "!!!", "ok"])
+        assert (signatures[:2] == EMPTY_SIGNATURE).all()
+        assert (signatures[2] != EMPTY_SIGNATURE).any()
+
+    def test_lsh_params_match_threshold(self):
+        bands, rows = lsh_params(0.8, 128)
+        assert bands * rows <= 128
+        assert (1 / bands) ** (1 / rows) == pytest.approx(0.8, abs=0.05)
+
+
+class TestClusters:
+    def test_near_duplicates_are_clustered_with_first_occurrence(self):
+        labels = find_clusters(MinHasher().signatures(TEXTS), threshold=0.8)
+
+        assert labels.tolist() == [0, 1, 0, 3, 0, 5, 6]
+
+    def test_members_similar_to_each_other_but_not_to_the_leader(self):
+        """Bucket com líder dissimilar: os demais membros ainda são comparados entre si."""
+        bands, rows = lsh_params(0.8, 128)
+        rng = np.random.default_rng(0)
+        base = rng.integers(0, 2**31, 128, dtype=np.uint32)
+        leader = rng.integers(0, 2**31, 128, dtype=np.uint32)
+        leader[:rows] = base[:rows]
+        variant = base.copy()
+        # Difere em uma posição de cada banda (exceto a primeira): só divide bucket com o líder
+        variant[np.arange(1, bands) * rows] += 1
+
+        labels = find_clusters(np.stack([leader, base, variant]), threshold=0.8)
+
+        assert labels.tolist() == [0, 1, 1]
+
+    def test_cluster_records(self):
+        labels = find_clusters(MinHasher().signatures(TEXTS), threshold=0.8)
+        clusters = cluster_records(labels, TEXTS)
+
+        assert len(clusters) == 1
+        assert clusters[0]["representative"] == 0
+        assert clusters[0]["members"] == [0, 2, 4]
+        assert clusters[0]["bug_reports"][1].endswith("(ticket 1234)")
+
+
+class TestCli:
+    def test_writes_clusters_and_deduplicated_dataset(self, tmp_path, monkeypatch):
+        source = tmp_path / "dataset.jsonl"
+        with open(source, "w", encoding="utf-8") as f:
+            for index, text in enumerate(TEXTS):
+                f.write(json.dumps({"inputs": {"bug_report": text}, "outputs": {"reference": str(index)}}) + "\n")
+
+        monkeypatch.setattr(sys, "argv", ["dataset_dedup.py", str(source)])
+        assert dataset_dedup.main() == 0
+
+        kept = [json.loads(line) for line in (tmp_path / "dataset.dedup.jsonl").read_text(encoding="utf-8").splitlines()]
+        clusters = (tmp_path / "dataset.clusters.jsonl").read_text(encoding="utf-8").splitlines()
+        assert [record["outputs"]["reference"] for record in kept] == ["0", "1", "3", "5", "6"]
+        assert len(clusters) == 1
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
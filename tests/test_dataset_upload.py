@@ -0,0 +1,161 @@
+"""
+Testes do upload e da sincronização de datasets contra um stand-in local da API do LangSmith.
+"""
+import json
+import sys
+import threading
+import uuid
+from pathlib import Path as P
+
+import pytest
+
+# Adicionar src ao path
+sys.path.insert(0, str(P(__file__).parent.parent / "src"))
+
+import evaluate
+from dataset_sync import CONTENT_HASH_FIELD
+
+
+class FakeLangSmithClient:
+    """Stand-in em memória dos endpoints de dataset usados pelo pipeline."""
+
+    def __init__(self):
+        self.datasets = {}
+        self.examples = {}
+        self.requests = 0
+        self.updated = 0
+        self.deleted = 0
+        self._lock = threading.Lock()
+
+    def list_datasets(self, dataset_name=None):
+        return [ds for ds in self.datasets.values() if dataset_name in (None, ds.name)]
+
+    def create_dataset(self, dataset_name):
+        dataset = type("Dataset", (), {"id": uuid.uuid4(), "name": dataset_name})()
+        self.datasets[dataset.id] = dataset
+        self.examples[dataset.id] = []
+        return dataset
+
+    def create_examples(self, *, inputs, outputs=None, metadata=None, dataset_id=None, **kwargs):
+        outputs = outputs or [None] * len(inputs)
+        metadata = metadata or [None] * len(inputs)
+        with self._lock:
+            self.requests += 1
+            for example_inputs, example_outputs, example_metadata in zip(inputs, outputs, metadata):
+                self.examples[dataset_id].append({
+                    "id": uuid.uuid4(),
+                    "inputs": example_inputs,
+                    "outputs": example_outputs,
+                    "metadata": example_metadata,
+                })
+
+    def create_example(self, **kwargs):
+        raise AssertionError("upload deve usar create_examples em lotes")
+
+    def list_examples(self, dataset_id=None, **kwargs):
+        return [type("Example", (), dict(example))() for example in self.examples[dataset_id]]
+
+    def update_examples(self, *, example_ids, inputs, outputs, metadata, **kwargs):
+        with self._lock:
+            self.requests += 1
+            for example_id, example_inputs, example_outputs, example_metadata in zip(
+                example_ids, inputs, outputs, metadata
+            ):
+                for examples in self.examples.values():
+                    for example in examples:
+                        if example["id"] == example_id:
+                            example.update(inputs=example_inputs, outputs=example_outputs, metadata=example_metadata)
+                            self.updated += 1
+
+    def delete_example(self, example_id):
+        with self._lock:
+            self.requests += 1
+            for dataset_id, examples in self.examples.items():
+                self.examples[dataset_id] = [example for example in examples if example["id"] != example_id]
+            self.deleted += 1
+
+
+def write_dataset(path, n, changed=(), start=0):
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(start, n):
+            record = {
+                "inputs": {"bug_report": f"bug {i}"},
+                "outputs": {"reference": f"história {i}" + (" (revisada)" if i in changed else "")},
+                "metadata": {"index": i},
+            }
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+class TestBulkUpload:
+    def test_uploads_in_batches(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("EVAL_UPLOAD_BATCH_SIZE", "100")
+        monkeypatch.setenv("EVAL_UPLOAD_WORKERS", "4")
+        path = tmp_path / "dataset.jsonl"
+        write_dataset(path, 1050)
+
+        client = FakeLangSmithClient()
+        evaluate.create_evaluation_dataset(client, "ds", str(path))
+
+        (uploaded,) = client.examples.values()
+        assert client.requests == 11
+        assert len(uploaded) == 1050
+        assert sorted(example["metadata"]["index"] for example in uploaded) == list(range(1050))
+
+    def test_existing_dataset_is_not_uploaded_again(self, tmp_path):
+        path = tmp_path / "dataset.jsonl"
+        write_dataset(path, 3)
+
+        client = FakeLangSmithClient()
+        evaluate.create_evaluation_dataset(client, "ds", str(path))
+        evaluate.create_evaluation_dataset(client, "ds", str(path))
+
+        assert client.requests == 1
+
+    def test_empty_example_list_sends_nothing(self):
+        client = FakeLangSmithClient()
+        assert evaluate.upload_examples(client, "id", [], batch_size=10, workers=2) == 0
+        assert client.requests == 0
+
+
+class TestIncrementalSync:
+    def test_only_changed_examples_are_sent(self, tmp_path):
+        path = tmp_path / "dataset.jsonl"
+        client = FakeLangSmithClient()
+        write_dataset(path, 10)
+        evaluate.create_evaluation_dataset(client, "ds", str(path))
+
+        # Remove o exemplo 0, altera o 5 e acrescenta o 10 e o 11
+        write_dataset(path, 12, changed={5}, start=1)
+        client.requests = 0
+        evaluate.create_evaluation_dataset(client, "ds", str(path))
+
+        (remote,) = client.examples.values()
+        assert client.updated == 1
+        assert client.deleted == 1
+        assert client.requests == 3
+        assert sorted(example["metadata"]["index"] for example in remote) == list(range(1, 12))
+        revised = [example for example in remote if example["metadata"]["index"] == 5]
+        assert revised[0]["outputs"]["reference"].endswith("(revisada)")
+
+    def test_legacy_examples_without_hash_are_adopted(self, tmp_path):
+        """Exemplos enviados sem hashes são casados pelos inputs e só atualizados."""
+        path = tmp_path / "dataset.jsonl"
+        write_dataset(path, 3)
+        client = FakeLangSmithClient()
+        dataset = client.create_dataset("ds")
+        client.create_examples(
+            inputs=[{"bug_report": f"bug {i}"} for i in range(3)],
+            outputs=[{"reference": f"história {i}"} for i in range(3)],
+            dataset_id=dataset.id,
+        )
+
+        evaluate.create_evaluation_dataset(client, "ds", str(path))
+
+        remote = client.examples[dataset.id]
+        assert len(remote) == 3
+        assert client.updated == 3
+        assert all(CONTENT_HASH_FIELD in example["metadata"] for example in remote)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
@@ -0,0 +1,164 @@
+"""
+Testes do teste sequencial de parada antecipada (sem chamadas externas).
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+# Adicionar src ao path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+import evaluate
+from sampling import StratifiedSample
+from early_stopping import SequentialMeanTest, early_stop_from_env
+
+
+class TestSequentialMeanTest:
+    def test_no_decision_before_min_samples(self):
+        test = SequentialMeanTest(min_samples=5)
+        for _ in range(4):
+            test.add(1.0)
+        assert test.decision() is None
+
+        test.add(1.0)
+        assert test.decision() == "pass"
+
+    def test_clear_failure(self):
+        test = SequentialMeanTest(min_samples=3)
+        for value in [0.4, 0.5, 0.45]:
+            test.add(value)
+        assert test.decision() == "fail"
+        low, high = test.interval()
+        assert low < test.mean < high < 0.9
+
+    def test_borderline_mean_stays_undecided(self):
+        test = SequentialMeanTest(min_samples=3)
+        for value in [0.85, 0.95] * 10:
+            test.add(value)
+        assert test.mean == pytest.approx(0.9)
+        assert test.decision() is None
+
+    def test_higher_confidence_widens_interval(self):
+        narrow, wide = SequentialMeanTest(confidence=0.9), SequentialMeanTest(confidence=0.99)
+        for value in [0.7, 0.9, 0.8, 1.0]:
+            narrow.add(value)
+            wide.add(value)
+        assert wide.interval()[0] < narrow.interval()[0]
+        assert wide.interval()[1] > narrow.interval()[1]
+
+    def test_env_configuration(self, monkeypatch):
+        monkeypatch.delenv("EVAL_EARLY_STOP", raising=False)
+        assert early_stop_from_env() is None
+
+        monkeypatch.setenv("EVAL_EARLY_STOP", "true")
+        monkeypatch.setenv("EVAL_EARLY_STOP_CONFIDENCE", "0.99")
+        monkeypatch.setenv("EVAL_EARLY_STOP_MIN_EXAMPLES", "8")
+        test = early_stop_from_env()
+        assert (test.confidence, test.min_samples) == (0.99, 8)
+
+        monkeypatch.setenv("EVAL_EARLY_STOP_CONFIDENCE", "2")
+        assert early_stop_from_env().confidence == 0.95
+
+
+class TestEarlyStoppingEvaluation:
+    def test_evaluation_stops_once_decided(self, monkeypatch, tmp_path):
+        consumed = []
+
+        def fake_iter(prompt_template, examples, llm, concurrency, checkpoint=None):
+            for example in examples:
+                consumed.append(example)
+                yield {"f1_score": 0.3, "clarity": 0.4, "precision": 0.35}, 0.1
+
+        monkeypatch.setattr(evaluate, "pull_prompt_from_langsmith", lambda name: "template")
+        monkeypatch.setattr(evaluate, "_iter_example_scores", fake_iter)
+        monkeypatch.setenv("EVAL_CHECKPOINT_DIR", str(tmp_path))
+        monkeypatch.setenv("EVAL_ENGINE", "threads")
+        monkeypatch.setenv("EVAL_BUG_METRICS", "false")
+        monkeypatch.setenv("EVAL_EARLY_STOP", "true")
+        monkeypatch.setenv("EVAL_EARLY_STOP_MIN_EXAMPLES", "4")
+        monkeypatch.setenv("EVAL_EARLY_STOP_SEED", "7")
+
+        examples = [f"e{i}" for i in range(50)]
+        scores = evaluate.evaluate_prompt("org/v1", "ds", None, examples=examples, llm=object())
+
+        assert len(consumed) == 4
+        assert consumed != examples[:4]  # ordem aleatória
+        assert scores["f1_score"] == pytest.approx(0.3)
+
+    def test_resume_stops_when_checkpoint_already_decides(self, monkeypatch, tmp_path):
+        """Ao retomar, o teste sequencial é verificado logo após reaplicar o checkpoint."""
+        consumed = []
+
+        def fake_iter(prompt_template, examples, llm, concurrency, checkpoint=None):
+            for example in examples:
+                consumed.append(example)
+                checkpoint.append(example.id, "resposta", {
+                    "f1_score": {"score": 0.3}, "clarity": {"score": 0.4}, "precision": {"score": 0.35}
+                })
+                yield {"f1_score": 0.3, "clarity": 0.4, "precision": 0.35}, 0.1
+
+        monkeypatch.setattr(evaluate, "_iter_example_scores", fake_iter)
+        monkeypatch.setenv("EVAL_CHECKPOINT_DIR", str(tmp_path))
+        monkeypatch.setenv("EVAL_ENGINE", "threads")
+        monkeypatch.setenv("EVAL_BUG_METRICS", "false")
+        monkeypatch.setenv("EVAL_EARLY_STOP", "true")
+        monkeypatch.setenv("EVAL_EARLY_STOP_MIN_EXAMPLES", "4")
+
+        examples = [type("Example", (), {"id": f"e{i}"})() for i in range(50)]
+        evaluate.evaluate_prompt("org/v1", "ds", None, examples=examples, llm=object(), prompt_template="t")
+        assert len(consumed) == 4
+
+        consumed.clear()
+        scores = evaluate.evaluate_prompt(
+            "org/v1", "ds", None, resume=True, examples=examples, llm=object(), prompt_template="t"
+        )
+
+        assert consumed == []
+        assert scores["f1_score"] == pytest.approx(0.3)
+
+    def test_stratified_sampling_is_disabled(self, monkeypatch):
+        """Com parada antecipada, a média do teste sequencial é a mesma do score final."""
+        examples = [
+            {"inputs": {"bug_report": str(i)}, "outputs": {"reference": ""},
+             "metadata": {"complexity": "simple" if i < 8 else "complex"}}
+            for i in range(10)
+        ]
+        client = type("Client", (), {
+            "read_dataset": lambda self, dataset_name: type("Dataset", (), {"example_count": 10})(),
+            "list_examples": lambda self, dataset_name: iter(examples),
+        })()
+        monkeypatch.setattr(evaluate, "_estimate_example_eval_tokens", lambda example, prompt_template=None: 1)
+        monkeypatch.setenv("EVAL_SAMPLING", "stratified")
+        monkeypatch.setenv("EVAL_ENGINE", "threads")
+        monkeypatch.setenv("EVAL_EARLY_STOP", "true")
+        monkeypatch.delenv("EVAL_TOKEN_LIMIT", raising=False)
+        monkeypatch.delenv("EVAL_MAX_EXAMPLES", raising=False)
+
+        selected = evaluate.load_evaluation_examples(client, "ds")
+
+        assert not isinstance(selected, StratifiedSample)
+        assert selected == examples
+
+    def test_async_engine_keeps_default_cap(self, monkeypatch):
+        """Sem suporte à parada antecipada (async), o limite padrão de exemplos é mantido."""
+        monkeypatch.setenv("EVAL_EARLY_STOP", "true")
+        monkeypatch.setenv("LLM_PROVIDER", "openai")
+        monkeypatch.delenv("EVAL_TOKEN_LIMIT", raising=False)
+        monkeypatch.delenv("EVAL_MAX_EXAMPLES", raising=False)
+
+        monkeypatch.setenv("EVAL_ENGINE", "async")
+        assert evaluate._sample_limits() == (10, None)
+
+        monkeypatch.setenv("EVAL_ENGINE", "threads")
+        assert evaluate._sample_limits() == (None, None)
+
+    def test_overall_score_matches_summary_composition(self):
+        scores = {"f1_score": 0.8, "clarity": 1.0, "precision": 0.6, "tone_score": 0.0, "completeness_score": None}
+        # métricas (0.8, 1.0, 0.6) + helpfulness 0.8 + correctness 0.7
+        assert evaluate._example_overall_score(scores) == pytest.approx(3.9 / 5)
+        assert evaluate._example_overall_score({"f1_score": None}) is None
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
@@ -0,0 +1,274 @@
+"""
+Testes do pipeline de avaliação (sem chamadas externas).
+"""
+import asyncio
+import sys
+import time
+from pathlib import Path as P
+
+import pytest
+
+# Adicionar src ao path
+sys.path.insert(0, str(P(__file__).parent.parent / "src"))
+
+import evaluate
+
+
+class TestConcurrentEvaluation:
+    def test_scores_keep_input_order(self, monkeypatch):
+        """Com vários workers, os scores devem sair na ordem dos exemplos."""
+        def fake_score(prompt_template, example, llm, checkpoint=None):
+            time.sleep(0.01 * (5 - example))
+            return {"f1_score": example / 10, "clarity": 1.0, "precision": 1.0}
+
+        monkeypatch.setattr(evaluate, "_score_example", fake_score)
+
+        results = list(evaluate._iter_example_scores(None, [1, 2, 3, 4], None, concurrency=4))
+        assert [scores["f1_score"] for scores, _ in results] == [0.1, 0.2, 0.3, 0.4]
+        assert all(latency > 0 for _, latency in results)
+
+    def test_examples_are_consumed_in_a_bounded_window(self, monkeypatch):
+        """O iterador de exemplos é consumido aos poucos, não todo de uma vez."""
+        consumed = []
+
+        def example_stream():
+            for example in range(1, 101):
+                consumed.append(example)
+                yield example
+
+        monkeypatch.setattr(
+            evaluate, "_score_example",
+            lambda prompt_template, example, llm, checkpoint=None: {"f1_score": example}
+        )
+
+        results = evaluate._iter_example_scores(None, example_stream(), None, concurrency=2)
+        first_scores, _ = next(results)
+
+        assert first_scores == {"f1_score": 1}
+        assert len(consumed) <= 4
+        results.close()
+
+    def test_selection_stops_pulling_at_the_cap(self, monkeypatch):
+        """A seleção não percorre o dataset além do necessário."""
+        pulled = []
+        monkeypatch.setattr(evaluate, "_estimate_example_eval_tokens", lambda example: 5000)
+
+        def example_stream():
+            for i in range(1000):
+                pulled.append(i)
+                yield type("Example", (), {"inputs": {"bug_report": "x" * 400}, "outputs": {}})()
+
+        selected, _ = evaluate._select_examples(example_stream(), max_examples=5, token_budget=None)
+        assert len(selected) == 5
+        assert len(pulled) == 5
+
+        pulled.clear()
+        selected, consumed = evaluate._select_examples(example_stream(), max_examples=None, token_budget=11000)
+        assert len(selected) == 2
+        assert consumed <= 11000
+        assert len(pulled) == 3
+
+    def test_selection_counts_tokens_of_the_prompt_templates(self, monkeypatch):
+        """A seleção usa o template real (o mais caro), não o overhead fixo."""
+        def fake_estimate(example, prompt_template=None):
+            return {None: 1000, "curto": 500, "longo": 3000}[prompt_template]
+
+        monkeypatch.setattr(evaluate, "_estimate_example_eval_tokens", fake_estimate)
+        examples = [object() for _ in range(10)]
+
+        _, flat = evaluate._select_examples(iter(examples), max_examples=None, token_budget=10000)
+        selected, consumed = evaluate._select_examples(
+            iter(examples), max_examples=None, token_budget=10000, prompt_templates=["curto", "longo"]
+        )
+
+        assert flat == 10000
+        assert (len(selected), consumed) == (3, 9000)
+
+    def test_invalid_concurrency_falls_back_to_sequential(self, monkeypatch):
+        """EVAL_CONCURRENCY inválido deve resultar em execução sequencial."""
+        monkeypatch.setenv("EVAL_CONCURRENCY", "abc")
+        assert evaluate.get_eval_concurrency() == 1
+
+    def test_parallel_judges_match_sequential(self, monkeypatch):
+        """Judges em paralelo devem produzir os mesmos scores da execução serial."""
+        fake_judges = {
+            key: (lambda value: lambda q, a, r: {"score": value})(index / 10)
+            for index, key in enumerate(["f1_score", "clarity", "precision"], 1)
+        }
+        monkeypatch.setattr(evaluate, "CORE_JUDGES", fake_judges)
+        monkeypatch.setenv("EVAL_BUG_METRICS", "false")
+
+        parallel = evaluate._judge_results("q", "a", "r", parallel=True)
+        serial = evaluate._judge_results("q", "a", "r", parallel=False)
+        assert parallel == serial == {
+            "f1_score": {"score": 0.1}, "clarity": {"score": 0.2}, "precision": {"score": 0.3}
+        }
+
+    def test_combined_mode_delegates_to_single_call(self, monkeypatch):
+        """No modo combined, uma única chamada de evaluate_all_metrics cobre todas as métricas."""
+        calls = []
+
+        def fake_all(question, answer, reference, metric_keys):
+            calls.append(metric_keys)
+            return {key: {"score": 0.5} for key in metric_keys}
+
+        monkeypatch.setattr(evaluate, "evaluate_all_metrics", fake_all)
+        monkeypatch.setenv("EVAL_JUDGE_MODE", "combined")
+        monkeypatch.setenv("EVAL_BUG_METRICS", "false")
+
+        results = evaluate._judge_results("q", "a", "r", parallel=True)
+
+        assert len(calls) == 1
+        assert set(results) == set(calls[0])
+        assert all(result == {"score": 0.5} for result in results.values())
+
+
+class TestAsyncEngine:
+    def test_respects_in_flight_cap_and_input_order(self, monkeypatch):
+        """A engine async limita chamadas em voo e mantém a ordem dos exemplos."""
+        in_flight = {"current": 0, "peak": 0}
+
+        async def tracked(value):
+            in_flight["current"] += 1
+            in_flight["peak"] = max(in_flight["peak"], in_flight["current"])
+            await asyncio.sleep(0.01)
+            in_flight["current"] -= 1
+            return value
+
+        async def fake_generate(prompt_template, inputs, llm):
+            return await tracked(f"resposta {inputs['bug_report']}")
+
+        async def fake_metric(key, question, answer, reference):
+            return {"score": await tracked(float(question) / 10)}
+
+        monkeypatch.setattr(evaluate, "agenerate_answer", fake_generate)
+        monkeypatch.setattr(evaluate, "aevaluate_metric", fake_metric)
+        monkeypatch.setenv("EVAL_JUDGE_MODE", "individual")
+        monkeypatch.setenv("EVAL_BUG_METRICS", "false")
+
+        examples = [
+            type("Example", (), {"inputs": {"bug_report": str(i)}, "outputs": {"reference": ""}})()
+            for i in range(1, 7)
+        ]
+        results = asyncio.run(evaluate._aevaluate_examples(None, examples, None, max_in_flight=3))
+
+        assert [scores["f1_score"] for scores, _ in results] == [0.1, 0.2, 0.3, 0.4, 0.5, 0.6]
+        assert in_flight["peak"] == 3
+
+
+class TestMultiPrompt:
+    def test_prompt_names_from_env(self, monkeypatch):
+        monkeypatch.setenv("EVAL_PROMPT_NAMES", "org/v1, org/v2,,org/v1")
+        assert evaluate._prompts_to_evaluate() == ["org/v1", "org/v2"]
+
+        monkeypatch.delenv("EVAL_PROMPT_NAMES")
+        monkeypatch.setenv("EVAL_PROMPT_NAME", "org/v3")
+        assert evaluate._prompts_to_evaluate() == ["org/v3"]
+
+    def test_prompts_share_examples_and_llm(self, monkeypatch, tmp_path):
+        """Com exemplos e LLM compartilhados, nada é recarregado por prompt."""
+        seen = []
+
+        def fake_iter(prompt_template, examples, llm, concurrency, checkpoint=None):
+            seen.append((prompt_template, tuple(examples), llm))
+            for example in examples:
+                yield {"f1_score": 0.9, "clarity": 0.9, "precision": 0.9}, 0.1
+
+        def fail_load(*args):
+            raise AssertionError("exemplos devem ser carregados uma única vez")
+
+        monkeypatch.setattr(evaluate, "pull_prompt_from_langsmith", lambda name: f"template {name}")
+        monkeypatch.setattr(evaluate, "load_evaluation_examples", fail_load)
+        monkeypatch.setattr(evaluate, "get_llm", fail_load)
+        monkeypatch.setattr(evaluate, "_iter_example_scores", fake_iter)
+        monkeypatch.setenv("EVAL_CHECKPOINT_DIR", str(tmp_path))
+        monkeypatch.setenv("EVAL_ENGINE", "threads")
+        monkeypatch.setenv("EVAL_BUG_METRICS", "false")
+        monkeypatch.setenv("EVAL_SAMPLING", "first")
+
+        examples = ["e1", "e2"]
+        llm = object()
+        for name in ["org/v1", "org/v2"]:
+            scores = evaluate.evaluate_prompt(name, "ds", None, examples=examples, llm=llm)
+            assert scores["f1_score"] == 0.9
+
+        assert [template for template, _, _ in seen] == ["template org/v1", "template org/v2"]
+        assert all(used_examples == ("e1", "e2") and used_llm is llm for _, used_examples, used_llm in seen)
+
+    def test_stratified_sample_is_shared_and_weighted(self, monkeypatch, tmp_path):
+        """A amostra estratificada é a mesma para todos os prompts e as médias são ponderadas."""
+        from sampling import StratifiedSample
+
+        seen = []
+
+        def fake_iter(prompt_template, examples, llm, concurrency, checkpoint=None):
+            seen.append(tuple(example["id"] for example in examples))
+            for example in examples:
+                score = 1.0 if example["metadata"]["complexity"] == "simple" else 0.5
+                yield {"f1_score": score, "clarity": score, "precision": score}, 0.1
+
+        monkeypatch.setattr(evaluate, "_iter_example_scores", fake_iter)
+        monkeypatch.setenv("EVAL_CHECKPOINT_DIR", str(tmp_path))
+        monkeypatch.setenv("EVAL_ENGINE", "threads")
+        monkeypatch.setenv("EVAL_BUG_METRICS", "false")
+
+        examples = [
+            {"id": i, "inputs": {"bug_report": str(i)}, "outputs": {"reference": ""},
+             "metadata": {"complexity": "simple" if i < 2 else "complex"}}
+            for i in range(4)
+        ]
+        sample = StratifiedSample(examples, {"simple/short": 30, "complex/short": 10})
+        for name in ["org/v1", "org/v2"]:
+            scores = evaluate.evaluate_prompt(name, "ds", None, examples=sample, llm=object(), prompt_template="t")
+            assert scores["f1_score"] == pytest.approx(0.875)
+
+        assert seen[0] == seen[1] == (0, 1, 2, 3)
+
+    def test_async_engine_creates_generation_llm_per_event_loop(self, monkeypatch, tmp_path):
+        """Clientes async ficam presos ao loop: cada asyncio.run recebe um LLM novo."""
+        created, used = [], []
+
+        def fake_get_llm():
+            created.append(object())
+            return created[-1]
+
+        async def fake_aevaluate(prompt_template, examples, llm, max_in_flight, checkpoint=None):
+            used.append(llm)
+            return [({"f1_score": 0.9, "clarity": 0.9, "precision": 0.9}, 0.1) for _ in examples]
+
+        monkeypatch.setattr(evaluate, "get_llm", fake_get_llm)
+        monkeypatch.setattr(evaluate, "_aevaluate_examples", fake_aevaluate)
+        monkeypatch.setenv("EVAL_CHECKPOINT_DIR", str(tmp_path))
+        monkeypatch.setenv("EVAL_ENGINE", "async")
+        monkeypatch.setenv("EVAL_BUG_METRICS", "false")
+
+        shared = object()
+        for name in ["org/v1", "org/v2"]:
+            evaluate.evaluate_prompt(name, "ds", None, examples=["e1"], llm=shared, prompt_template="t")
+
+        assert used == created and len(set(map(id, used))) == 2
+        assert shared not in used
+
+    def test_comparison_table_marks_best_prompt(self, capsys):
+        evaluate.display_comparison([
+            {"prompt": "org/v1", "scores": {"f1_score": 0.5, "clarity": 0.6}, "passed": False},
+            {"prompt": "org/v2", "scores": {"f1_score": 0.95, "clarity": 0.92}, "passed": True},
+        ])
+        lines = capsys.readouterr().out.splitlines()
+
+        best = [line for line in lines if "★" in line]
+        assert len(best) == 1 and "org/v2" in best[0]
+
+    def test_pass_fail_uses_only_baseline_metrics(self, capsys):
+        """Métricas de Bug to User Story são exibidas à parte e não entram na média de aprovação."""
+        scores = {key: 0.95 for key in evaluate.BASELINE_METRICS}
+        scores.update({"tone_score": 0.1, "completeness_score": 0.2})
+
+        assert evaluate.display_results("org/v1", scores) is True
+        output = capsys.readouterr().out
+        assert "MÉDIA GERAL: 0.9500" in output
+        assert "Média Bug to User Story: 0.1500" in output
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
@@ -0,0 +1,87 @@
+"""
+Testes do cálculo em lote das heurísticas de calibragem (sem chamadas externas).
+"""
+import csv
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+# Adicionar src ao path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+import heuristics_batch
+import metrics
+from heuristics_batch import apply_calibration, score_heuristics_batch
+
+QUESTION = "Botão de login não funciona no Safari"
+REFERENCE = "Como usuário, eu quero fazer login no Safari, para que eu acesse minha conta.\n\nCritérios de Aceitação:\n- Login funciona"
+
+CASES = [
+    (QUESTION, REFERENCE, REFERENCE),
+    (QUESTION, "Como usuário, eu quero login com Redis e Kafka.\n  - item\n- outro", REFERENCE),
+    (QUESTION, "", REFERENCE),
+    ("", "Resposta qualquer", ""),
+    (QUESTION, "ab cd ef", "Referência com Ação e Ênfase"),
+]
+
+
+class TestScoreHeuristicsBatch:
+    def test_matches_per_example_analysis(self):
+        questions, answers, references = zip(*CASES)
+        columns = score_heuristics_batch(questions, answers, references)
+
+        for index, (question, answer, reference) in enumerate(CASES):
+            analysis = metrics.ExampleAnalysis(question, answer, reference)
+            assert columns["overlap"][index] == pytest.approx(analysis.overlap_ratio())
+            assert columns["structure"][index] == pytest.approx(analysis.structure_score())
+            assert columns["hallucination_penalty"][index] == pytest.approx(analysis.hallucination_penalty())
+
+            judge_zero = {"score": 0.0, "precision": 0.0, "recall": 0.0}
+            assert round(columns["heuristic_precision"][index], 4) == \
+                metrics._finalize_precision(judge_zero, question, answer, reference)["score"]
+            assert round(columns["heuristic_clarity"][index], 4) == \
+                metrics._finalize_clarity(judge_zero, question, answer, reference)["score"]
+
+    def test_length_mismatch_is_rejected(self):
+        with pytest.raises(ValueError):
+            score_heuristics_batch(["q"], ["a", "b"], ["r"])
+
+
+class TestApplyCalibration:
+    def test_recalibration_reuses_components(self):
+        questions, answers, references = zip(*CASES)
+        columns = score_heuristics_batch(questions, answers, references)
+
+        weights = {key: dict(value) for key, value in metrics.HEURISTIC_WEIGHTS.items()}
+        weights["f1_score"]["base"] = 0.5
+        recalibrated = apply_calibration(columns, weights)
+
+        expected = np.clip(0.5 + 0.16 * columns["overlap"] + 0.04 * columns["structure"], 0, 1)
+        assert np.allclose(recalibrated["heuristic_f1_score"], expected)
+        assert np.allclose(recalibrated["heuristic_clarity"], columns["heuristic_clarity"])
+
+
+class TestCli:
+    def test_scores_jsonl_in_chunks(self, tmp_path, monkeypatch):
+        source = tmp_path / "answers.jsonl"
+        with open(source, "w", encoding="utf-8") as f:
+            for question, answer, reference in CASES:
+                f.write(json.dumps({"question": question, "answer": answer, "reference": reference}) + "\n")
+
+        output = tmp_path / "scores.csv"
+        monkeypatch.setattr(sys, "argv", [
+            "heuristics_batch.py", str(source), "--output", str(output), "--chunk-size", "2"
+        ])
+        assert heuristics_batch.main() == 0
+
+        with open(output, encoding="utf-8") as f:
+            rows = list(csv.DictReader(f))
+        assert len(rows) == len(CASES)
+        assert float(rows[2]["hallucination_penalty"]) == 0.3
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
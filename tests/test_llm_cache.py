@@ -0,0 +1,92 @@
+"""
+Testes do cache persistente de respostas de LLM.
+"""
+import sys
+import time
+from pathlib import Path as P
+
+import pytest
+
+# Adicionar src ao path
+sys.path.insert(0, str(P(__file__).parent.parent / "src"))
+
+import request_coalescer
+import utils
+from langchain_core.prompts import ChatPromptTemplate
+from llm_cache import ResponseCache, make_cache_key
+
+
+class FakeLLM:
+    def __init__(self, model_name="gpt-4o", temperature=0.0):
+        self.model_name = model_name
+        self.temperature = temperature
+        self.calls = 0
+
+    def invoke(self, prompt_value):
+        self.calls += 1
+        return type("Response", (), {"content": f"resposta {self.calls}"})()
+
+
+class TestResponseCache:
+    def test_hit_and_miss_counters(self, tmp_path):
+        cache = ResponseCache(str(tmp_path / "cache.sqlite"))
+        key = make_cache_key("judge", FakeLLM(), "prompt")
+
+        assert cache.get(key, "judge") is None
+        cache.set(key, "judge", '{"score": 1.0}')
+        assert cache.get(key, "judge") == '{"score": 1.0}'
+        assert cache.stats() == {"judge": {"hits": 1, "misses": 1}}
+
+    def test_key_depends_on_model_and_temperature(self):
+        base = make_cache_key("judge", FakeLLM(), "prompt")
+        assert base == make_cache_key("judge", FakeLLM(), "prompt")
+        assert base != make_cache_key("judge", FakeLLM(model_name="gpt-4o-mini"), "prompt")
+        assert base != make_cache_key("judge", FakeLLM(temperature=0.7), "prompt")
+        assert base != make_cache_key("judge", FakeLLM(), "outro prompt")
+
+    def test_persists_between_instances(self, tmp_path):
+        path = str(tmp_path / "cache.sqlite")
+        ResponseCache(path).set("k", "judge", "v")
+        assert ResponseCache(path).get("k", "judge") == "v"
+
+    def test_expired_entries_are_misses(self, tmp_path):
+        cache = ResponseCache(str(tmp_path / "cache.sqlite"), max_age_seconds=0.01)
+        cache.set("k", "judge", "v")
+        time.sleep(0.02)
+        assert cache.get("k", "judge") is None
+        assert cache.evict() == 1
+
+    def test_evicts_least_recently_used_beyond_max_entries(self, tmp_path):
+        cache = ResponseCache(str(tmp_path / "cache.sqlite"), max_entries=2)
+        for key in ["a", "b", "c"]:
+            cache.set(key, "judge", key)
+            time.sleep(0.001)
+        cache.get("a", "judge")
+
+        assert cache.evict() == 1
+        assert cache.get("b", "judge") is None
+        assert cache.get("a", "judge") == "a"
+        assert cache.get("c", "judge") == "c"
+
+
+class TestGenerationCache:
+    def test_generation_is_reused_for_same_rendered_prompt(self, tmp_path, monkeypatch):
+        cache = ResponseCache(str(tmp_path / "cache.sqlite"))
+        monkeypatch.setattr(utils, "get_response_cache", lambda: cache)
+        # Só o cache persistente (sem reaproveitamento em memória da execução)
+        monkeypatch.setattr(request_coalescer, "get_request_coalescer", lambda: None)
+        prompt = ChatPromptTemplate.from_messages([("system", "Converta o bug."), ("human", "{bug_report}")])
+        llm = FakeLLM()
+
+        first = utils.generate_answer(prompt, {"bug_report": "Botão quebrado"}, llm)
+        second = utils.generate_answer(prompt, {"bug_report": "Botão quebrado"}, llm)
+        other = utils.generate_answer(prompt, {"bug_report": "Login lento"}, llm)
+
+        assert first == second == "resposta 1"
+        assert other == "resposta 2"
+        assert llm.calls == 2
+        assert cache.stats()["generation"] == {"hits": 1, "misses": 2}
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
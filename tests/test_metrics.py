@@ -0,0 +1,284 @@
+"""
+Testes das métricas customizadas (judge LLM simulado, sem chamadas externas).
+"""
+import asyncio
+import json
+import sys
+from pathlib import Path as P
+
+import pytest
+from langchain_core.messages import AIMessage
+
+# Adicionar src ao path
+sys.path.insert(0, str(P(__file__).parent.parent / "src"))
+
+import metrics
+import request_coalescer
+import usage
+from usage import UsageTracker
+
+
+class FakeResponse:
+    def __init__(self, content):
+        self.content = content
+
+
+class FakeJudge:
+    """Judge que devolve respostas pré-definidas e registra os prompts recebidos."""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.prompts = []
+
+    def invoke(self, messages):
+        self.prompts.append(messages[-1].content)
+        return FakeResponse(self.responses.pop(0))
+
+
+class FakeStructuredJudge:
+    """Judge com structured output nativo (`with_structured_output(..., include_raw=True)`)."""
+
+    def __init__(self, *payloads):
+        self.payloads = list(payloads)
+        self.schemas = []
+        self.calls = 0
+
+    def with_structured_output(self, schema, include_raw=False):
+        self.schemas.append(schema)
+        return self
+
+    def invoke(self, messages):
+        self.calls += 1
+        payload = self.payloads.pop(0)
+        raw = AIMessage(content="", tool_calls=[{"name": "judgment", "args": payload, "id": "1"}])
+        try:
+            return {"raw": raw, "parsed": self.schemas[-1].model_validate(payload), "parsing_error": None}
+        except ValueError as e:
+            return {"raw": raw, "parsed": None, "parsing_error": e}
+
+
+ANSWER = "Como um cliente, eu quero pagar com cartão, para que eu conclua a compra.\n- Dado\n- Quando\n- Então"
+REFERENCE = "Como um cliente, eu quero pagar com cartão, para que eu finalize a compra."
+
+
+@pytest.fixture(autouse=True)
+def no_response_cache(monkeypatch):
+    """Isola os testes do cache persistente e das requisições já feitas por outros testes."""
+    monkeypatch.setattr(metrics, "get_response_cache", lambda: None)
+    coalescer = request_coalescer.RequestCoalescer()
+    monkeypatch.setattr(request_coalescer, "get_request_coalescer", lambda: coalescer)
+
+
+class TestCombinedJudge:
+    def test_single_call_fans_out_to_metric_results(self, monkeypatch):
+        """Uma única chamada deve gerar os mesmos dicts das funções individuais."""
+        combined = {
+            "f1_score": {"precision": 1.0, "recall": 1.0, "reasoning": "ok"},
+            "clarity": {"score": 0.95, "reasoning": "clara"},
+            "tone_score": {"score": 0.7, "reasoning": "tom"},
+        }
+        judge = FakeJudge(json.dumps(combined))
+        monkeypatch.setattr(metrics, "get_evaluator_llm", lambda: judge)
+
+        results = metrics.evaluate_all_metrics("Bug", ANSWER, REFERENCE, ["f1_score", "clarity", "tone_score"])
+
+        assert len(judge.prompts) == 1
+        assert results["f1_score"] == {"score": 1.0, "precision": 1.0, "recall": 1.0, "reasoning": "ok"}
+        assert results["clarity"]["score"] >= 0.95
+        assert results["tone_score"] == {"score": 0.7, "reasoning": "tom"}
+
+    def test_missing_metric_falls_back_to_individual_judge(self, monkeypatch):
+        """Métrica ausente na resposta combinada deve ser reavaliada individualmente."""
+        judge = FakeJudge(
+            json.dumps({"clarity": {"score": 0.9, "reasoning": "ok"}}),
+            json.dumps({"score": 0.8, "reasoning": "individual"}),
+        )
+        monkeypatch.setattr(metrics, "get_evaluator_llm", lambda: judge)
+
+        results = metrics.evaluate_all_metrics("Bug", ANSWER, REFERENCE, ["clarity", "tone_score"])
+
+        assert len(judge.prompts) == 2
+        assert results["tone_score"] == {"score": 0.8, "reasoning": "individual"}
+
+    def test_unknown_metric_is_rejected(self):
+        with pytest.raises(ValueError):
+            metrics.evaluate_all_metrics("Bug", ANSWER, REFERENCE, ["nao_existe"])
+
+
+
+class TestStructuredJudging:
+    def test_invalid_response_is_reasked_once(self, monkeypatch):
+        judge = FakeJudge("Nota: excelente", json.dumps({"score": 0.7, "reasoning": "ok"}))
+        monkeypatch.setattr(metrics, "get_evaluator_llm", lambda: judge)
+
+        result = metrics.evaluate_tone_score("Bug", ANSWER, REFERENCE)
+
+        assert result == {"score": 0.7, "reasoning": "ok"}
+        assert len(judge.prompts) == 2
+        assert "ERRO DE VALIDAÇÃO" in judge.prompts[1]
+
+    def test_fenced_json_is_accepted_but_prose_is_reasked(self, monkeypatch):
+        fenced = "```json\n" + json.dumps({"score": 0.8, "reasoning": "ok"}) + "\n```"
+        judge = FakeJudge(fenced, "Nota: " + json.dumps({"score": 0.6}) + " (fim)", json.dumps({"score": 0.7}))
+        monkeypatch.setattr(metrics, "get_evaluator_llm", lambda: judge)
+
+        assert metrics.evaluate_tone_score("Bug", ANSWER, REFERENCE)["score"] == 0.8
+        assert metrics.evaluate_tone_score("Bug", ANSWER + " ", REFERENCE)["score"] == 0.7
+        assert len(judge.prompts) == 3
+
+    def test_out_of_range_score_fails_validation(self, monkeypatch):
+        judge = FakeJudge(json.dumps({"score": 7, "reasoning": "0 a 10"}), json.dumps({"score": 0.7}))
+        monkeypatch.setattr(metrics, "get_evaluator_llm", lambda: judge)
+
+        assert metrics.evaluate_tone_score("Bug", ANSWER, REFERENCE)["score"] == 0.7
+        assert len(judge.prompts) == 2
+
+    def test_second_invalid_response_is_an_error_not_a_zero(self, monkeypatch):
+        judge = FakeJudge("sem json", "ainda sem json")
+        monkeypatch.setattr(metrics, "get_evaluator_llm", lambda: judge)
+
+        result = metrics.evaluate_tone_score("Bug", ANSWER, REFERENCE)
+
+        assert result["error"] is True
+        assert len(judge.prompts) == 2
+
+    def test_native_structured_output(self, monkeypatch):
+        judge = FakeStructuredJudge({"precision": 2.0, "recall": 1.0}, {"precision": 1.0, "recall": 1.0, "reasoning": "ok"})
+        monkeypatch.setattr(metrics, "get_evaluator_llm", lambda: judge)
+
+        result = metrics.evaluate_f1_score("Bug", ANSWER, REFERENCE)
+
+        assert judge.schemas[0] is metrics.F1Judgment
+        assert judge.calls == 2
+        assert result["score"] == 1.0
+
+    def test_structured_output_can_be_disabled(self, monkeypatch):
+        monkeypatch.setenv("JUDGE_STRUCTURED_OUTPUT", "false")
+        judge = FakeStructuredJudge()
+        assert metrics._judge_request(judge, metrics.ScoreJudgment) is judge
+        assert judge.schemas == []
+
+    def test_combined_schema_allows_missing_metrics(self):
+        schema = metrics._combined_schema(("f1_score", "clarity"))
+        parsed = schema.model_validate({"clarity": {"score": 0.9}}).model_dump(exclude_none=True)
+        assert parsed == {"clarity": {"score": 0.9, "reasoning": ""}}
+
+
+class TestExampleAnalysis:
+    def test_normalization_strips_accents_and_symbols(self):
+        assert metrics._normalize_text("Critérios de  Aceitação!") == "criterios de aceitacao"
+        assert metrics._normalize_text("") == ""
+
+    def test_heuristics(self):
+        analysis = metrics.ExampleAnalysis(
+            "Botão de login não funciona",
+            "Como usuário, eu quero fazer login para que eu acesse.\n- usar redis\n- usar kafka",
+            "Como usuário, eu quero fazer login",
+        )
+        assert analysis.overlap_ratio() == 1.0
+        assert analysis.structure_score() == pytest.approx(0.85 + 0.05 * 2 / 5)
+        assert analysis.hallucination_penalty() == pytest.approx(0.06)
+        assert isinstance(metrics.SUSPICIOUS_TERMS, frozenset)
+
+    def test_analysis_is_shared_between_metrics(self):
+        metrics.analyze_example.cache_clear()
+        for finalize in (metrics._finalize_f1, metrics._finalize_clarity, metrics._finalize_precision):
+            finalize({"score": 0.5, "precision": 0.5, "recall": 0.5}, "Bug", ANSWER, REFERENCE)
+
+        info = metrics.analyze_example.cache_info()
+        assert (info.misses, info.hits) == (1, 2)
+
+
+class TestTieredScoring:
+    @pytest.fixture(autouse=True)
+    def tiered(self, monkeypatch):
+        monkeypatch.setenv("EVAL_TIERED_SCORING", "true")
+        monkeypatch.setenv("EVAL_TIERED_THRESHOLD", "0.9")
+        self.tracker = UsageTracker(prices={})
+        monkeypatch.setattr(usage, "_tracker", self.tracker)
+
+    def test_disabled_by_default(self, monkeypatch):
+        monkeypatch.delenv("EVAL_TIERED_SCORING")
+        assert metrics.tiered_threshold() is None
+
+    def test_default_threshold_keeps_full_scores(self, monkeypatch):
+        monkeypatch.delenv("EVAL_TIERED_THRESHOLD")
+        judge = FakeJudge(json.dumps({"score": 0.5, "reasoning": "ok"}))
+        monkeypatch.setattr(metrics, "get_evaluator_llm", lambda: judge)
+
+        below_max = metrics.evaluate_precision("Bug", ANSWER, REFERENCE)
+        at_max = metrics.evaluate_precision("Bug", REFERENCE, REFERENCE)
+
+        assert len(judge.prompts) == 1
+        assert "judge_skipped" not in below_max
+        assert at_max["judge_skipped"] is True
+        assert at_max["score"] == metrics._finalize_precision({"score": 1.0}, "Bug", REFERENCE, REFERENCE)["score"]
+
+    def test_heuristic_above_threshold_skips_judge(self, monkeypatch):
+        judge = FakeJudge()
+        monkeypatch.setattr(metrics, "get_evaluator_llm", lambda: judge)
+
+        result = metrics.evaluate_f1_score("Bug", ANSWER, REFERENCE)
+
+        assert judge.prompts == []
+        assert result["judge_skipped"] is True
+        assert result["score"] == round(metrics.heuristic_floor("f1_score", "Bug", ANSWER, REFERENCE), 4)
+        assert result["precision"] == result["recall"] == result["score"]
+        assert self.tracker.judge_skip_counts() == (1, 1)
+
+    def test_heuristic_below_threshold_calls_judge(self, monkeypatch):
+        judge = FakeJudge(json.dumps({"precision": 1.0, "recall": 1.0, "reasoning": "ok"}))
+        monkeypatch.setattr(metrics, "get_evaluator_llm", lambda: judge)
+
+        result = metrics.evaluate_f1_score("Bug", "Texto curto", REFERENCE)
+
+        assert len(judge.prompts) == 1
+        assert result["score"] == 1.0
+        assert "judge_skipped" not in result
+
+    def test_combined_prompt_only_covers_undecided_metrics(self, monkeypatch):
+        judge = FakeJudge(json.dumps({
+            "f1_score": {"precision": 0.5, "recall": 0.5, "reasoning": "parcial"},
+            "precision": {"score": 0.6, "reasoning": "parcial"},
+        }))
+        monkeypatch.setattr(metrics, "get_evaluator_llm", lambda: judge)
+
+        results = metrics.evaluate_all_metrics("Bug", "Texto curto", REFERENCE, ["f1_score", "clarity", "precision"])
+
+        assert len(judge.prompts) == 1
+        assert '"clarity"' not in judge.prompts[0]
+        assert results["clarity"]["judge_skipped"] is True
+        assert list(results) == ["f1_score", "clarity", "precision"]
+
+    def test_skip_counts_one_decision_per_metric(self, monkeypatch):
+        """Combined e fallback individual contam uma decisão por métrica, não por chamada."""
+        judge = FakeJudge(
+            json.dumps({"f1_score": {"precision": 0.5, "recall": 0.5, "reasoning": "parcial"}}),
+            json.dumps({"score": 0.6, "reasoning": "fallback"}),
+        )
+        monkeypatch.setattr(metrics, "get_evaluator_llm", lambda: judge)
+
+        metrics.evaluate_all_metrics("Bug", "Texto curto", REFERENCE, ["f1_score", "clarity", "precision"])
+
+        assert len(judge.prompts) == 2
+        assert self.tracker.judge_skip_counts() == (1, 3)
+
+    def test_async_metric_skips_judge(self, monkeypatch):
+        monkeypatch.setattr(metrics, "get_evaluator_llm", lambda: pytest.fail("judge não deveria ser chamado"))
+
+        result = asyncio.run(metrics.aevaluate_metric("precision", "Bug", ANSWER, REFERENCE))
+
+        assert result["judge_skipped"] is True
+
+    def test_threshold_is_configurable(self, monkeypatch):
+        monkeypatch.setenv("EVAL_TIERED_THRESHOLD", "0.99")
+        judge = FakeJudge(json.dumps({"score": 0.7, "reasoning": "ok"}))
+        monkeypatch.setattr(metrics, "get_evaluator_llm", lambda: judge)
+
+        metrics.evaluate_clarity("Bug", ANSWER, REFERENCE)
+
+        assert len(judge.prompts) == 1
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
@@ -0,0 +1,117 @@
+"""
+Testes do cache local de prompts do Hub (sem chamadas externas).
+"""
+import sys
+from pathlib import Path as P
+
+import pytest
+from langchain_core.load import dumpd
+from langchain_core.prompts import ChatPromptTemplate
+
+# Adicionar src ao path
+sys.path.insert(0, str(P(__file__).parent.parent / "src"))
+
+from prompt_cache import PromptCache
+
+
+class FakeHubClient:
+    """Stand-in dos endpoints de prompt do LangSmith."""
+
+    def __init__(self):
+        self.commits = {}
+        self.latest = None
+        self.pulls = 0
+        self.revision_checks = 0
+        self.fail = False
+
+    def publish(self, commit, system_text):
+        template = ChatPromptTemplate.from_messages([("system", system_text), ("human", "{bug_report}")])
+        self.commits[commit] = dumpd(template)
+        self.latest = commit
+
+    def pull_prompt_commit(self, identifier):
+        if self.fail:
+            raise ConnectionError("sem rede")
+        self.pulls += 1
+        _, _, commit = identifier.partition(":")
+        commit = next((full for full in self.commits if full.startswith(commit)), None) if commit else self.latest
+        return type("PromptCommit", (), {
+            "owner": "org", "repo": "prompt", "commit_hash": commit, "manifest": self.commits[commit]
+        })()
+
+    def get_prompt(self, name):
+        if self.fail:
+            raise ConnectionError("sem rede")
+        self.revision_checks += 1
+        return type("Prompt", (), {"last_commit_hash": self.latest})()
+
+
+def system_text(prompt):
+    return prompt.messages[0].prompt.template
+
+
+@pytest.fixture
+def hub():
+    client = FakeHubClient()
+    client.publish("c1", "versão 1")
+    return client
+
+
+class TestPromptCache:
+    def test_within_ttl_serves_from_disk(self, tmp_path, hub):
+        cache = PromptCache(str(tmp_path), ttl_seconds=3600, client=hub)
+
+        first = cache.pull("org/prompt")
+        second = PromptCache(str(tmp_path), ttl_seconds=3600, client=hub).pull("org/prompt")
+
+        assert system_text(first) == system_text(second) == "versão 1"
+        assert second.metadata["lc_hub_commit_hash"] == "c1"
+        assert hub.pulls == 1
+        assert hub.revision_checks == 0
+
+    def test_expired_ttl_checks_revision_and_downloads_only_on_change(self, tmp_path, hub):
+        cache = PromptCache(str(tmp_path), ttl_seconds=0, client=hub)
+        cache.pull("org/prompt")
+
+        assert system_text(cache.pull("org/prompt")) == "versão 1"
+        assert (hub.pulls, hub.revision_checks) == (1, 1)
+
+        hub.publish("c2", "versão 2")
+        assert system_text(cache.pull("org/prompt")) == "versão 2"
+        assert (hub.pulls, hub.revision_checks) == (2, 2)
+
+    def test_pinned_commit_never_checks_revision(self, tmp_path, hub):
+        hub.publish("c2", "versão 2")
+        cache = PromptCache(str(tmp_path), ttl_seconds=0, client=hub)
+
+        assert system_text(cache.pull("org/prompt:c1")) == "versão 1"
+        assert system_text(cache.pull("org/prompt:c1")) == "versão 1"
+        assert (hub.pulls, hub.revision_checks) == (1, 0)
+
+    def test_short_commit_pin_hits_cache(self, tmp_path, hub):
+        hub.publish("c2ab34cd56ef7890", "versão 2")
+        PromptCache(str(tmp_path), client=hub).pull("org/prompt:c2ab34cd")
+        hub.fail = True
+
+        offline = PromptCache(str(tmp_path), offline=True, client=hub)
+        prompt = offline.pull("org/prompt:c2ab34cd")
+
+        assert system_text(prompt) == "versão 2"
+        assert prompt.metadata["lc_hub_commit_hash"] == "c2ab34cd56ef7890"
+        assert hub.pulls == 1
+
+    def test_offline_mode_and_network_failure_use_cache(self, tmp_path, hub):
+        PromptCache(str(tmp_path), client=hub).pull("org/prompt")
+        hub.fail = True
+
+        offline = PromptCache(str(tmp_path), ttl_seconds=0, offline=True, client=hub)
+        assert system_text(offline.pull("org/prompt")) == "versão 1"
+        with pytest.raises(RuntimeError, match="offline"):
+            offline.pull("org/outro")
+
+        stale = PromptCache(str(tmp_path), ttl_seconds=0, client=hub)
+        assert system_text(stale.pull("org/prompt")) == "versão 1"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
@@ -0,0 +1,91 @@
+"""
+Testes do push de prompts (sem chamadas externas).
+"""
+import sys
+import threading
+from pathlib import Path as P
+
+import pytest
+import yaml
+
+# Adicionar src ao path
+sys.path.insert(0, str(P(__file__).parent.parent / "src"))
+
+import push_prompts
+from push_prompts import PromptPusher, fingerprint_path, push_directory
+
+PROMPT = {
+    "description": "Converte bugs em user stories",
+    "system_prompt": "Você é um PO experiente.",
+    "version": "v2",
+    "techniques_applied": ["few-shot", "role prompting"],
+}
+
+
+@pytest.fixture
+def pushed(monkeypatch):
+    calls = []
+    lock = threading.Lock()
+
+    def fake_push(name, template, **kwargs):
+        with lock:
+            calls.append(name)
+
+    monkeypatch.setattr(push_prompts.hub, "push", fake_push)
+    return calls
+
+
+def write_prompt(path, **overrides):
+    path.write_text(yaml.safe_dump({**PROMPT, **overrides}, allow_unicode=True), encoding="utf-8")
+    return path
+
+
+class TestFingerprintSkip:
+    def test_unchanged_prompt_is_not_pushed_again(self, tmp_path, pushed):
+        path = write_prompt(tmp_path / "bug.yml")
+
+        assert PromptPusher("org/bug", dict(PROMPT), source_path=str(path)).push()
+        assert PromptPusher("org/bug", dict(PROMPT), source_path=str(path)).push()
+
+        assert pushed == ["org/bug"]
+        assert fingerprint_path(str(path)).exists()
+
+    def test_changed_prompt_or_force_pushes(self, tmp_path, pushed):
+        path = write_prompt(tmp_path / "bug.yml")
+        PromptPusher("org/bug", dict(PROMPT), source_path=str(path)).push()
+
+        changed = {**PROMPT, "system_prompt": "Você é um PO sênior."}
+        PromptPusher("org/bug", changed, source_path=str(path)).push()
+        PromptPusher("org/bug", changed, source_path=str(path), force=True).push()
+
+        assert pushed == ["org/bug", "org/bug", "org/bug"]
+
+    def test_failed_push_does_not_record_fingerprint(self, tmp_path, monkeypatch):
+        path = write_prompt(tmp_path / "bug.yml")
+
+        def failing_push(*args, **kwargs):
+            raise RuntimeError("401 Unauthorized")
+
+        monkeypatch.setattr(push_prompts.hub, "push", failing_push)
+
+        assert not PromptPusher("org/bug", dict(PROMPT), source_path=str(path)).push()
+        assert not fingerprint_path(str(path)).exists()
+
+
+class TestPushDirectory:
+    def test_pushes_all_prompt_yamls_and_ignores_others(self, tmp_path, pushed):
+        write_prompt(tmp_path / "a.yml")
+        write_prompt(tmp_path / "b.yml", version="v3")
+        write_prompt(tmp_path / "broken.yml", techniques_applied=[])
+        (tmp_path / "pulled.yml").write_text("name: x\nrepresentation: y\n", encoding="utf-8")
+
+        assert push_directory(str(tmp_path), "org", workers=3) == (2, 1, 1)
+        assert sorted(pushed) == ["org/a", "org/b"]
+
+        pushed.clear()
+        assert push_directory(str(tmp_path), "org", workers=3) == (2, 1, 1)
+        assert pushed == []
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
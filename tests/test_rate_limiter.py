@@ -0,0 +1,59 @@
+"""
+Testes do rate limiter client-side (token bucket RPM/TPM).
+"""
+import asyncio
+import sys
+import time
+from pathlib import Path as P
+
+import pytest
+
+# Adicionar src ao path
+sys.path.insert(0, str(P(__file__).parent.parent / "src"))
+
+import rate_limiter
+from rate_limiter import TokenBucketRateLimiter, get_rate_limiter
+
+
+class TestTokenBucketRateLimiter:
+    def test_requests_beyond_rpm_wait_for_refill(self):
+        limiter = TokenBucketRateLimiter("test/model", requests_per_minute=600)
+        limiter._request_bucket = 1
+
+        assert limiter.acquire(blocking=False)
+        assert not limiter.acquire(blocking=False)
+
+        started = time.monotonic()
+        assert limiter.acquire()
+        assert time.monotonic() - started >= 0.05
+        assert limiter.stats()["throttled_requests"] == 1
+        assert limiter.stats()["requests"] == 2
+
+    def test_token_debt_blocks_until_repaid(self):
+        limiter = TokenBucketRateLimiter("test/model", tokens_per_minute=60000)
+        limiter.record_tokens(60050)
+
+        assert not limiter.acquire(blocking=False)
+        assert asyncio.run(limiter.aacquire())
+        assert limiter.stats()["tokens"] == 60050
+        assert limiter.stats()["wait_seconds"] > 0
+
+    def test_limiter_is_shared_per_provider_and_model(self, monkeypatch):
+        monkeypatch.setattr(rate_limiter, "_limiters", {})
+        monkeypatch.setenv("OPENAI_RPM_LIMIT", "100")
+        monkeypatch.delenv("OPENAI_TPM_LIMIT", raising=False)
+        monkeypatch.delenv("LLM_TPM_LIMIT", raising=False)
+
+        first = get_rate_limiter("openai", "gpt-4o")
+        assert first is get_rate_limiter("openai", "gpt-4o")
+        assert first is not get_rate_limiter("openai", "gpt-4o-mini")
+        assert first.requests_per_minute == 100
+
+    def test_no_limits_means_no_limiter(self, monkeypatch):
+        for name in ["OPENAI_RPM_LIMIT", "OPENAI_TPM_LIMIT", "LLM_RPM_LIMIT", "LLM_TPM_LIMIT"]:
+            monkeypatch.delenv(name, raising=False)
+        assert get_rate_limiter("openai", "gpt-4o") is None
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
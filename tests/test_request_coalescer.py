@@ -0,0 +1,123 @@
+"""
+Testes da coalescência de requisições idênticas (sem chamadas externas).
+"""
+import asyncio
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+from langchain_core.prompts import ChatPromptTemplate
+
+# Adicionar src ao path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+import request_coalescer
+import utils
+from request_coalescer import RequestCoalescer
+
+
+class CountingLLM:
+    model_name = "gpt-4o-mini"
+    temperature = 0
+
+    def __init__(self):
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def invoke(self, prompt_value):
+        with self._lock:
+            self.calls += 1
+        time.sleep(0.05)
+        return type("Response", (), {"content": "Como usuário, eu quero..."})()
+
+
+@pytest.fixture
+def coalescer(monkeypatch):
+    coalescer = RequestCoalescer()
+    monkeypatch.setattr(request_coalescer, "get_request_coalescer", lambda: coalescer)
+    monkeypatch.setattr(utils, "get_response_cache", lambda: None)
+    return coalescer
+
+
+class TestRequestCoalescer:
+    def test_concurrent_identical_requests_share_one_call(self):
+        coalescer = RequestCoalescer()
+        calls = []
+
+        def slow_call():
+            calls.append(1)
+            time.sleep(0.05)
+            return "resposta"
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(lambda _: coalescer.run("judge", "k", slow_call), range(8)))
+
+        assert len(calls) == 1
+        assert [value for value, _ in results] == ["resposta"] * 8
+        assert sum(shared for _, shared in results) == 7
+        assert coalescer.stats()["judge"] == {"requests": 1, "shared": 7}
+
+    def test_failures_are_not_memoized(self):
+        coalescer = RequestCoalescer()
+
+        def failing():
+            raise RuntimeError("429")
+
+        with pytest.raises(RuntimeError):
+            coalescer.run("judge", "k", failing)
+        assert coalescer.run("judge", "k", lambda: "ok") == ("ok", False)
+
+    def test_completed_results_are_bounded(self):
+        coalescer = RequestCoalescer(max_entries=2)
+        for key in ("a", "b", "c"):
+            coalescer.run("judge", key, lambda: key)
+
+        assert coalescer.run("judge", "c", lambda: "novo") == ("c", True)
+        assert coalescer.run("judge", "a", lambda: "novo") == ("novo", False)
+
+    def test_async_identical_requests_share_one_call(self):
+        coalescer = RequestCoalescer()
+        calls = []
+
+        async def slow_call():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return "resposta"
+
+        async def run_all():
+            return await asyncio.gather(*(coalescer.arun("generation", "k", slow_call) for _ in range(5)))
+
+        results = asyncio.run(run_all())
+
+        assert len(calls) == 1
+        assert [value for value, _ in results] == ["resposta"] * 5
+
+
+class TestDuplicateExamples:
+    def test_duplicate_bug_reports_generate_once(self, coalescer):
+        prompt = ChatPromptTemplate.from_messages([("human", "{bug_report}")])
+        llm = CountingLLM()
+        reports = ["Botão quebrado", "Botão quebrado", "Login lento", "Botão quebrado"]
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            answers = list(executor.map(lambda report: utils.generate_answer(prompt, {"bug_report": report}, llm), reports))
+
+        assert llm.calls == 2
+        assert len(set(answers)) == 1
+        assert coalescer.stats()["generation"] == {"requests": 2, "shared": 2}
+
+    def test_disabled_by_env(self, monkeypatch):
+        monkeypatch.setenv("LLM_COALESCE_ENABLED", "false")
+        request_coalescer.get_request_coalescer.cache_clear()
+        try:
+            assert request_coalescer.get_request_coalescer() is None
+            assert request_coalescer.coalesce("judge", "k", lambda: 1) == (1, False)
+        finally:
+            request_coalescer.get_request_coalescer.cache_clear()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
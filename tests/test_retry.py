@@ -0,0 +1,101 @@
+"""
+Testes da política de retry (sem chamadas externas).
+"""
+import asyncio
+import sys
+from pathlib import Path as P
+
+import pytest
+
+# Adicionar src ao path
+sys.path.insert(0, str(P(__file__).parent.parent / "src"))
+
+from retry import RetryPolicy, is_transient_error
+
+
+class HTTPError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+class Flaky:
+    """Callable que falha `failures` vezes antes de retornar "ok"."""
+
+    def __init__(self, failures, error):
+        self.failures = failures
+        self.error = error
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise self.error
+        return "ok"
+
+
+class TestTransientClassification:
+    def test_rate_limit_and_server_errors_are_transient(self):
+        assert is_transient_error(HTTPError(429))
+        assert is_transient_error(HTTPError(503))
+        assert is_transient_error(TimeoutError("read timed out"))
+        assert is_transient_error(RuntimeError("429 Resource has been exhausted (e.g. check quota)"))
+
+    def test_client_errors_are_not_transient(self):
+        assert not is_transient_error(HTTPError(400))
+        assert not is_transient_error(HTTPError(401))
+        assert not is_transient_error(ValueError("OPENAI_API_KEY não configurada"))
+
+    def test_exhausted_quota_is_not_transient(self):
+        """insufficient_quota/billing chegam como 429, mas não se resolvem com retry."""
+        error = HTTPError(429)
+        error.args = ("Error code: 429 - {'error': {'message': 'You exceeded your current quota, please check "
+                      "your plan and billing details.', 'type': 'insufficient_quota'}}",)
+        assert not is_transient_error(error)
+
+        coded = RuntimeError("RateLimitError")
+        coded.code = "insufficient_quota"
+        assert not is_transient_error(coded)
+        assert not is_transient_error(RuntimeError("Your credit balance is too low"))
+
+
+class TestRetryPolicy:
+    def test_retries_transient_error_until_success(self):
+        policy = RetryPolicy(max_attempts=5, base_delay=0.0)
+        fn = Flaky(2, HTTPError(429))
+
+        assert policy.call(fn, "f1_score") == "ok"
+        assert fn.calls == 3
+        assert policy.stats()["f1_score"] == {"calls": 1, "retries": 2, "failures": 0}
+
+    def test_non_transient_error_is_raised_immediately(self):
+        policy = RetryPolicy(max_attempts=5, base_delay=0.0)
+        fn = Flaky(1, HTTPError(400))
+
+        with pytest.raises(HTTPError):
+            policy.call(fn, "generation")
+        assert fn.calls == 1
+        assert policy.stats()["generation"]["failures"] == 1
+
+    def test_budget_limits_total_retries(self):
+        policy = RetryPolicy(max_attempts=10, base_delay=0.0, budget=3)
+        fn = Flaky(100, HTTPError(503))
+
+        with pytest.raises(HTTPError):
+            policy.call(fn, "clarity")
+        assert fn.calls == 4
+        assert policy.budget == 0
+
+    def test_async_call_retries(self):
+        policy = RetryPolicy(max_attempts=3, base_delay=0.0)
+        fn = Flaky(1, HTTPError(502))
+
+        async def call():
+            return fn()
+
+        assert asyncio.run(policy.acall(call, "precision")) == "ok"
+        assert fn.calls == 2
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
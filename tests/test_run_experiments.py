@@ -0,0 +1,61 @@
+"""
+Testes dos avaliadores enviados ao LangSmith (sem chamadas externas).
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+# Adicionar src ao path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+import run_experiments
+
+FAILED = {"score": 0.0, "reasoning": "Erro na avaliação: timeout", "error": True}
+INPUTS = ({"bug_report": "Bug"}, {"answer": "Resposta"}, {"reference": "Referência"})
+
+
+class TestFeedback:
+    def test_failed_metric_has_no_score(self, monkeypatch):
+        monkeypatch.setattr(run_experiments, "evaluate_clarity", lambda q, a, r: FAILED)
+
+        feedback = run_experiments.evaluator_clarity(*INPUTS)
+
+        assert feedback == {"key": "clarity", "score": None, "comment": FAILED["reasoning"]}
+
+    def test_async_and_combined_evaluators_skip_failed_scores(self, monkeypatch):
+        async def fake_metric(key, question, answer, reference):
+            return FAILED
+
+        async def fake_all(question, answer, reference):
+            return {"f1_score": {"score": 0.9, "reasoning": "ok"}, "clarity": FAILED}
+
+        monkeypatch.setattr(run_experiments, "aevaluate_metric", fake_metric)
+        monkeypatch.setattr(run_experiments, "aevaluate_all_metrics", fake_all)
+
+        single = asyncio.run(run_experiments.make_async_evaluator("precision")(*INPUTS))
+        combined = asyncio.run(run_experiments.aevaluator_combined(*INPUTS))
+
+        assert single["score"] is None
+        assert [item["score"] for item in combined["results"]] == [0.9, None]
+
+
+class TestAsyncExperiment:
+    def test_invalid_max_in_flight_falls_back(self, monkeypatch):
+        captured = {}
+
+        async def fake_aevaluate(target, **kwargs):
+            captured.update(kwargs)
+
+        monkeypatch.setattr(run_experiments, "aevaluate", fake_aevaluate)
+        monkeypatch.setattr(run_experiments, "make_async_target", lambda prompt_name: None)
+        monkeypatch.setenv("EVAL_MAX_IN_FLIGHT", "muitos")
+
+        asyncio.run(run_experiments._arun_experiment("org/prompt", [], "prefixo", combined=True))
+
+        assert captured["max_concurrency"] == 32
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
@@ -0,0 +1,82 @@
+"""
+Testes da amostragem estratificada (sem chamadas externas).
+"""
+import sys
+from collections import Counter
+from pathlib import Path
+
+import pytest
+
+# Adicionar src ao path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from sampling import StratifiedSampler, sampling_seed, stratum_key
+
+
+def make_example(complexity, length=50, index=0):
+    return {
+        "inputs": {"bug_report": f"{index} " + "x" * length},
+        "outputs": {"reference": "ref"},
+        "metadata": {"complexity": complexity},
+    }
+
+
+def population(counts):
+    examples = []
+    for complexity, count in counts.items():
+        examples.extend(make_example(complexity, index=i) for i in range(count))
+    return examples
+
+
+class TestStratumKey:
+    def test_complexity_and_length_buckets(self):
+        assert stratum_key(make_example("simple", 50)) == "simple/short"
+        assert stratum_key(make_example("Medium", 300)) == "medium/medium"
+        assert stratum_key(make_example("complex", 2000)) == "complex/long"
+
+    def test_missing_metadata_is_unknown(self):
+        example = type("Example", (), {"inputs": {"bug_report": "curto"}, "metadata": None})()
+        assert stratum_key(example) == "unknown/short"
+
+
+class TestStratifiedSampler:
+    def test_pilot_covers_every_stratum(self):
+        sampler = StratifiedSampler(population({"simple": 20, "medium": 10, "complex": 3}), sample_size=6, seed=1)
+        strata = Counter(stratum_key(example) for example in sampler)
+        assert strata == {"simple/short": 2, "medium/short": 2, "complex/short": 2}
+
+    def test_remaining_sample_is_proportional_to_strata(self):
+        sampler = StratifiedSampler(population({"simple": 60, "medium": 30, "complex": 10}), sample_size=20, seed=1)
+        strata = Counter(stratum_key(example) for example in sampler)
+        assert strata == {"simple/short": 12, "medium/short": 6, "complex/short": 2}
+
+    def test_token_budget_stops_sampling(self):
+        sampler = StratifiedSampler(
+            population({"simple": 10}), token_budget=250, estimate_tokens=lambda example: 100, seed=1
+        )
+        assert len(list(sampler)) == 2
+
+
+class TestStratifiedSample:
+    def test_draw_is_reproducible_with_default_seed(self, monkeypatch):
+        monkeypatch.delenv("EVAL_SAMPLING_SEED", raising=False)
+        examples = population({"simple": 30, "medium": 20, "complex": 10})
+
+        first = StratifiedSampler(examples, sample_size=12, seed=sampling_seed()).draw()
+        second = StratifiedSampler(examples, sample_size=12, seed=sampling_seed()).draw()
+
+        assert first == second
+        assert first.strata_sizes == {"simple/short": 30, "medium/short": 20, "complex/short": 10}
+
+    def test_weighted_average_from_scored_examples(self):
+        sample = StratifiedSampler(population({"simple": 30, "complex": 10}), sample_size=4, seed=1).draw()
+        scored = [
+            (example, {"f1_score": 1.0 if stratum_key(example).startswith("simple") else 0.0})
+            for example in sample
+        ]
+
+        assert sample.weighted_averages(scored, ["f1_score"])["f1_score"] == pytest.approx(0.75)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
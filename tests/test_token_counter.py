@@ -0,0 +1,102 @@
+"""
+Testes da contagem de tokens e da estimativa de consumo (sem chamadas externas).
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+# Adicionar src ao path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+import evaluate
+import token_counter
+from token_counter import MESSAGE_OVERHEAD_TOKENS, REPLY_PRIMING_TOKENS, TokenCounter, get_token_counter
+
+
+class FakeEncoding:
+    name = "fake"
+
+    def __init__(self):
+        self.calls = 0
+
+    def encode(self, text, disallowed_special=()):
+        self.calls += 1
+        return text.split()
+
+
+def make_example(bug_report, reference):
+    return type("Example", (), {"inputs": {"bug_report": bug_report}, "outputs": {"reference": reference}})()
+
+
+@pytest.fixture
+def heuristic_counter(monkeypatch):
+    monkeypatch.setenv("TOKEN_COUNTER", "heuristic")
+    get_token_counter.cache_clear()
+    yield
+    get_token_counter.cache_clear()
+
+
+class TestTokenCounter:
+    def test_heuristic_without_encoding(self):
+        counter = TokenCounter("gemini-2.5-flash")
+        assert counter.name == "heuristic"
+        assert counter.count("x" * 40) == 10
+        assert counter.count("") == 0
+
+    def test_counts_are_cached_per_text(self):
+        encoding = FakeEncoding()
+        counter = TokenCounter("gpt-4o", encoding)
+        assert counter.count("um dois três") == 3
+        assert counter.count("um dois três") == 3
+        assert encoding.calls == 1
+
+    def test_message_overhead(self):
+        counter = TokenCounter("gpt-4o", FakeEncoding())
+        expected = 2 + 3 + 2 * MESSAGE_OVERHEAD_TOKENS + REPLY_PRIMING_TOKENS
+        assert counter.count_messages(["a b", "c d e"]) == expected
+
+    def test_unavailable_tokenizer_falls_back_to_heuristic(self, monkeypatch):
+        monkeypatch.setenv("TOKEN_COUNTER", "auto")
+        monkeypatch.setattr(token_counter, "_load_encoding", lambda model: None)
+        get_token_counter.cache_clear()
+        try:
+            assert get_token_counter("gpt-4o").name == "heuristic"
+        finally:
+            get_token_counter.cache_clear()
+
+
+class TestEvalTokenEstimate:
+    def test_uses_real_judge_prompts(self, monkeypatch, heuristic_counter):
+        monkeypatch.setenv("EVAL_JUDGE_MODE", "individual")
+        monkeypatch.setenv("EVAL_BUG_METRICS", "false")
+        example = make_example("Botão não funciona", "Como usuário, eu quero comprar.")
+        core = evaluate._estimate_example_eval_tokens(example)
+
+        monkeypatch.setenv("EVAL_BUG_METRICS", "true")
+        with_bug_metrics = evaluate._estimate_example_eval_tokens(example)
+
+        monkeypatch.setenv("EVAL_JUDGE_MODE", "combined")
+        combined = evaluate._estimate_example_eval_tokens(example)
+
+        assert core < with_bug_metrics
+        assert combined < with_bug_metrics
+
+    def test_estimate_grows_with_example_size(self, heuristic_counter):
+        short = evaluate._estimate_example_eval_tokens(make_example("bug", "ref"))
+        long = evaluate._estimate_example_eval_tokens(make_example("bug " * 500, "ref " * 500))
+        assert long > short
+
+    def test_rendered_prompt_template_replaces_fixed_overhead(self, heuristic_counter):
+        from langchain_core.prompts import ChatPromptTemplate
+
+        template = ChatPromptTemplate.from_messages([("system", "Seja breve."), ("human", "{bug_report}")])
+        example = make_example("Botão não funciona", "ref")
+        with_template = evaluate._estimate_example_eval_tokens(example, prompt_template=template)
+        without_template = evaluate._estimate_example_eval_tokens(example)
+
+        assert without_template - with_template > evaluate.GENERATION_PROMPT_OVERHEAD_TOKENS // 2
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
@@ -0,0 +1,109 @@
+"""
+Testes da contabilização de tokens e custo (sem chamadas externas).
+"""
+import json
+import sys
+from pathlib import Path
+
+import pytest
+from langchain_core.messages import AIMessage
+from langchain_core.prompts import ChatPromptTemplate
+
+# Adicionar src ao path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+import request_coalescer
+import usage
+import utils
+from llm_cache import ResponseCache
+from usage import UsageTracker, extract_usage
+
+
+class FakeLLM:
+    model_name = "gpt-4o-mini"
+    temperature = 0
+
+    def invoke(self, prompt_value):
+        return AIMessage(
+            content="Como usuário, eu quero...",
+            usage_metadata={"input_tokens": 100, "output_tokens": 20, "total_tokens": 120},
+        )
+
+
+@pytest.fixture
+def tracker(monkeypatch):
+    tracker = UsageTracker(prices={"gpt-4o-mini": (0.15, 0.60), "gpt-4o": (2.50, 10.00)})
+    monkeypatch.setattr(usage, "_tracker", tracker)
+    return tracker
+
+
+class TestExtractUsage:
+    def test_usage_metadata(self):
+        message = AIMessage(content="ok", usage_metadata={"input_tokens": 7, "output_tokens": 3, "total_tokens": 10})
+        assert extract_usage(message) == (7, 3)
+
+    def test_openai_token_usage_fallback(self):
+        message = AIMessage(content="ok", response_metadata={"token_usage": {"prompt_tokens": 5, "completion_tokens": 2}})
+        assert extract_usage(message) == (5, 2)
+
+    def test_missing_usage(self):
+        assert extract_usage(AIMessage(content="ok")) == (0, 0)
+
+
+class TestUsageTracker:
+    def test_aggregates_by_prompt_metric_and_model(self, tracker):
+        tracker.set_current_prompt("org/v1")
+        tracker.record("generation", "gpt-4o-mini", 1_000_000, 0)
+        tracker.record("f1_score", "gpt-4o", 1000, 1000)
+        tracker.set_current_prompt("org/v2")
+        tracker.record("generation", "gpt-4o-mini", 0, 1_000_000)
+        tracker.record_cached("f1_score", "gpt-4o")
+
+        by_prompt = tracker.totals_by("prompt")
+        assert by_prompt["org/v1"]["cost_usd"] == pytest.approx(0.15 + 0.0125)
+        assert by_prompt["org/v2"]["cost_usd"] == pytest.approx(0.60)
+        assert by_prompt["org/v2"]["cached_calls"] == 1
+
+        assert tracker.totals_by("label")["generation"]["calls"] == 2
+        assert tracker.totals_by("model")["gpt-4o"]["input_tokens"] == 1000
+
+    def test_dated_model_uses_base_price(self, tracker):
+        tracker.record("generation", "gpt-4o-mini-2024-07-18", 1_000_000, 0)
+        assert tracker.totals_by("model")["gpt-4o-mini-2024-07-18"]["cost_usd"] == pytest.approx(0.15)
+
+    def test_price_override_from_env(self, monkeypatch):
+        monkeypatch.setenv("LLM_PRICES", '{"modelo-local": [1, 2]}')
+        tracker = UsageTracker()
+        tracker.record("generation", "modelo-local", 1_000_000, 1_000_000)
+        assert tracker.totals_by("model")["modelo-local"]["cost_usd"] == pytest.approx(3.0)
+
+    def test_export(self, tracker, tmp_path):
+        tracker.set_current_prompt("org/v1")
+        tracker.record("clarity", "desconhecido", 10, 5)
+        path = tmp_path / "usage.json"
+        tracker.export(str(path))
+
+        report = json.loads(path.read_text(encoding="utf-8"))
+        assert report["entries"][0]["label"] == "clarity"
+        assert report["by_prompt"]["org/v1"]["input_tokens"] == 10
+        assert report["unpriced_models"] == ["desconhecido"]
+
+
+class TestGenerationUsage:
+    def test_generation_and_cache_hits_are_recorded(self, tracker, monkeypatch, tmp_path):
+        cache = ResponseCache(str(tmp_path / "cache.sqlite"))
+        monkeypatch.setattr(utils, "get_response_cache", lambda: cache)
+        monkeypatch.setattr(request_coalescer, "get_request_coalescer", lambda: None)
+        prompt = ChatPromptTemplate.from_messages([("human", "{bug_report}")])
+
+        tracker.set_current_prompt("org/v1")
+        utils.generate_answer(prompt, {"bug_report": "Botão quebrado"}, FakeLLM())
+        utils.generate_answer(prompt, {"bug_report": "Botão quebrado"}, FakeLLM())
+
+        totals = tracker.totals_by("prompt")["org/v1"]
+        assert (totals["calls"], totals["cached_calls"]) == (1, 1)
+        assert (totals["input_tokens"], totals["output_tokens"]) == (100, 20)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
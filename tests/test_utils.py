@@ -0,0 +1,55 @@
+"""
+Testes das funções auxiliares de leitura de datasets.
+"""
+import gzip
+import json
+import sys
+from pathlib import Path as P
+
+import pytest
+
+# Adicionar src ao path
+sys.path.insert(0, str(P(__file__).parent.parent / "src"))
+
+from utils import iter_jsonl
+
+RECORDS = [{"inputs": {"bug_report": f"bug {i}"}, "outputs": {"reference": f"ref {i}"}} for i in range(3)]
+
+
+def _jsonl_text(records):
+    return "\n".join(json.dumps(record) for record in records) + "\n\n"
+
+
+class TestIterJsonl:
+    def test_reads_plain_jsonl_skipping_blank_lines(self, tmp_path):
+        path = tmp_path / "data.jsonl"
+        path.write_text(_jsonl_text(RECORDS), encoding="utf-8")
+
+        assert list(iter_jsonl(str(path))) == RECORDS
+
+    def test_reads_gzip_jsonl(self, tmp_path):
+        path = tmp_path / "data.jsonl.gz"
+        with gzip.open(path, "wt", encoding="utf-8") as f:
+            f.write(_jsonl_text(RECORDS))
+
+        assert list(iter_jsonl(str(path))) == RECORDS
+
+    def test_reads_zstd_jsonl(self, tmp_path):
+        zstandard = pytest.importorskip("zstandard")
+        path = tmp_path / "data.jsonl.zst"
+        path.write_bytes(zstandard.ZstdCompressor().compress(_jsonl_text(RECORDS).encode("utf-8")))
+
+        assert list(iter_jsonl(str(path))) == RECORDS
+
+    def test_yields_lazily_and_reports_bad_line(self, tmp_path):
+        path = tmp_path / "data.jsonl"
+        path.write_text(json.dumps(RECORDS[0]) + "\n{quebrado\n", encoding="utf-8")
+
+        records = iter_jsonl(str(path))
+        assert next(records) == RECORDS[0]
+        with pytest.raises(json.JSONDecodeError, match="linha 2"):
+            next(records)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])